@@ -2,59 +2,69 @@
 
 import os
 import json
+import time
+import queue
+import threading
+from contextlib import contextmanager
 from crewai import Agent, Task, Crew, Process, LLM
 from dotenv import load_dotenv
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from pydantic import ValidationError
+
+from agents.crew_prompts import (
+    CINEMATIC_KNOWLEDGE_BASE,
+    PROMPT_MODES,
+    agent_templates,
+    editor_schema,
+    estimate_tokens,
+    vocabulary
+)
+from agents.crew_metrics import CrewMetrics
+from models.structured_prompt import StructuredPrompt
+from utils.json_extract import extract_json, JSONExtractionError
 
 load_dotenv()
 
-# Enhanced Knowledge Base with STRICT definitions
-CINEMATIC_KNOWLEDGE_BASE = {
-    "lenses": {
-        "14mm": "Ultra-wide angle, extreme perspective distortion, vast landscapes",
-        "24mm": "Wide angle, elongates depth, exaggerated perspective, action scenes",
-        "35mm": "Moderate wide, documentary feel, environmental context",
-        "50mm": "Standard, human eye perspective, neutral, grounded realism",
-        "85mm": "Portrait prime, flattering facial compression, subject isolation",
-        "100mm": "Tight portrait/macro, shallow DOF, extreme subject separation",
-        "135mm": "Telephoto, heavy background compression, voyeuristic, intimate"
-    },
-    "lighting_setups": {
-        "rembrandt": "High contrast, dramatic triangle of light on cheek, classical portrait",
-        "butterfly": "Glamour lighting, soft butterfly shadow under nose, beauty/fashion",
-        "split": "50/50 light-dark face split, mystery, duality, villain aesthetic",
-        "soft_diffused": "Romantic, safe, commercial, low contrast, even illumination",
-        "chiaroscuro": "Extreme contrast light/dark, pictorial, renaissance painting style",
-        "low_key": "Predominant shadows, minimal fill, noir, suspense, drama",
-        "high_key": "Bright, even, minimal shadows, optimistic, commercial, product",
-        "rim_light": "Backlight edge highlighting, subject separation, heroic silhouette",
-        "practical": "Motivated lighting from visible sources (lamps, windows), realism"
-    },
-    "lighting_directions": {
-        "front": "Light facing subject directly, minimal shadows, flat but clear",
-        "side_45": "45-degree side light, dimensional modeling, natural depth",
-        "side_90": "Hard side light, strong contrast, dramatic edge",
-        "back": "Backlight/rim light, silhouette, subject separation from background",
-        "top": "Overhead light, harsh downward shadows, institutional feel",
-        "bottom": "Under-lighting, horror aesthetic, unnatural and unsettling",
-        "three_quarter": "Classic portrait position, natural and flattering"
-    },
-    "angles": {
-        "low_angle": "Camera looks up, dominance, power, imposing, hero shot",
-        "high_angle": "Camera looks down, vulnerability, weakness, isolation",
-        "dutch": "Tilted horizon, unease, chaos, disorientation",
-        "eye_level": "Neutral observer, equal power dynamic, documentary",
-        "overhead": "Bird's eye, god's view, surveillance, geometric"
-    },
-    "color_schemes": {
-        "teal_orange": "Cinematic blockbuster, warm skin tones with cool backgrounds",
-        "monochrome_blue": "Cold, clinical, sci-fi, melancholic mood",
-        "warm_golden": "Sunset, nostalgia, comfort, romantic atmosphere",
-        "desaturated": "Gritty realism, documentary, muted emotional tone",
-        "vibrant_saturated": "Pop art, energetic, commercial, youth-oriented",
-        "noir_contrast": "High contrast black and white aesthetic with color hints"
-    }
-}
+# Token-level streaming: crewai emits LLMStreamChunkEvent with the LLM as source.
+# Every agent has its own LLM, so chunks are routed to the request that owns it.
+try:
+    from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+except ImportError:
+    try:
+        from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        crewai_event_bus = None
+
+TOKEN_STREAMING_AVAILABLE = crewai_event_bus is not None
+
+_token_sinks: Dict[int, Tuple[Callable, str]] = {}
+_token_sinks_lock = threading.Lock()
+
+if TOKEN_STREAMING_AVAILABLE:
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _route_stream_chunk(source, event):
+        with _token_sinks_lock:
+            target = _token_sinks.get(id(source))
+        if target:
+            sink, agent_name = target
+            sink("token", {"agent": agent_name, "chunk": event.chunk})
+
+@contextmanager
+def _token_stream(agents: Dict[str, Agent], sink: Optional[Callable]):
+    """Route streamed LLM chunks of these agents to sink for the duration"""
+    if sink is None or not TOKEN_STREAMING_AVAILABLE:
+        yield
+        return
+    
+    with _token_sinks_lock:
+        for name, agent in agents.items():
+            _token_sinks[id(agent.llm)] = (sink, name)
+    try:
+        yield
+    finally:
+        with _token_sinks_lock:
+            for agent in agents.values():
+                _token_sinks.pop(id(agent.llm), None)
 
 class CinemaCrew:
     """
@@ -66,112 +76,39 @@ class CinemaCrew:
     - This is achieved through strict JSON structure and seed management
     """
     
-    def __init__(self):
-        self.llm = LLM(
+    def __init__(self, prompt_mode: Optional[str] = None, metrics: Optional[CrewMetrics] = None):
+        self.prompt_mode = prompt_mode or os.getenv("CREW_PROMPT_MODE", "full")
+        if self.prompt_mode not in PROMPT_MODES:
+            raise ValueError(f"Unknown prompt mode: {self.prompt_mode} (use one of {PROMPT_MODES})")
+        
+        self.llm_config = dict(
             model=os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"),
             api_key=os.getenv("GROQ_API_KEY"),
             base_url="https://api.groq.com/openai/v1"
         )
+        self.metrics = metrics or CrewMetrics()
+        self.max_repairs = int(os.getenv("CREW_MAX_REPAIRS", "2"))
         
-        # Create specialized agents
-        self.director = self._create_director()
-        self.dp = self._create_dp()
-        self.gaffer = self._create_gaffer()
-        self.editor = self._create_editor()
+        # Agent templates are built once; every request gets FRESH Agent objects
+        # built from them, so no agent state is shared between concurrent shots
+        self._templates = agent_templates(self.prompt_mode)
         
         print("🎬 Cinema Crew initialized (PARAMETER ISOLATION MODE)")
         print("   Features: Strict Attribute Locking, Seed Preservation")
+        print(f"   Prompt mode: {self.prompt_mode}")
     
-    def _create_director(self) -> Agent:
-        """Director - Creates immutable Subject Anchor"""
-        return Agent(
-            role="Film Director - Subject Anchor Specialist",
-            goal="Create PRECISE, UNCHANGING subject descriptions that lock identity.",
-            backstory="""You create the SUBJECT ANCHOR - a detailed, immutable physical description.
-This anchor MUST remain constant across all parameter variations. You describe:
-- Exact clothing (color, style, texture)
-- Physical features (hair, face, body type, age)
-- Pose and position (specific action, orientation)
-- Distinguishing marks (scars, accessories, unique features)
-
-CRITICAL: Your description is the IDENTITY LOCK. Once set, it NEVER changes.""",
-            llm=self.llm,
-            verbose=True,
-            allow_delegation=False
-        )
-    
-    def _create_dp(self) -> Agent:
-        """DP - Camera ONLY, no subject changes"""
-        return Agent(
-            role="Director of Photography - Camera Specialist",
-            goal="Define ONLY camera parameters. NEVER modify the subject.",
-            backstory=f"""You work ONLY with camera and lens. You have access to:
-{json.dumps(CINEMATIC_KNOWLEDGE_BASE['lenses'], indent=2)}
-
-YOU MUST:
-1. Choose lens focal length (14mm-135mm)
-2. Set camera angle from: {list(CINEMATIC_KNOWLEDGE_BASE['angles'].keys())}
-3. Define depth of field (f/1.4 to f/22)
-4. Set camera movement (static/push-in/handheld)
-5. Define composition rule (Rule of Thirds, Center Frame, etc.)
-
-YOU MUST NOT:
-- Change the subject description
-- Modify lighting
-- Alter colors or mood
-- Touch anything except camera/lens parameters""",
-            llm=self.llm,
-            verbose=True,
-            allow_delegation=False
-        )
-    
-    def _create_gaffer(self) -> Agent:
-        """Gaffer - Lighting ONLY, no subject changes"""
-        return Agent(
-            role="Gaffer - Lighting Specialist",
-            goal="Define ONLY lighting parameters. NEVER modify subject or camera.",
-            backstory=f"""You work ONLY with lights. You have access to:
-SETUPS: {list(CINEMATIC_KNOWLEDGE_BASE['lighting_setups'].keys())}
-DIRECTIONS: {list(CINEMATIC_KNOWLEDGE_BASE['lighting_directions'].keys())}
-
-YOU MUST:
-1. Choose lighting setup (Rembrandt, Butterfly, etc.)
-2. Set direction (front, side_45, back, etc.)
-3. Define color temperature (3200K warm to 7000K cold)
-4. Set quality (hard/soft)
-5. Define shadow characteristics
-
-YOU MUST NOT:
-- Change the subject description
-- Modify camera angle or lens
-- Alter the subject's pose or clothing
-- Touch anything except lighting parameters""",
-            llm=self.llm,
-            verbose=True,
-            allow_delegation=False
-        )
-    
-    def _create_editor(self) -> Agent:
-        """Editor - JSON Assembly with strict validation"""
-        return Agent(
-            role="Technical Prompt Engineer - JSON Architect",
-            goal="Assemble STRICTLY SEPARATED JSON where each attribute is isolated.",
-            backstory="""You are a compiler engineer. You enforce STRICT SEPARATION:
-
-JSON STRUCTURE RULES:
-1. 'objects' array = Subject ONLY (from Director, IMMUTABLE)
-2. 'photographic_characteristics' = Camera ONLY (from DP)
-3. 'lighting' block = Lighting ONLY (from Gaffer)
-4. 'aesthetics.color_scheme' = Color ONLY (from Director)
-
-NO CROSS-CONTAMINATION. If the user changes lighting, you ONLY modify the 'lighting' block.
-The 'objects' array and 'photographic_characteristics' remain BYTE-FOR-BYTE identical.
-
-This is ATTRIBUTE DISENTANGLEMENT - the core of FIBO's power.""",
-            llm=self.llm,
-            verbose=True,
-            allow_delegation=False
-        )
+    def _build_agents(self, stream: bool = False) -> Dict[str, Agent]:
+        """Build per-request agents from the cached templates"""
+        # One LLM per agent so token usage (and streamed tokens) can be attributed per agent
+        return {
+            name: Agent(
+                **template,
+                llm=LLM(**self.llm_config, stream=stream),
+                verbose=True,
+                allow_delegation=False
+            )
+            for name, template in self._templates.items()
+        }
     
     def create_single_shot(
         self,
@@ -179,7 +116,8 @@ This is ATTRIBUTE DISENTANGLEMENT - the core of FIBO's power.""",
         shot_type: str = "medium shot",
         locked_subject: Optional[Dict] = None,  # NEW: Lock subject from previous shot
         locked_camera: Optional[Dict] = None,   # NEW: Lock camera from previous shot
-        locked_lighting: Optional[Dict] = None  # NEW: Lock lighting from previous shot
+        locked_lighting: Optional[Dict] = None,  # NEW: Lock lighting from previous shot
+        event_sink: Optional[Callable[[str, Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         """
         Create shot with OPTIONAL parameter locking
@@ -190,7 +128,11 @@ This is ATTRIBUTE DISENTANGLEMENT - the core of FIBO's power.""",
             locked_subject: If provided, use this exact subject (no changes)
             locked_camera: If provided, use this exact camera (no changes)
             locked_lighting: If provided, use this exact lighting (no changes)
+            event_sink: Optional callback(event, data) receiving agent outputs,
+                streamed tokens and the validated prompt as they are produced
         """
+        emit = event_sink or (lambda event, data=None: None)
+        
         print(f"\\n{'='*70}")
         print(f"🎬 CREATING SHOT: {shot_type}")
         print(f"   Locked Subject: {'YES' if locked_subject else 'NO'}")
@@ -198,7 +140,10 @@ This is ATTRIBUTE DISENTANGLEMENT - the core of FIBO's power.""",
         print(f"   Locked Lighting: {'YES' if locked_lighting else 'NO'}")
         print(f"{'='*70}\\n")
         
+        # Fresh agents per request - concurrent shots never share agent state
+        agents = self._build_agents(stream=event_sink is not None)
         tasks = []
+        task_agents = {}  # task name -> agent name, for token accounting
         
         # Task 1: Director creates subject (or uses locked)
         if locked_subject:
@@ -228,9 +173,10 @@ oriented at three-quarter angle to camera, wearing silver wristwatch, holding a
 Your output will be the IDENTITY LOCK.
 """,
                 expected_output="Detailed, immutable subject description paragraph",
-                agent=self.director
+                agent=agents["director"]
             )
             tasks.append(vision_task)
+            task_agents["vision"] = "director"
         
         # Task 2: DP creates camera (or uses locked)
         if locked_camera:
@@ -248,7 +194,7 @@ MANDATORY RULES:
 
 OUTPUT REQUIRED:
 1. lens_focal_length: "XXmm" (number + mm)
-2. camera_angle: Choose from {list(CINEMATIC_KNOWLEDGE_BASE['angles'].keys())}
+2. camera_angle: Choose from {vocabulary('angles', self.prompt_mode)}
 3. depth_of_field: "f/X.X shallow|medium|deep"
 4. camera_movement: "static" or "push-in" or "handheld" or "crane"
 5. composition: "Rule of Thirds" or "Center Framed" or "Golden Ratio"
@@ -256,10 +202,11 @@ OUTPUT REQUIRED:
 DO NOT mention the subject. Only camera specs.
 """,
                 expected_output="Camera specification with lens, angle, f-stop, movement, composition",
-                agent=self.dp,
+                agent=agents["dp"],
                 context=[vision_task] if not locked_subject else []
             )
             tasks.append(camera_task)
+            task_agents["camera"] = "dp"
         
         # Task 3: Gaffer creates lighting (or uses locked)
         if locked_lighting:
@@ -271,8 +218,8 @@ DO NOT mention the subject. Only camera specs.
 Define LIGHTING PARAMETERS.
 
 Choose from:
-SETUPS: {list(CINEMATIC_KNOWLEDGE_BASE['lighting_setups'].keys())}
-DIRECTIONS: {list(CINEMATIC_KNOWLEDGE_BASE['lighting_directions'].keys())}
+SETUPS: {vocabulary('lighting_setups', self.prompt_mode)}
+DIRECTIONS: {vocabulary('lighting_directions', self.prompt_mode)}
 
 OUTPUT REQUIRED:
 1. setup_name: One from your lighting setups list
@@ -284,10 +231,11 @@ OUTPUT REQUIRED:
 DO NOT mention the subject or camera. Only lighting specs.
 """,
                 expected_output="Lighting specification with setup, direction, temp, quality, shadows",
-                agent=self.gaffer,
+                agent=agents["gaffer"],
                 context=[vision_task] if not locked_subject else []
             )
             tasks.append(lighting_task)
+            task_agents["lighting"] = "gaffer"
         
         # Task 4: Editor assembles STRICT JSON
         json_task = Task(
@@ -298,108 +246,152 @@ Assemble FIBO structured_prompt JSON with STRICT ATTRIBUTE SEPARATION.
 {f'CAMERA (LOCKED - USE EXACTLY): {camera_spec}' if locked_camera else 'CAMERA: From DP'}
 {f'LIGHTING (LOCKED - USE EXACTLY): {lighting_spec}' if locked_lighting else 'LIGHTING: From Gaffer'}
 
-JSON SCHEMA (MANDATORY):
-{{
-    "short_description": "One sentence: subject + action + lighting mood + camera view",
-    "objects": [
-        {{
-            "description": "EXACT COPY of subject anchor from Director - DO NOT MODIFY",
-            "location": "center|left|right|foreground|background",
-            "relationship": "main focus",
-            "relative_size": "based on shot type",
-            "shape_and_color": "Extract colors from subject description",
-            "texture": "fabric/skin textures from subject",
-            "appearance_details": "From subject anchor",
-            "pose": "From subject anchor", 
-            "orientation": "From subject anchor"
-        }}
-    ],
-    "background_setting": "Generic environment matching scene, NO subject details here",
-    "lighting": {{
-        "conditions": "Gaffer's setup name + color temp (e.g., 'Rembrandt 3200K warm')",
-        "direction": "Gaffer's direction",
-        "shadow": "Gaffer's shadow characteristics",
-        "quality": "Gaffer's quality (hard/soft)"
-    }},
-    "aesthetics": {{
-        "composition": "DP's composition rule",
-        "color_scheme": "Dominant color palette from lighting temp and scene mood",
-        "mood_atmosphere": "Emotional keyword from scene",
-        "preference_score": "very high",
-        "aesthetic_score": "very high"
-    }},
-    "photographic_characteristics": {{
-        "depth_of_field": "DP's f-stop specification",
-        "focus": "sharp on subject",
-        "camera_angle": "DP's angle",
-        "lens_focal_length": "DP's focal length with 'mm'",
-        "camera_movement": "DP's movement"
-    }},
-    "style_medium": "photograph",
-    "context": "cinematic movie still",
-    "artistic_style": "photorealistic",
-    "negative_prompt": "blurry, low quality, deformed, disfigured, bad anatomy, extra limbs, mutation"
-}}
-
-VALIDATION CHECKLIST:
-✓ lens_focal_length has 'mm' suffix
-✓ objects[0].description is EXACT copy from Director
-✓ lighting block has NO subject references
-✓ photographic_characteristics has NO subject references
-✓ No cross-contamination between blocks
-
+{editor_schema(self.prompt_mode)}
 OUTPUT ONLY THE JSON. NO markdown, NO explanations.
 """,
             expected_output="Valid FIBO JSON with strict attribute separation",
-            agent=self.editor,
-            context=[t for t in tasks],
-            output_file="outputs/last_shot_isolated.json"
+            agent=agents["editor"],
+            context=[t for t in tasks]
         )
         tasks.append(json_task)
+        task_agents["json"] = "editor"
+        
+        # Agent-level streaming: tasks finish in order, one event per agent
+        finished_tasks = iter(task_agents.items())
+        
+        def on_task_done(output):
+            task_name, agent_name = next(finished_tasks, ("unknown", "unknown"))
+            emit("agent_output", {"task": task_name, "agent": agent_name, "output": output.raw})
         
         # Execute crew
         crew = Crew(
-            agents=[self.director, self.dp, self.gaffer, self.editor],
+            agents=list(agents.values()),
             tasks=tasks,
             process=Process.sequential,
-            verbose=True
+            verbose=True,
+            task_callback=on_task_done
         )
         
-        result = crew.kickoff()
+        emit("crew_started", {"shot_type": shot_type, "tasks": list(task_agents.keys())})
         
-        # Parse JSON
-        try:
-            result_text = str(result)
-            if "```json" in result_text:
-                json_str = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                json_str = result_text.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = result_text.strip()
-            
-            structured_prompt = json.loads(json_str)
-            
-            # Create simple prompt
-            simple_prompt = f"{structured_prompt.get('short_description', scene_description)}"
-            
-            print(f"\\n{'='*70}")
-            print(f"✅ SHOT CREATED with PARAMETER ISOLATION")
-            print(f"{'='*70}\\n")
+        # Editor output stays in this request's CrewOutput buffer (no shared output_file)
+        start_time = time.time()
+        with _token_stream(agents, event_sink):
+            result = crew.kickoff()
+        
+        token_usage = {
+            task_name: self._agent_usage(agents[agent_name], task, agent_name)
+            for task, (task_name, agent_name) in zip(tasks, task_agents.items())
+        }
+        
+        # Validate against the FIBO schema; on failure re-ask ONLY the Editor
+        raw_output = str(result)
+        structured_prompt, error = self._validate_prompt(raw_output)
+        
+        repairs = 0
+        while structured_prompt is None and repairs < self.max_repairs:
+            repairs += 1
+            self.metrics.increment("repairs_attempted")
+            print(f"🔧 Repair pass {repairs}/{self.max_repairs}: {error}")
+            emit("repair", {"attempt": repairs, "error": error})
             
-            return {
-                "structured_prompt": structured_prompt,
-                "simple_prompt": simple_prompt,
-                "scene_description": scene_description,
-                "shot_type": shot_type,
-                # Extract components for locking in future modifications
-                "locked_subject": structured_prompt.get("objects", [{}])[0] if structured_prompt.get("objects") else None,
-                "locked_camera": structured_prompt.get("photographic_characteristics", {}),
-                "locked_lighting": structured_prompt.get("lighting", {})
-            }
+            raw_output, repair_usage = self._repair_prompt(raw_output, error, event_sink)
+            token_usage[f"repair_{repairs}"] = repair_usage
+            structured_prompt, error = self._validate_prompt(raw_output)
             
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parse error: {e}")
-            return self._create_fallback(scene_description, shot_type)
+            if structured_prompt is not None:
+                self.metrics.increment("repairs_succeeded")
+        
+        latency = time.time() - start_time
+        self.metrics.record_shot(token_usage, latency, self.prompt_mode)
+        print(f"📊 Crew tokens: {sum(u['total_tokens'] for u in token_usage.values())} "
+              f"({self.prompt_mode} prompts, {latency:.1f}s)")
+        
+        if structured_prompt is None:
+            print(f"❌ Structured prompt invalid after {repairs} repair(s): {error}")
+            self.metrics.increment("fallbacks")
+            fallback = self._create_fallback(scene_description, shot_type)
+            emit("structured_prompt", {"structured_prompt": fallback["structured_prompt"], "fallback": True})
+            return fallback
+        
+        emit("structured_prompt", {"structured_prompt": structured_prompt, "fallback": False})
+        
+        # Create simple prompt
+        simple_prompt = f"{structured_prompt.get('short_description', scene_description)}"
+        
+        print(f"\\n{'='*70}")
+        print(f"✅ SHOT CREATED with PARAMETER ISOLATION")
+        print(f"{'='*70}\\n")
+        
+        return {
+            "structured_prompt": structured_prompt,
+            "simple_prompt": simple_prompt,
+            "scene_description": scene_description,
+            "shot_type": shot_type,
+            # Extract components for locking in future modifications
+            "locked_subject": structured_prompt.get("objects", [{}])[0] if structured_prompt.get("objects") else None,
+            "locked_camera": structured_prompt.get("photographic_characteristics", {}),
+            "locked_lighting": structured_prompt.get("lighting", {}),
+            "token_usage": token_usage,
+            "repairs": repairs
+        }
+    
+    def _validate_prompt(self, raw_output: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Extract + validate Editor output. Returns (prompt, None) or (None, error)"""
+        try:
+            data = extract_json(raw_output)
+        except JSONExtractionError as e:
+            self.metrics.increment("json_extraction_failures")
+            return None, str(e)
+        
+        try:
+            prompt = StructuredPrompt.model_validate(data)
+        except ValidationError as e:
+            self.metrics.increment("schema_validation_failures")
+            errors = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                for err in e.errors()
+            )
+            return None, errors
+        
+        return prompt.model_dump(exclude_none=True), None
+    
+    def _repair_prompt(
+        self,
+        raw_output: str,
+        error: str,
+        event_sink: Optional[Callable] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Targeted repair: a single Editor task fixes its own output"""
+        editor = self._build_agents(stream=event_sink is not None)["editor"]
+        repair_task = Task(
+            description=f"""
+Your FIBO structured_prompt JSON failed validation.
+
+ERRORS:
+{error}
+
+YOUR PREVIOUS OUTPUT:
+{raw_output}
+
+Fix ONLY what the errors require. Keep every other value EXACTLY as it was.
+
+{editor_schema(self.prompt_mode)}
+OUTPUT ONLY THE JSON. NO markdown, NO explanations.
+""",
+            expected_output="Valid FIBO JSON with strict attribute separation",
+            agent=editor
+        )
+        
+        with _token_stream({"editor": editor}, event_sink):
+            result = Crew(
+                agents=[editor],
+                tasks=[repair_task],
+                process=Process.sequential,
+                verbose=True
+            ).kickoff()
+        
+        return str(result), self._agent_usage(editor, repair_task, "editor")
     
     def modify_single_parameter(
         self,
@@ -482,6 +474,36 @@ OUTPUT ONLY THE JSON. NO markdown, NO explanations.
             "locked_lighting": base_shot.get("locked_lighting") if parameter_type != "lighting" else modified_prompt["lighting"]
         }
     
+    def _agent_usage(self, agent: Agent, task: Task, agent_name: str) -> Dict[str, Any]:
+        """Token usage for one agent's task (estimated if the LLM reports none)"""
+        summary = None
+        if hasattr(agent.llm, "get_token_usage_summary"):
+            summary = agent.llm.get_token_usage_summary()
+        elif getattr(agent, "_token_process", None) is not None:
+            summary = agent._token_process.get_summary()
+        
+        if summary is not None and summary.total_tokens:
+            return {
+                "agent": agent_name,
+                "prompt_tokens": summary.prompt_tokens,
+                "completion_tokens": summary.completion_tokens,
+                "total_tokens": summary.total_tokens,
+                "requests": summary.successful_requests,
+                "estimated": False
+            }
+        
+        # Fallback: estimate from the prompt text we sent and the output we got
+        prompt_tokens = estimate_tokens(agent.backstory + agent.goal + task.description)
+        completion_tokens = estimate_tokens(task.output.raw if task.output else "")
+        return {
+            "agent": agent_name,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "requests": 1,
+            "estimated": True
+        }
+    
     def _create_fallback(self, scene: str, shot_type: str) -> Dict[str, Any]:
         """Fallback if processing fails"""
         return {
@@ -507,6 +529,81 @@ OUTPUT ONLY THE JSON. NO markdown, NO explanations.
             "shot_type": shot_type
         }
 
+class CrewPoolBusy(TimeoutError):
+    """No crew was returned to the pool within the acquire timeout"""
+
+class CrewPool:
+    """
+    Pool of CinemaCrew instances for concurrent shot creation
+    
+    Each request checks out its own crew (own LLM client, fresh agents per call),
+    so concurrent shots never race on agent state. Throughput scales with pool size;
+    extra requests wait up to acquire_timeout seconds for a crew to be returned,
+    then fail with CrewPoolBusy (None waits indefinitely).
+    """
+    
+    def __init__(self, size: int = 4, prompt_mode: Optional[str] = None, acquire_timeout: Optional[float] = 60.0):
+        if size < 1:
+            raise ValueError("CrewPool size must be at least 1")
+        
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.metrics = CrewMetrics()
+        self._crews: "queue.Queue[CinemaCrew]" = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._crews.put(CinemaCrew(prompt_mode=prompt_mode, metrics=self.metrics))
+        
+        self._lock = threading.Lock()
+        self.active = 0
+        self.completed = 0
+        self.timeouts = 0
+        
+        print(f"🎬 Crew pool ready ({size} crews)")
+    
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """Check out a crew for the duration of one request (timeout defaults to acquire_timeout)"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        try:
+            crew = self._crews.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise CrewPoolBusy(f"No Cinema Crew available within {timeout}s")
+        
+        with self._lock:
+            self.active += 1
+        try:
+            yield crew
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+            self._crews.put(crew)
+    
+    def create_single_shot(self, *args, **kwargs) -> Dict[str, Any]:
+        """Run CinemaCrew.create_single_shot on a pooled crew"""
+        with self.acquire() as crew:
+            return crew.create_single_shot(*args, **kwargs)
+    
+    def modify_single_parameter(self, *args, **kwargs) -> Dict[str, Any]:
+        """Run CinemaCrew.modify_single_parameter on a pooled crew"""
+        with self.acquire() as crew:
+            return crew.modify_single_parameter(*args, **kwargs)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool utilisation plus token/latency metrics"""
+        with self._lock:
+            stats = {
+                "pool_size": self.size,
+                "active": self.active,
+                "idle": self._crews.qsize(),
+                "completed": self.completed,
+                "timeouts": self.timeouts
+            }
+        stats["metrics"] = self.metrics.get_stats()
+        return stats
+
 if __name__ == "__main__":
     crew = CinemaCrew()
     
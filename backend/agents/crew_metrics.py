@@ -0,0 +1,85 @@
+# agents/crew_metrics.py
+# Thread-safe usage metrics shared by every crew in the pool
+
+import threading
+from collections import defaultdict
+from typing import Dict, Any
+
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens", "requests")
+
+
+class CrewMetrics:
+    """
+    Token and latency accounting for Cinema Crew runs
+
+    Usage is aggregated per agent, per task and per prompt mode so the cost
+    of each prompt can be compared between FULL and COMPACT modes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.shots = 0
+        self.total_latency = 0.0
+        self.by_agent: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(TOKEN_FIELDS, 0))
+        self.by_task: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(TOKEN_FIELDS, 0))
+        self.by_mode: Dict[str, Dict[str, float]] = defaultdict(lambda: {"shots": 0, "total_tokens": 0, "latency": 0.0})
+        self.estimated_records = 0
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    def record_shot(
+        self,
+        usage: Dict[str, Dict[str, Any]],
+        latency: float,
+        prompt_mode: str
+    ):
+        """
+        Record one crew run
+
+        Args:
+            usage: {task_name: {"agent": name, "prompt_tokens": ..., "estimated": bool, ...}}
+            latency: Wall-clock seconds for crew.kickoff()
+            prompt_mode: "full" or "compact"
+        """
+        with self._lock:
+            self.shots += 1
+            self.total_latency += latency
+
+            shot_tokens = 0
+            for task_name, task_usage in usage.items():
+                for field in TOKEN_FIELDS:
+                    value = task_usage.get(field, 0)
+                    self.by_task[task_name][field] += value
+                    self.by_agent[task_usage["agent"]][field] += value
+                shot_tokens += task_usage.get("total_tokens", 0)
+                if task_usage.get("estimated"):
+                    self.estimated_records += 1
+
+            mode = self.by_mode[prompt_mode]
+            mode["shots"] += 1
+            mode["total_tokens"] += shot_tokens
+            mode["latency"] += latency
+
+    def increment(self, counter: str, amount: int = 1):
+        """Bump a named event counter"""
+        with self._lock:
+            self.counters[counter] += amount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of all crew metrics"""
+        with self._lock:
+            return {
+                "shots": self.shots,
+                "average_latency": self.total_latency / self.shots if self.shots else 0,
+                "tokens_by_agent": {k: dict(v) for k, v in self.by_agent.items()},
+                "tokens_by_task": {k: dict(v) for k, v in self.by_task.items()},
+                "by_prompt_mode": {
+                    mode: {
+                        "shots": v["shots"],
+                        "tokens_per_shot": v["total_tokens"] / v["shots"] if v["shots"] else 0,
+                        "latency_per_shot": v["latency"] / v["shots"] if v["shots"] else 0
+                    }
+                    for mode, v in self.by_mode.items()
+                },
+                "estimated_usage_records": self.estimated_records,
+                "counters": dict(self.counters)
+            }
@@ -0,0 +1,249 @@
+# agents/crew_prompts.py
+# Prompt text for the Cinema Crew, in FULL and COMPACT modes
+
+import json
+from typing import Dict
+
+PROMPT_MODES = ("full", "compact")
+
+# Enhanced Knowledge Base with STRICT definitions
+CINEMATIC_KNOWLEDGE_BASE = {
+    "lenses": {
+        "14mm": "Ultra-wide angle, extreme perspective distortion, vast landscapes",
+        "24mm": "Wide angle, elongates depth, exaggerated perspective, action scenes",
+        "35mm": "Moderate wide, documentary feel, environmental context",
+        "50mm": "Standard, human eye perspective, neutral, grounded realism",
+        "85mm": "Portrait prime, flattering facial compression, subject isolation",
+        "100mm": "Tight portrait/macro, shallow DOF, extreme subject separation",
+        "135mm": "Telephoto, heavy background compression, voyeuristic, intimate"
+    },
+    "lighting_setups": {
+        "rembrandt": "High contrast, dramatic triangle of light on cheek, classical portrait",
+        "butterfly": "Glamour lighting, soft butterfly shadow under nose, beauty/fashion",
+        "split": "50/50 light-dark face split, mystery, duality, villain aesthetic",
+        "soft_diffused": "Romantic, safe, commercial, low contrast, even illumination",
+        "chiaroscuro": "Extreme contrast light/dark, pictorial, renaissance painting style",
+        "low_key": "Predominant shadows, minimal fill, noir, suspense, drama",
+        "high_key": "Bright, even, minimal shadows, optimistic, commercial, product",
+        "rim_light": "Backlight edge highlighting, subject separation, heroic silhouette",
+        "practical": "Motivated lighting from visible sources (lamps, windows), realism"
+    },
+    "lighting_directions": {
+        "front": "Light facing subject directly, minimal shadows, flat but clear",
+        "side_45": "45-degree side light, dimensional modeling, natural depth",
+        "side_90": "Hard side light, strong contrast, dramatic edge",
+        "back": "Backlight/rim light, silhouette, subject separation from background",
+        "top": "Overhead light, harsh downward shadows, institutional feel",
+        "bottom": "Under-lighting, horror aesthetic, unnatural and unsettling",
+        "three_quarter": "Classic portrait position, natural and flattering"
+    },
+    "angles": {
+        "low_angle": "Camera looks up, dominance, power, imposing, hero shot",
+        "high_angle": "Camera looks down, vulnerability, weakness, isolation",
+        "dutch": "Tilted horizon, unease, chaos, disorientation",
+        "eye_level": "Neutral observer, equal power dynamic, documentary",
+        "overhead": "Bird's eye, god's view, surveillance, geometric"
+    },
+    "color_schemes": {
+        "teal_orange": "Cinematic blockbuster, warm skin tones with cool backgrounds",
+        "monochrome_blue": "Cold, clinical, sci-fi, melancholic mood",
+        "warm_golden": "Sunset, nostalgia, comfort, romantic atmosphere",
+        "desaturated": "Gritty realism, documentary, muted emotional tone",
+        "vibrant_saturated": "Pop art, energetic, commercial, youth-oriented",
+        "noir_contrast": "High contrast black and white aesthetic with color hints"
+    }
+}
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars/token) for when the LLM reports no usage"""
+    return max(1, len(text) // 4) if text else 0
+
+def vocabulary(category: str, mode: str = "full") -> str:
+    """Allowed values for a knowledge base category"""
+    keys = list(CINEMATIC_KNOWLEDGE_BASE[category].keys())
+    if mode == "compact":
+        return "|".join(keys)
+    return str(keys)
+
+def _lens_reference(mode: str) -> str:
+    if mode == "compact":
+        # "14mm=Ultra-wide angle; 24mm=Wide angle; ..." - first clause only
+        return "; ".join(
+            f"{lens}={desc.split(',')[0]}"
+            for lens, desc in CINEMATIC_KNOWLEDGE_BASE["lenses"].items()
+        )
+    return json.dumps(CINEMATIC_KNOWLEDGE_BASE["lenses"], indent=2)
+
+def agent_templates(mode: str = "full") -> Dict[str, Dict[str, str]]:
+    """Role/goal/backstory for each crew agent"""
+    if mode not in PROMPT_MODES:
+        raise ValueError(f"Unknown prompt mode: {mode}")
+
+    if mode == "compact":
+        return {
+            "director": dict(
+                role="Film Director - Subject Anchor Specialist",
+                goal="Create PRECISE, UNCHANGING subject descriptions that lock identity.",
+                backstory="You write the SUBJECT ANCHOR: exact clothing, physical features, "
+                          "pose/orientation, distinguishing marks. It is the IDENTITY LOCK and never changes."
+            ),
+            "dp": dict(
+                role="Director of Photography - Camera Specialist",
+                goal="Define ONLY camera parameters. NEVER modify the subject.",
+                backstory=f"Camera/lens ONLY. Lenses: {_lens_reference(mode)}. "
+                          f"Angles: {vocabulary('angles', mode)}. Set lens, angle, f-stop (f/1.4-f/22), "
+                          "movement, composition. Never touch subject, lighting or colour."
+            ),
+            "gaffer": dict(
+                role="Gaffer - Lighting Specialist",
+                goal="Define ONLY lighting parameters. NEVER modify subject or camera.",
+                backstory=f"Lighting ONLY. Setups: {vocabulary('lighting_setups', mode)}. "
+                          f"Directions: {vocabulary('lighting_directions', mode)}. Set setup, direction, "
+                          "colour temp (3200K-7000K), quality, shadows. Never touch subject or camera."
+            ),
+            "editor": dict(
+                role="Technical Prompt Engineer - JSON Architect",
+                goal="Assemble STRICTLY SEPARATED JSON where each attribute is isolated.",
+                backstory="You compile FIBO JSON with strict separation: objects=Director, "
+                          "photographic_characteristics=DP, lighting=Gaffer, aesthetics.color_scheme=Director. "
+                          "No cross-contamination between blocks."
+            )
+        }
+
+    return {
+        "director": dict(
+            role="Film Director - Subject Anchor Specialist",
+            goal="Create PRECISE, UNCHANGING subject descriptions that lock identity.",
+            backstory="""You create the SUBJECT ANCHOR - a detailed, immutable physical description.
+This anchor MUST remain constant across all parameter variations. You describe:
+- Exact clothing (color, style, texture)
+- Physical features (hair, face, body type, age)
+- Pose and position (specific action, orientation)
+- Distinguishing marks (scars, accessories, unique features)
+
+CRITICAL: Your description is the IDENTITY LOCK. Once set, it NEVER changes."""
+        ),
+        "dp": dict(
+            role="Director of Photography - Camera Specialist",
+            goal="Define ONLY camera parameters. NEVER modify the subject.",
+            backstory=f"""You work ONLY with camera and lens. You have access to:
+{_lens_reference(mode)}
+
+YOU MUST:
+1. Choose lens focal length (14mm-135mm)
+2. Set camera angle from: {vocabulary('angles', mode)}
+3. Define depth of field (f/1.4 to f/22)
+4. Set camera movement (static/push-in/handheld)
+5. Define composition rule (Rule of Thirds, Center Frame, etc.)
+
+YOU MUST NOT:
+- Change the subject description
+- Modify lighting
+- Alter colors or mood
+- Touch anything except camera/lens parameters"""
+        ),
+        "gaffer": dict(
+            role="Gaffer - Lighting Specialist",
+            goal="Define ONLY lighting parameters. NEVER modify subject or camera.",
+            backstory=f"""You work ONLY with lights. You have access to:
+SETUPS: {vocabulary('lighting_setups', mode)}
+DIRECTIONS: {vocabulary('lighting_directions', mode)}
+
+YOU MUST:
+1. Choose lighting setup (Rembrandt, Butterfly, etc.)
+2. Set direction (front, side_45, back, etc.)
+3. Define color temperature (3200K warm to 7000K cold)
+4. Set quality (hard/soft)
+5. Define shadow characteristics
+
+YOU MUST NOT:
+- Change the subject description
+- Modify camera angle or lens
+- Alter the subject's pose or clothing
+- Touch anything except lighting parameters"""
+        ),
+        "editor": dict(
+            role="Technical Prompt Engineer - JSON Architect",
+            goal="Assemble STRICTLY SEPARATED JSON where each attribute is isolated.",
+            backstory="""You are a compiler engineer. You enforce STRICT SEPARATION:
+
+JSON STRUCTURE RULES:
+1. 'objects' array = Subject ONLY (from Director, IMMUTABLE)
+2. 'photographic_characteristics' = Camera ONLY (from DP)
+3. 'lighting' block = Lighting ONLY (from Gaffer)
+4. 'aesthetics.color_scheme' = Color ONLY (from Director)
+
+NO CROSS-CONTAMINATION. If the user changes lighting, you ONLY modify the 'lighting' block.
+The 'objects' array and 'photographic_characteristics' remain BYTE-FOR-BYTE identical.
+
+This is ATTRIBUTE DISENTANGLEMENT - the core of FIBO's power."""
+        )
+    }
+
+EDITOR_SCHEMA_FULL = """JSON SCHEMA (MANDATORY):
+{
+    "short_description": "One sentence: subject + action + lighting mood + camera view",
+    "objects": [
+        {
+            "description": "EXACT COPY of subject anchor from Director - DO NOT MODIFY",
+            "location": "center|left|right|foreground|background",
+            "relationship": "main focus",
+            "relative_size": "based on shot type",
+            "shape_and_color": "Extract colors from subject description",
+            "texture": "fabric/skin textures from subject",
+            "appearance_details": "From subject anchor",
+            "pose": "From subject anchor",
+            "orientation": "From subject anchor"
+        }
+    ],
+    "background_setting": "Generic environment matching scene, NO subject details here",
+    "lighting": {
+        "conditions": "Gaffer's setup name + color temp (e.g., 'Rembrandt 3200K warm')",
+        "direction": "Gaffer's direction",
+        "shadow": "Gaffer's shadow characteristics",
+        "quality": "Gaffer's quality (hard/soft)"
+    },
+    "aesthetics": {
+        "composition": "DP's composition rule",
+        "color_scheme": "Dominant color palette from lighting temp and scene mood",
+        "mood_atmosphere": "Emotional keyword from scene",
+        "preference_score": "very high",
+        "aesthetic_score": "very high"
+    },
+    "photographic_characteristics": {
+        "depth_of_field": "DP's f-stop specification",
+        "focus": "sharp on subject",
+        "camera_angle": "DP's angle",
+        "lens_focal_length": "DP's focal length with 'mm'",
+        "camera_movement": "DP's movement"
+    },
+    "style_medium": "photograph",
+    "context": "cinematic movie still",
+    "artistic_style": "photorealistic",
+    "negative_prompt": "blurry, low quality, deformed, disfigured, bad anatomy, extra limbs, mutation"
+}
+
+VALIDATION CHECKLIST:
+✓ lens_focal_length has 'mm' suffix
+✓ objects[0].description is EXACT copy from Director
+✓ lighting block has NO subject references
+✓ photographic_characteristics has NO subject references
+✓ No cross-contamination between blocks
+"""
+
+# Same keys, one line per block; "<D>" = Director, "<DP>" = DP, "<G>" = Gaffer
+EDITOR_SCHEMA_COMPACT = """SCHEMA (<D>=Director, <DP>=DP, <G>=Gaffer; fixed values as shown):
+{"short_description":"1 sentence: subject+action+light mood+camera view",
+"objects":[{"description":"<D> anchor VERBATIM","location":"center|left|right|foreground|background","relationship":"main focus","relative_size":"per shot type","shape_and_color":"<D> colors","texture":"<D> textures","appearance_details":"<D>","pose":"<D>","orientation":"<D>"}],
+"background_setting":"environment only, no subject",
+"lighting":{"conditions":"<G> setup + color temp","direction":"<G>","shadow":"<G>","quality":"<G> hard|soft"},
+"aesthetics":{"composition":"<DP>","color_scheme":"palette","mood_atmosphere":"keyword","preference_score":"very high","aesthetic_score":"very high"},
+"photographic_characteristics":{"depth_of_field":"<DP> f-stop","focus":"sharp on subject","camera_angle":"<DP>","lens_focal_length":"<DP> with mm","camera_movement":"<DP>"},
+"style_medium":"photograph","context":"cinematic movie still","artistic_style":"photorealistic",
+"negative_prompt":"blurry, low quality, deformed, disfigured, bad anatomy, extra limbs, mutation"}
+Rules: lens has 'mm'; objects[0].description copied exactly; no subject refs in lighting/camera blocks.
+"""
+
+def editor_schema(mode: str = "full") -> str:
+    """Schema + checklist block for the Editor task"""
+    return EDITOR_SCHEMA_COMPACT if mode == "compact" else EDITOR_SCHEMA_FULL
@@ -0,0 +1,93 @@
+# benchmarks/hdr_exr.py
+"""
+Master formats benchmark: file size and encode time per codec
+
+    python benchmarks/hdr_exr.py [--size 4k] [--exposure 0.5] [--repeat 2]
+
+Grades one synthetic frame and encodes it as 16-bit TIFF (uncompressed and
+Deflate), 16-bit PNG, and half-float EXR with every codec. ZIP/ZIPS/none
+always work (ExrStripWriter); PIZ and DWAA/DWAB need OpenCV built with
+OpenEXR and are reported as unavailable otherwise. Also reports how much of
+the frame the 16-bit masters clip that the float EXR keeps (> 1.0).
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hdr_pipeline import CinematicHDR, EXPORT_PROFILES, EXR_CV2_CODECS, exr_cv2_available
+
+SIZES = {"1080p": (1080, 1920), "4k": (2160, 3840)}
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="4k", choices=SIZES)
+    parser.add_argument("--exposure", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    output_dir = tempfile.mkdtemp(prefix="hdr_exr_")
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    hdr = CinematicHDR(output_dir=output_dir)
+    sys.stdout = stdout
+
+    h, w = SIZES[args.size]
+    rng = np.random.default_rng(0)
+    # Smooth gradients + mild grain, roughly like a generated frame
+    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+    base = np.stack([xx / w, yy / h, 0.5 + 0.5 * np.sin(xx / 97 + yy / 53)], axis=-1) * 255
+    frame = np.clip(base + rng.normal(0, 4, base.shape), 0, 255).astype(np.uint8)
+
+    settings = hdr._resolve_grade("neutral", args.exposure, 1.0, 1.0, 0.0)
+    graded_16bit = hdr._grade_8bit(frame, *settings)
+    graded_float = hdr._grade_float(frame, *settings)
+
+    cases = [
+        ("tiff_16bit", "balanced", lambda p, o: hdr._encode_tiff(graded_16bit, p, o), ".tiff"),
+        ("tiff_16bit", "small", lambda p, o: hdr._encode_tiff(graded_16bit, p, o), ".tiff"),
+        ("png_16bit", "fast", lambda p, o: hdr._encode_png(graded_16bit, p, o), ".png"),
+        ("png_16bit", "balanced", lambda p, o: hdr._encode_png(graded_16bit, p, o), ".png")
+    ]
+    for profile in ("none", "fast", "balanced", "small", "piz", "dwaa", "dwab"):
+        cases.append(("exr_half", profile, lambda p, o: hdr._encode_exr(graded_float, p, o), ".exr"))
+
+    rows = []
+    try:
+        for fmt, profile, encode, ext in cases:
+            opts = EXPORT_PROFILES[fmt][profile]
+            label = f"{fmt}/{profile}" + (f" ({opts['compression']})" if fmt == "exr_half" else "")
+            if opts.get("compression") in EXR_CV2_CODECS and not exr_cv2_available():
+                rows.append((label, None, None))
+                continue
+            path = os.path.join(output_dir, f"bench_{fmt}_{profile}{ext}")
+            seconds = best_of(lambda: encode(path, opts), args.repeat)
+            rows.append((label, os.path.getsize(path) / 2**20, seconds))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    clipped = float((graded_16bit == hdr.bit_depth_16).any(axis=2).mean() * 100)
+    print(f"{args.size} frame, exposure {args.exposure:+.2f}: 16-bit masters clip {clipped:.1f}% of pixels, "
+          f"EXR keeps them (max {graded_float.max():.2f})\n")
+    print(f"{'format/profile':<28} {'MB':>8} {'encode ms':>10}")
+    for label, size_mb, seconds in rows:
+        if size_mb is None:
+            print(f"{label:<28} {'unavailable (OpenCV without OpenEXR)':>30}")
+        else:
+            print(f"{label:<28} {size_mb:>8.1f} {seconds * 1000:>10.0f}")
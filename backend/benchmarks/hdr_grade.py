@@ -0,0 +1,103 @@
+# benchmarks/hdr_grade.py
+"""
+Grade kernel benchmark: time and peak memory at 1080p / 4K / 8K
+
+    python benchmarks/hdr_grade.py [--repeat 3] [--sizes 1080p,4k,8k]
+
+"legacy" is the original multi-pass float32 grade (upcast, per-step
+temporaries, clip, requantize), kept here only as the baseline.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hdr_pipeline import CinematicHDR
+
+SIZES = {"1080p": (1080, 1920), "4k": (2160, 3840), "8k": (4320, 7680)}
+GRADES = {
+    # Saturation != 1 -> LUT + one transform pass
+    "dramatic": dict(preset="dramatic", exposure=0.2, contrast=1.15, saturation=1.1, temperature=0.1),
+    # Saturation == 1 -> pure per-channel LUT
+    "neutral": dict(preset="neutral", exposure=0.2, contrast=1.15, saturation=1.0, temperature=0.1)
+}
+
+
+def legacy_grade(hdr, img_8bit, preset, exposure, contrast, saturation, temperature):
+    img_16bit = img_8bit.astype(np.uint16) * 257
+    exposure, contrast, saturation, temperature = hdr._resolve_grade(preset, exposure, contrast, saturation, temperature)
+    img = img_16bit.astype(np.float32) / hdr.bit_depth_16
+    if exposure != 0:
+        img = img * (2 ** exposure)
+    if contrast != 1.0:
+        img = (img - 0.5) * contrast + 0.5
+    if saturation != 1.0:
+        gray = (0.114 * img[:, :, 0] + 0.587 * img[:, :, 1] + 0.299 * img[:, :, 2])[:, :, np.newaxis]
+        img = gray + saturation * (img - gray)
+    if temperature != 0:
+        img[:, :, 2] = img[:, :, 2] + temperature * 0.1  # BGR: red is channel 2
+        img[:, :, 0] = img[:, :, 0] - temperature * 0.1
+    img = np.clip(img, 0.0, 1.0)
+    return (img * hdr.bit_depth_16).astype(np.uint16)
+
+
+def fused_grade(hdr, img_8bit, **grade):
+    img_16bit = hdr.convert_to_16bit(img_8bit)
+    return hdr.apply_cinematic_grade(img_16bit, inplace=True, **grade)
+
+
+def lut8_grade(hdr, img_8bit, **grade):
+    return hdr.apply_cinematic_grade(img_8bit, **grade)
+
+
+KERNELS = {"legacy": legacy_grade, "fused": fused_grade, "lut8": lut8_grade}
+
+
+def measure(fn, hdr, img, grade, repeat):
+    best = float("inf")
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(hdr, img, **grade)
+        best = min(best, time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sizes", default="1080p,4k,8k")
+    args = parser.parse_args()
+
+    hdr = CinematicHDR(output_dir=os.path.join("outputs", "hdr"))
+    rng = np.random.default_rng(0)
+
+    # Silence the pipeline's per-step logging while timing
+    devnull = open(os.devnull, "w")
+
+    rows = []
+    for size in args.sizes.split(","):
+        h, w = SIZES[size]
+        img = rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+        frame_mb = img.nbytes / 2**20
+        for grade_name, grade in GRADES.items():
+            for name, fn in KERNELS.items():
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    seconds, peak = measure(fn, hdr, img, grade, args.repeat)
+                finally:
+                    sys.stdout = stdout
+                rows.append((size, grade_name, name, seconds * 1000, peak / 2**20, peak / 2**20 / frame_mb))
+
+    print(f"{'size':<6} {'grade':<9} {'kernel':<8} {'ms':>9} {'peak MB':>9} {'x 8-bit frame':>14}")
+    for size, grade_name, name, ms, peak_mb, ratio in rows:
+        print(f"{size:<6} {grade_name:<9} {name:<8} {ms:>9.1f} {peak_mb:>9.1f} {ratio:>14.1f}")
@@ -0,0 +1,87 @@
+# benchmarks/hdr_layout.py
+"""
+Colour-layout benchmark: decode time and full-frame colour conversions per shot
+
+    python benchmarks/hdr_layout.py [--sizes 1080p,4k] [--repeat 3]
+
+Runs decode + process_frame (all formats) and counts every cv2.cvtColor
+call and the bytes it copied. With the old RGB layout a shot made 7
+full-frame conversions (TIFF write, 2x in each tone-mapped preview, and one
+per JPEG write); the BGR pipeline should report 0. Decode compares the old
+PIL -> RGB path against cv2.imdecode straight to BGR.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hdr_pipeline import CinematicHDR
+
+SIZES = {"1080p": (1080, 1920), "4k": (2160, 3840), "8k": (4320, 7680)}
+
+conversions = {"calls": 0, "bytes": 0}
+_cvt_color = cv2.cvtColor
+
+def counting_cvt_color(src, code, *args, **kwargs):
+    conversions["calls"] += 1
+    conversions["bytes"] += src.nbytes
+    return _cvt_color(src, code, *args, **kwargs)
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sizes", default="1080p,4k")
+    args = parser.parse_args()
+
+    output_dir = tempfile.mkdtemp(prefix="hdr_layout_")
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull
+    hdr = CinematicHDR(output_dir=output_dir)
+    sys.stdout = stdout
+
+    cv2.cvtColor = counting_cvt_color
+    rng = np.random.default_rng(0)
+
+    rows = []
+    try:
+        for size in args.sizes.split(","):
+            h, w = SIZES[size]
+            frame = cv2.GaussianBlur(rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8), (9, 9), 0)
+            data = cv2.imencode(".png", frame)[1].tobytes()
+
+            pil_ms = best_of(lambda: np.array(Image.open(BytesIO(data))), args.repeat) * 1000
+            cv_ms = best_of(lambda: hdr.decode_image(data), args.repeat) * 1000
+
+            conversions.update(calls=0, bytes=0)
+            sys.stdout = devnull
+            try:
+                shot_s = best_of(lambda: hdr.process_frame(hdr.decode_image(data), "bench", preset="dramatic"), 1)
+            finally:
+                sys.stdout = stdout
+
+            rows.append((size, pil_ms, cv_ms, conversions["calls"], conversions["bytes"] / 2**20, shot_s))
+    finally:
+        cv2.cvtColor = _cvt_color
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    print(f"{'size':<6} {'PIL decode ms':>14} {'imdecode ms':>12} {'cvtColor/shot':>14} {'copied MB':>10} {'shot s':>7}")
+    for size, pil_ms, cv_ms, calls, copied_mb, shot_s in rows:
+        print(f"{size:<6} {pil_ms:>14.1f} {cv_ms:>12.1f} {calls:>14} {copied_mb:>10.1f} {shot_s:>7.2f}")
@@ -0,0 +1,69 @@
+# benchmarks/prompt_modes.py
+"""
+Regression benchmark: tokens and latency per shot, FULL vs COMPACT prompts
+
+    python benchmarks/prompt_modes.py            # offline, estimated prompt tokens only
+    python benchmarks/prompt_modes.py --live 3   # run 3 real shots per mode (needs GROQ_API_KEY)
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.crew_prompts import PROMPT_MODES, agent_templates, editor_schema, estimate_tokens
+
+SCENES = [
+    ("A detective examines evidence under a desk lamp in a dark office", "medium shot"),
+    ("An astronaut discovers an alien artifact on Mars at sunset", "wide shot"),
+    ("A violinist plays alone on a rain-soaked rooftop at night", "close-up")
+]
+
+
+def offline_report():
+    """Estimated static prompt tokens sent per shot in each mode"""
+    report = {}
+    for mode in PROMPT_MODES:
+        per_agent = {
+            name: estimate_tokens(t["role"] + t["goal"] + t["backstory"])
+            for name, t in agent_templates(mode).items()
+        }
+        per_agent["editor_schema"] = estimate_tokens(editor_schema(mode))
+        report[mode] = {"per_agent": per_agent, "total": sum(per_agent.values())}
+
+    full, compact = report["full"]["total"], report["compact"]["total"]
+    report["compact_savings"] = f"{(1 - compact / full) * 100:.0f}%"
+    return report
+
+
+def live_report(shots_per_mode: int):
+    """Run real crews and compare reported token usage and latency"""
+    from agents.cinema_crew import CinemaCrew
+
+    report = {}
+    for mode in PROMPT_MODES:
+        crew = CinemaCrew(prompt_mode=mode)
+        for i in range(shots_per_mode):
+            scene, shot_type = SCENES[i % len(SCENES)]
+            start = time.time()
+            crew.create_single_shot(scene, shot_type=shot_type)
+            print(f"[{mode}] shot {i + 1}/{shots_per_mode}: {time.time() - start:.1f}s")
+        stats = crew.metrics.get_stats()
+        report[mode] = {
+            **stats["by_prompt_mode"].get(mode, {}),
+            "tokens_by_agent": stats["tokens_by_agent"],
+            "estimated_usage_records": stats["estimated_usage_records"]
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", type=int, default=0, metavar="N", help="real shots per mode")
+    args = parser.parse_args()
+
+    result = live_report(args.live) if args.live else offline_report()
+    print(json.dumps(result, indent=2))
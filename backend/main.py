@@ -1,10 +1,10 @@
 # main.py
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 import os
 import json
 import asyncio
@@ -13,10 +13,22 @@ import uuid
 
 # Import our modules
 from api.bria_client import BriaFIBOClient
-from agents.cinema_crew import CinemaCrew
-from utils.hdr_pipeline import CinematicHDR
+from agents.cinema_crew import CrewPool, CrewPoolBusy
+from utils.hdr_pipeline import CinematicHDR, DEFAULT_FORMATS
+from utils.event_stream import ShotEventBroker, format_sse
+from utils.scene_index import SceneIndex
+from utils.image_cache import ImageCache
+from utils.proxy_grader import ProxyGrader
+from utils.hdr_batch import HDRBatchGrader
+from utils.color_stats import compute_color_stats, load_proxy, match_corrections, apply_correction
+from utils.quality import score_image
+from utils.shot_diff import ShotDiffer
+from utils.thumbnails import ThumbnailCache
+from utils.animatic import AnimaticRenderer
+from utils.zip_stream import stream_zip
 from models.shot import Shot
 from models.storyboard import Storyboard
+from models.prompt_blocks import PROMPT_BLOCKS, diff_prompts
 
 # Initialize FastAPI
 app = FastAPI(
@@ -36,8 +48,32 @@ app.add_middleware(
 
 # Initialize services
 bria_client = BriaFIBOClient()
-cinema_crew = CinemaCrew()
-hdr_pipeline = CinematicHDR()
+cinema_crew = CrewPool(
+    size=int(os.getenv("CREW_POOL_SIZE", "4")),
+    acquire_timeout=float(os.getenv("CREW_ACQUIRE_TIMEOUT", "60")) or None
+)
+image_cache = ImageCache(
+    max_bytes=int(os.getenv("IMAGE_CACHE_MAX_MB", "2048")) * 1024 * 1024,
+    max_pinned_bytes=int(os.getenv("IMAGE_CACHE_MAX_PINNED_MB", "1024")) * 1024 * 1024
+)
+hdr_pipeline = CinematicHDR(
+    max_memory_mb=float(os.getenv("HDR_MAX_MEMORY_MB", "0")) or None,
+    image_cache=image_cache
+)
+hdr_batch = HDRBatchGrader(
+    hdr_pipeline,
+    graders=int(os.getenv("HDR_BATCH_GRADERS", "0")) or None,
+    encoders=int(os.getenv("HDR_BATCH_ENCODERS", "2"))
+)
+proxy_grader = ProxyGrader(hdr_pipeline, width=int(os.getenv("HDR_PROXY_WIDTH", "960")))
+shot_differ = ShotDiffer(width=int(os.getenv("DIFF_PROXY_WIDTH", "512")))
+thumbnails = ThumbnailCache(
+    fmt=os.getenv("THUMBNAIL_FORMAT", "webp"),
+    workers=int(os.getenv("THUMBNAIL_WORKERS", "2"))
+)
+animatics = AnimaticRenderer(width=int(os.getenv("ANIMATIC_WIDTH", "1280")))
+shot_events = ShotEventBroker()
+scene_index = SceneIndex(threshold=float(os.getenv("SCENE_REUSE_THRESHOLD", "0.65")))
 
 # In-memory storage (use database in production)
 shots_db: Dict[str, Shot] = {}
@@ -47,6 +83,41 @@ storyboards_db: Dict[str, Storyboard] = {}
 os.makedirs("outputs/shots", exist_ok=True)
 os.makedirs("outputs/storyboards", exist_ok=True)
 os.makedirs("outputs/hdr", exist_ok=True)
+os.makedirs("outputs/luts", exist_ok=True)
+
+# Structured-prompt blocks shared by saved shots (content-addressed, written once)
+PROMPT_BLOCK_DIR = "outputs/prompts"
+os.makedirs(PROMPT_BLOCK_DIR, exist_ok=True)
+
+# Colourists' .cube LUTs that shots can be graded through
+LUT_DIR = os.getenv("HDR_LUT_DIR", "luts")
+os.makedirs(LUT_DIR, exist_ok=True)
+
+# Asset groups of a storyboard export.zip (HDR groups list the formats they take from shot.hdr_paths)
+EXPORT_ASSETS = {
+    "shots": None,      # storyboard.json + one JSON per shot
+    "sources": None,    # generated images, from the local image cache
+    "previews": ("web_preview", "comparison"),
+    "masters": ("tiff_16bit", "png_16bit", "exr_half")
+}
+
+# Grading sliders accepted in hdr_settings (keyword arguments of the HDR pipeline)
+GRADE_SETTINGS = ("exposure", "contrast", "saturation", "temperature")
+
+# /modify parameters -> their path in the structured prompt
+MODIFIABLE_PARAMETERS = {
+    "camera_angle": ("photographic_characteristics", "camera_angle"),
+    "lens_focal_length": ("photographic_characteristics", "lens_focal_length"),
+    "depth_of_field": ("photographic_characteristics", "depth_of_field"),
+    "lighting_direction": ("lighting", "direction"),
+    "color_scheme": ("aesthetics", "color_scheme")
+}
+
+# Shot fields in storyboard responses with shots=summary
+SHOT_SUMMARY_FIELDS = ["shot_id", "shot_number", "shot_type", "scene_description", "image_url", "quality"]
+
+# Index previously saved shots for near-duplicate scene detection
+scene_index.load_directory("outputs/shots", resolve_prompt=lambda p: PROMPT_BLOCKS.unpack(p, PROMPT_BLOCK_DIR))
 
 # Mount outputs for file serving
 app.mount("/outputs", StaticFiles(directory="outputs"), name="outputs")
@@ -67,6 +138,12 @@ class CreateShotRequest(BaseModel):
         "saturation": 1.0,
         "temperature": 0.0
     }
+    hdr_lut: Optional[str] = None  # .cube file in HDR_LUT_DIR, applied after the preset/sliders
+    stream_id: Optional[str] = None  # Subscribe to /api/shots/stream/{stream_id} for live agent output
+    reuse_similar: bool = False  # Reuse a near-duplicate scene's structured prompt instead of running the crew
+    hdr_formats: Optional[List[str]] = None  # tiff_16bit, png_16bit, exr_half, web_preview, comparison (default: all but exr_half)
+    hdr_profile: Union[str, Dict[str, str]] = "balanced"  # fast / balanced / small, or per format
+    quality_retries: int = int(os.getenv("QUALITY_RETRIES", "1"))  # New seeds to try if the image fails the quality gate
 
 class RefineshotRequest(BaseModel):
     shot_id: str
@@ -89,6 +166,38 @@ class ApplyPresetRequest(BaseModel):
     shot_id: str
     preset_name: str
 
+class GradePreviewRequest(BaseModel):
+    hdr_preset: str = "neutral"
+    hdr_settings: Optional[Dict[str, float]] = {
+        "exposure": 0.0,
+        "contrast": 1.0,
+        "saturation": 1.0,
+        "temperature": 0.0
+    }
+    hdr_lut: Optional[str] = None
+
+class GradeShotRequest(GradePreviewRequest):
+    commit: bool = False  # Also write the 16-bit masters and make this the shot's grade
+    hdr_formats: Optional[List[str]] = None  # Formats written on commit (default: all)
+    hdr_profile: Union[str, Dict[str, str]] = "balanced"
+
+class GradeStoryboardRequest(GradePreviewRequest):
+    hdr_formats: Optional[List[str]] = None
+    hdr_profile: Union[str, Dict[str, str]] = "balanced"
+
+class MatchStoryboardRequest(GradeStoryboardRequest):
+    reference_shot_id: Optional[str] = None  # Match to this shot (default: the storyboard's average look)
+    apply: bool = False  # Also batch-grade every shot with its correction on top of hdr_settings
+
+class ReorderStoryboardRequest(BaseModel):
+    shot_ids: List[str]  # Every shot of the storyboard, in the new order
+
+class AnimaticRequest(BaseModel):
+    fps: Optional[int] = None  # Default: the storyboard's target_fps
+    hold: float = 2.0  # Seconds each shot stays on screen
+    holds: Optional[Dict[str, float]] = None  # Per-shot hold overrides, by shot_id
+    crossfade: float = 0.5  # Seconds of dissolve into the next shot (part of the outgoing shot's hold)
+
 # ============================================================================
 # ENDPOINTS
 # ============================================================================
@@ -102,7 +211,7 @@ async def root():
         "status": "operational",
         "services": {
             "bria_client": "connected",
-            "cinema_crew": "ready",
+            "cinema_crew": cinema_crew.get_stats(),
             "hdr_pipeline": "ready"
         }
     }
@@ -123,39 +232,91 @@ async def create_shot(request: CreateShotRequest, background_tasks: BackgroundTa
         print(f"{'='*80}")
         
         shot_id = f"shot_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        lut_file = _resolve_lut(request.hdr_lut) if request.apply_hdr and request.hdr_lut else None
+        hdr_settings = _grade_settings(request.hdr_settings) if request.apply_hdr else {}
+        if request.apply_hdr:
+            try:
+                hdr_pipeline.export_options(request.hdr_formats, request.hdr_profile)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
         
-        # Step 1: Cinema Crew creates shot
-        print(f"\n🤖 STEP 1: Cinema Crew creating shot...")
-        crew_result = cinema_crew.create_single_shot(
-            scene_description=request.scene_description,
-            shot_type=request.shot_type
-        )
+        # Near-duplicate of a previous scene? Offer it, or reuse it if asked
+        similar_shot = scene_index.best_match(request.scene_description, request.shot_type)
         
-        structured_prompt = crew_result["structured_prompt"]
-        simple_prompt = crew_result["simple_prompt"]
+        if similar_shot and request.reuse_similar:
+            print(f"\n♻️ STEP 1: Reusing structured prompt from {similar_shot['shot_id']} "
+                  f"(similarity {similar_shot['similarity']:.2f})")
+            structured_prompt = similar_shot["structured_prompt"]  # Immutable, so shared rather than copied
+            simple_prompt = similar_shot["simple_prompt"]
+            
+            if request.stream_id:
+                shot_events.publish(request.stream_id, "structured_prompt", {
+                    "structured_prompt": structured_prompt,
+                    "fallback": False,
+                    "reused_from": similar_shot["shot_id"]
+                })
+        else:
+            # Step 1: Cinema Crew creates shot (pooled crew, off the event loop)
+            print(f"\n🤖 STEP 1: Cinema Crew creating shot...")
+            try:
+                crew_result = await asyncio.to_thread(
+                    cinema_crew.create_single_shot,
+                    scene_description=request.scene_description,
+                    shot_type=request.shot_type,
+                    event_sink=shot_events.sink(request.stream_id) if request.stream_id else None
+                )
+            except CrewPoolBusy as e:
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+            
+            structured_prompt = crew_result["structured_prompt"]
+            simple_prompt = crew_result["simple_prompt"]
         
-        # Step 2: Generate with Bria FIBO
+        # Step 2: Generate with Bria FIBO, re-rolling seeds that fail the quality gate
         print(f"\n🎨 STEP 2: Generating with FIBO...")
-        fibo_result = bria_client.generate_image(
-            structured_prompt=structured_prompt,
-            aspect_ratio=request.aspect_ratio,
-            sync=False  # Async
-        )
+        if request.stream_id:
+            shot_events.publish(request.stream_id, "image_generating", {"shot_id": shot_id})
         
-        image_url = fibo_result["image_url"]
-        seed = fibo_result["seed"]
+        shot = None
+        for attempt in range(max(request.quality_retries, 0) + 1):
+            fibo_result = await asyncio.to_thread(
+                bria_client.generate_image,
+                structured_prompt=structured_prompt,
+                aspect_ratio=request.aspect_ratio,
+                sync=False  # Async
+            )
+            
+            candidate = Shot(
+                shot_id=shot_id,
+                scene_description=request.scene_description,
+                shot_type=request.shot_type,
+                structured_prompt=structured_prompt,
+                simple_prompt=simple_prompt,
+                seed=fibo_result["seed"],
+                request_id=fibo_result.get("request_id"),
+                image_url=fibo_result["image_url"],
+                aspect_ratio=request.aspect_ratio
+            )
+            
+            # Keep the source locally so HDR / regrades never re-download it (also scores it)
+            await asyncio.to_thread(_cache_source, candidate)
+            
+            if shot is None or _quality_score(candidate) > _quality_score(shot):
+                shot = candidate
+            if candidate.quality is None or candidate.quality["passed"]:
+                break
+            
+            print(f"⚠️ Seed {candidate.seed} failed the quality gate "
+                  f"({', '.join(candidate.quality['defects'])}, score {candidate.quality['score']})")
+            if request.stream_id:
+                shot_events.publish(request.stream_id, "quality_retry", {
+                    "attempt": attempt + 1,
+                    "seed": candidate.seed,
+                    "quality": candidate.quality
+                })
         
-        # Create Shot object
-        shot = Shot(
-            shot_id=shot_id,
-            scene_description=request.scene_description,
-            shot_type=request.shot_type,
-            structured_prompt=structured_prompt,
-            simple_prompt=simple_prompt,
-            seed=seed,
-            image_url=image_url,
-            aspect_ratio=request.aspect_ratio
-        )
+        if shot.quality is not None:
+            shot.quality["attempts"] = attempt + 1
+        image_url = shot.image_url
         
         # Step 3: HDR processing (async in background)
         if request.apply_hdr:
@@ -166,12 +327,15 @@ async def create_shot(request: CreateShotRequest, background_tasks: BackgroundTa
                     image_url=image_url,
                     shot_id=shot_id,
                     preset=request.hdr_preset,
-                    **request.hdr_settings
+                    lut_file=lut_file,
+                    formats=request.hdr_formats,
+                    profile=request.hdr_profile,
+                    image_path=shot.image_local_path,
+                    **hdr_settings
                 )
                 
                 # Update shot with HDR paths
-                shot.hdr_16bit_path = hdr_paths.get('tiff_16bit')
-                shot.hdr_comparison_path = hdr_paths.get('comparison')
+                _record_hdr_paths(shot, hdr_paths)
                 
                 print(f"✅ HDR processing complete for {shot_id}")
             
@@ -179,16 +343,18 @@ async def create_shot(request: CreateShotRequest, background_tasks: BackgroundTa
         
         # Save to database
         shots_db[shot_id] = shot
+        scene_index.add(shot_id, shot.scene_description, shot.shot_type, shot.structured_prompt, simple_prompt)
         
         # Save to disk
-        shot_file = f"outputs/shots/{shot_id}.json"
-        with open(shot_file, 'w') as f:
-            json.dump(shot.dict(), f, indent=2, default=str)
+        _save_shot(shot)
         
         print(f"\n{'='*80}")
         print(f"✅ SHOT CREATED: {shot_id}")
         print(f"{'='*80}\n")
         
+        if request.stream_id:
+            shot_events.publish(request.stream_id, "shot_created", {"shot_id": shot_id, "image_url": image_url})
+        
        # Convert datetime fields for JSON serialization
         shot_dict = shot.dict(exclude={'structured_prompt'})
         shot_dict['created_at'] = shot.created_at.isoformat()
@@ -199,15 +365,79 @@ async def create_shot(request: CreateShotRequest, background_tasks: BackgroundTa
             "shot_id": shot_id,
             "shot": shot_dict,
             "image_url": image_url,
+            "reused_from": similar_shot["shot_id"] if similar_shot and request.reuse_similar else None,
+            "similar_shot": _similar_summary(similar_shot) if similar_shot else None,
             "message": "Shot created successfully. HDR processing in progress."
         })
         
+    except HTTPException as e:
+        if request.stream_id:
+            shot_events.publish(request.stream_id, "error", {"status_code": e.status_code, "detail": e.detail})
+        raise
     except Exception as e:
         print(f"\n❌ ERROR: {str(e)}")
         import traceback
         traceback.print_exc()
         
+        if request.stream_id:
+            shot_events.publish(request.stream_id, "error", {"status_code": 500, "detail": str(e)})
+        
         raise HTTPException(status_code=500, detail=f"Shot creation failed: {str(e)}")
+    finally:
+        # Every exit (success, error, client disconnect) ends the stream for subscribers
+        if request.stream_id:
+            shot_events.close(request.stream_id)
+
+@app.get("/api/shots/stream/{stream_id}")
+async def stream_shot_events(stream_id: str):
+    """
+    Server-Sent Events for a shot request (pass the same stream_id to /api/shots/create)
+    
+    Events: crew_started, agent_output, token, repair, structured_prompt,
+    image_generating, shot_created, error
+    """
+    async def event_generator():
+        async for message in shot_events.subscribe(stream_id):
+            yield format_sse(message)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _similar_summary(match: Dict[str, Any]) -> Dict[str, Any]:
+    """Similarity hit without the (large) structured prompt"""
+    return {
+        "shot_id": match["shot_id"],
+        "scene_description": match["scene_description"],
+        "shot_type": match["shot_type"],
+        "similarity": match["similarity"]
+    }
+
+@app.get("/api/shots/similar")
+async def find_similar_shots(q: str, k: int = 5, shot_type: Optional[str] = None):
+    """Top-k previous shots whose scene description is most similar to q"""
+    results = scene_index.search(q, k=k, shot_type=shot_type)
+    return JSONResponse(content={
+        "query": q,
+        "threshold": scene_index.threshold,
+        "results": [_similar_summary(r) for r in results]
+    })
+
+@app.get("/api/shots/{shot_id}/similar")
+async def find_shots_similar_to(shot_id: str, k: int = 5):
+    """Top-k shots similar to an existing shot"""
+    if shot_id not in shots_db:
+        raise HTTPException(status_code=404, detail="Shot not found")
+    
+    shot = shots_db[shot_id]
+    results = scene_index.search(shot.scene_description, k=k, exclude=shot_id)
+    return JSONResponse(content={
+        "shot_id": shot_id,
+        "threshold": scene_index.threshold,
+        "results": [_similar_summary(r) for r in results]
+    })
 
 @app.get("/api/shots/{shot_id}")
 async def get_shot(shot_id: str):
@@ -222,18 +452,41 @@ async def get_shot(shot_id: str):
     
     return JSONResponse(content={"shot": shot_dict})
 
+@app.delete("/api/shots/{shot_id}")
+async def delete_shot(shot_id: str):
+    """Delete a shot (not while a storyboard uses it); releases its pinned cached source"""
+    if shot_id not in shots_db:
+        raise HTTPException(status_code=404, detail="Shot not found")
+    boards = [sb.storyboard_id for sb in storyboards_db.values() if sb.position(shot_id) is not None]
+    if boards:
+        raise HTTPException(status_code=409, detail=f"Shot is used by storyboard(s): {', '.join(boards)}")
+    
+    shots_db.pop(shot_id)
+    scene_index.remove(shot_id)
+    image_cache.unpin(shot_id)
+    try:
+        os.remove(f"outputs/shots/{shot_id}.json")
+    except OSError:
+        pass
+    
+    return JSONResponse(content={"success": True, "shot_id": shot_id})
+
 @app.get("/api/shots")
-async def list_shots():
-    """List all shots"""
+async def list_shots(min_quality: Optional[float] = None, flagged: Optional[bool] = None):
+    """List all shots (optionally by ingest quality score, or flagged / clean only)"""
     shots = [
         {
             "shot_id": shot.shot_id,
             "shot_type": shot.shot_type,
             "scene_description": shot.scene_description[:100],
             "created_at": shot.created_at.isoformat(),
-            "image_url": shot.image_url
+            "image_url": shot.image_url,
+            "quality_score": shot.quality["score"] if shot.quality else None,
+            "quality_flags": shot.quality["flags"] if shot.quality else []
         }
         for shot in shots_db.values()
+        if (min_quality is None or _quality_score(shot) >= min_quality)
+        and (flagged is None or bool(shot.quality and shot.quality["flags"]) == flagged)
     ]
     
     return JSONResponse(content={"shots": shots, "total": len(shots)})
@@ -258,22 +511,28 @@ async def refine_shot(shot_id: str, request: RefineshotRequest):
             aspect_ratio=original_shot.aspect_ratio
         )
         
-        # Create new shot (refined version)
+        # Create new shot (refined version), sharing every prompt block the refinement left alone
         new_shot_id = f"{shot_id}_refined_{datetime.now().strftime('%H%M%S')}"
+        refined_prompt = PROMPT_BLOCKS.canonicalize(result["structured_prompt"])
         
         refined_shot = Shot(
             shot_id=new_shot_id,
             scene_description=f"{original_shot.scene_description} (refined: {request.refinement_prompt})",
             shot_type=original_shot.shot_type,
-            structured_prompt=result["structured_prompt"],
+            structured_prompt=refined_prompt,
             simple_prompt=original_shot.simple_prompt,
             seed=result["seed"],
+            request_id=result.get("request_id"),
             image_url=result["image_url"],
             aspect_ratio=original_shot.aspect_ratio,
-            notes=f"Refined from {shot_id}"
+            notes=f"Refined from {shot_id}",
+            parent_shot_id=shot_id,
+            prompt_diff=diff_prompts(original_shot.structured_prompt, refined_prompt)
         )
+        await asyncio.to_thread(_cache_source, refined_shot)
         
         shots_db[new_shot_id] = refined_shot
+        _save_shot(refined_shot)
         
         # Convert datetime for JSON
         refined_dict = refined_shot.dict(exclude={'structured_prompt'})
@@ -284,10 +543,13 @@ async def refine_shot(shot_id: str, request: RefineshotRequest):
             "success": True,
             "original_shot_id": shot_id,
             "refined_shot_id": new_shot_id,
+            "prompt_diff": refined_shot.prompt_diff,
             "shot": refined_dict,
             "image_url": refined_shot.image_url
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -303,29 +565,18 @@ async def modify_parameter(shot_id: str, request: ModifyParameterRequest):
         
         original_shot = shots_db[shot_id]
         
-        # Clone structured prompt
-        modified_prompt = original_shot.structured_prompt.copy()
+        if request.parameter not in MODIFIABLE_PARAMETERS:
+            raise HTTPException(status_code=400, detail=f"Unknown parameter: {request.parameter}")
         
         print(f"\n📷 Modifying parameter: {request.parameter} = {request.value}")
         
-        # Apply modification based on parameter type
-        if request.parameter == "camera_angle":
-            modified_prompt["photographic_characteristics"]["camera_angle"] = request.value
-        
-        elif request.parameter == "lens_focal_length":
-            modified_prompt["photographic_characteristics"]["lens_focal_length"] = request.value
-        
-        elif request.parameter == "depth_of_field":
-            modified_prompt["photographic_characteristics"]["depth_of_field"] = request.value
-        
-        elif request.parameter == "lighting_direction":
-            modified_prompt["lighting"]["direction"] = request.value
-        
-        elif request.parameter == "color_scheme":
-            modified_prompt["aesthetics"]["color_scheme"] = request.value
-        
-        else:
-            raise HTTPException(status_code=400, detail=f"Unknown parameter: {request.parameter}")
+        # Copy-on-write: only the block holding the parameter is rebuilt, the
+        # parent's prompt is untouched and every other block stays shared
+        modified_prompt = PROMPT_BLOCKS.assoc(
+            original_shot.structured_prompt,
+            MODIFIABLE_PARAMETERS[request.parameter],
+            request.value
+        )
         
         # Generate with modified prompt
         result = bria_client.generate_image(
@@ -345,12 +596,17 @@ async def modify_parameter(shot_id: str, request: ModifyParameterRequest):
             structured_prompt=modified_prompt,
             simple_prompt=original_shot.simple_prompt,
             seed=original_shot.seed,
+            request_id=result.get("request_id"),
             image_url=result["image_url"],
             aspect_ratio=original_shot.aspect_ratio,
-            notes=f"Modified {request.parameter} from {shot_id}"
+            notes=f"Modified {request.parameter} from {shot_id}",
+            parent_shot_id=shot_id,
+            prompt_diff=diff_prompts(original_shot.structured_prompt, modified_prompt)
         )
+        await asyncio.to_thread(_cache_source, modified_shot)
         
         shots_db[new_shot_id] = modified_shot
+        _save_shot(modified_shot)
         
         # Convert datetime for JSON
         modified_dict = modified_shot.dict(exclude={'structured_prompt'})
@@ -363,12 +619,221 @@ async def modify_parameter(shot_id: str, request: ModifyParameterRequest):
             "modified_shot_id": new_shot_id,
             "parameter_changed": request.parameter,
             "new_value": request.value,
+            "prompt_diff": modified_shot.prompt_diff,
             "shot": modified_dict,
             "image_url": modified_shot.image_url
         })
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/shots/{shot_id}/grade")
+async def grade_shot(shot_id: str, request: GradeShotRequest):
+    """
+    Regrade an existing shot without regenerating it
+    
+    Previews (web preview + comparison) come back quickly from the cached
+    decoded source and are memoized per settings hash; 16-bit masters are
+    only written with commit=true, which also updates the shot.
+    """
+    if shot_id not in shots_db:
+        raise HTTPException(status_code=404, detail="Shot not found")
+    
+    shot = shots_db[shot_id]
+    if not shot.image_url and not shot.image_local_path:
+        raise HTTPException(status_code=400, detail="Shot has no source image")
+    
+    lut_file = _resolve_lut(request.hdr_lut) if request.hdr_lut else None
+    hdr_settings = _grade_settings(request.hdr_settings)
+    try:
+        hdr_pipeline.export_options(request.hdr_formats, request.hdr_profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        result = await asyncio.to_thread(
+            hdr_pipeline.regrade,
+            shot_id=shot_id,
+            image_url=shot.image_url,
+            image_path=shot.image_local_path,
+            preset=request.hdr_preset,
+            lut_file=lut_file,
+            commit=request.commit,
+            formats=request.hdr_formats,
+            profile=request.hdr_profile,
+            **hdr_settings
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    paths = result["paths"]
+    if request.commit:
+        _record_hdr_paths(shot, paths)
+        shot.modified_at = datetime.now()
+        _save_shot(shot)
+    
+    return JSONResponse(content={
+        "success": True,
+        "shot_id": shot_id,
+        "settings_hash": result["settings_hash"],
+        "cached": result["cached"],
+        "committed": result["committed"],
+        "paths": paths,
+        "preview_url": f"/api/download/{os.path.basename(paths['web_preview'])}" if 'web_preview' in paths else None,
+        "comparison_url": f"/api/download/{os.path.basename(paths['comparison'])}" if 'comparison' in paths else None
+    })
+
+def _render_proxy(shot: Shot, request: GradePreviewRequest) -> bytes:
+    """Proxy JPEG for one slider state (blocking)"""
+    lut_file = _resolve_lut(request.hdr_lut) if request.hdr_lut else None
+    return proxy_grader.render(
+        shot.shot_id,
+        shot.image_url,
+        image_path=shot.image_local_path,
+        preset=request.hdr_preset,
+        lut_file=lut_file,
+        **_grade_settings(request.hdr_settings)
+    )
+
+@app.post("/api/shots/{shot_id}/grade/preview")
+async def preview_grade(shot_id: str, request: GradePreviewRequest):
+    """Low-latency JPEG of a grade on the shot's in-memory proxy (nothing written to disk)"""
+    if shot_id not in shots_db:
+        raise HTTPException(status_code=404, detail="Shot not found")
+    
+    try:
+        jpeg = await asyncio.to_thread(_render_proxy, shots_db[shot_id], request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return Response(content=jpeg, media_type="image/jpeg", headers={"Cache-Control": "no-store"})
+
+@app.websocket("/api/shots/{shot_id}/grade/ws")
+async def grade_preview_socket(websocket: WebSocket, shot_id: str):
+    """
+    Live slider previews: send GradePreviewRequest JSON, receive JPEG frames
+    
+    Updates arriving while a frame renders are coalesced: only the latest
+    slider state is rendered next, so fast drags never queue up a backlog.
+    """
+    await websocket.accept()
+    if shot_id not in shots_db:
+        await websocket.send_json({"error": "Shot not found"})
+        await websocket.close()
+        return
+    
+    shot = shots_db[shot_id]
+    latest: Dict[str, Any] = {}
+    pending = asyncio.Event()
+    
+    async def receive():
+        while True:
+            try:
+                latest["request"] = await websocket.receive_json()
+            except WebSocketDisconnect:
+                return
+            except ValueError:
+                continue  # Malformed JSON: ignore, keep the last good state
+            pending.set()
+    
+    receiver = asyncio.create_task(receive())
+    try:
+        while True:
+            waiter = asyncio.create_task(pending.wait())
+            done, _ = await asyncio.wait({waiter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                waiter.cancel()
+                break
+            pending.clear()
+            
+            try:
+                request = GradePreviewRequest(**latest["request"])
+                jpeg = await asyncio.to_thread(_render_proxy, shot, request)
+            except HTTPException as e:
+                await websocket.send_json({"error": e.detail})
+                continue
+            except Exception as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            await websocket.send_bytes(jpeg)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+
+@app.get("/api/shots/{shot_id}/color-stats")
+async def get_color_stats(shot_id: str):
+    """Per-channel histograms, Lab mean/std and clipping of the shot's downsampled proxy"""
+    if shot_id not in shots_db:
+        raise HTTPException(status_code=404, detail="Shot not found")
+    
+    shot = shots_db[shot_id]
+    if shot.color_stats is None and not shot.image_url and not shot.image_local_path:
+        raise HTTPException(status_code=400, detail="Shot has no source image")
+    
+    try:
+        stats = await asyncio.to_thread(_shot_color_stats, shot)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return JSONResponse(content={"shot_id": shot_id, "color_stats": stats})
+
+@app.get("/api/shots/{shot_id}/thumbnail")
+async def get_thumbnail(shot_id: str, w: int = 320, format: Optional[str] = None):
+    """
+    Shot thumbnail from the precomputed ladder (160/320/640/1280 px wide)
+    
+    Serves the smallest rung at least w wide (webp, or format=jpeg). A
+    shot's source never changes, so responses are cacheable forever.
+    """
+    if shot_id not in shots_db:
+        raise HTTPException(status_code=404, detail="Shot not found")
+    
+    try:
+        source = await asyncio.to_thread(_source_path, shots_db[shot_id])
+        path = await asyncio.to_thread(thumbnails.get, source, w, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return FileResponse(
+        path,
+        media_type="image/jpeg" if path.endswith(".jpg") else "image/webp",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+@app.get("/api/shots/{shot_id}/diff/{other_id}")
+async def diff_shots(shot_id: str, other_id: str):
+    """
+    Quantitative comparison of two shots (e.g. an original and its /modify variant)
+    
+    SSIM for structure, Lab delta E (lightness vs chroma) for colour, a
+    per-region change grid with heatmap, and a difference overlay, all on
+    downsampled proxies. Cached by the pair of image content hashes.
+    """
+    for sid in (shot_id, other_id):
+        if sid not in shots_db:
+            raise HTTPException(status_code=404, detail=f"Shot not found: {sid}")
+    
+    try:
+        path_a, path_b = await asyncio.gather(
+            asyncio.to_thread(_source_path, shots_db[shot_id]),
+            asyncio.to_thread(_source_path, shots_db[other_id])
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        result = await asyncio.to_thread(shot_differ.diff, path_a, path_b)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return JSONResponse(content={"shot_id": shot_id, "other_id": other_id, **result})
 
 @app.post("/api/storyboards/create")
 async def create_storyboard(request: CreateStoryboardRequest):
@@ -384,10 +849,17 @@ async def create_storyboard(request: CreateStoryboardRequest):
         
         # Cinema Crew creates storyboard
         print(f"\n🤖 Cinema Crew creating {request.num_shots} shots...")
-        crew_results = cinema_crew.create_storyboard(
-            script=request.script,
-            num_shots=request.num_shots
-        )
+        def run_crew():
+            with cinema_crew.acquire() as crew:
+                return crew.create_storyboard(
+                    script=request.script,
+                    num_shots=request.num_shots
+                )
+        
+        try:
+            crew_results = await asyncio.to_thread(run_crew)
+        except CrewPoolBusy as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
         
         # Create Storyboard object
         storyboard = Storyboard(
@@ -416,20 +888,20 @@ async def create_storyboard(request: CreateStoryboardRequest):
                 structured_prompt=crew_result["structured_prompt"],
                 simple_prompt=crew_result["simple_prompt"],
                 seed=fibo_result["seed"],
+                request_id=fibo_result.get("request_id"),
                 image_url=fibo_result["image_url"],
                 aspect_ratio=request.aspect_ratio,
                 purpose=crew_result.get("purpose", "")
             )
+            await asyncio.to_thread(_cache_source, shot)
             
             shots_db[shot.shot_id] = shot
             storyboard.add_shot(shot)
+            _save_shot(shot)
         
-        # Save storyboard
+        # Save storyboard (shots are referenced by ID, saved above)
         storyboards_db[storyboard_id] = storyboard
-        
-        storyboard_file = f"outputs/storyboards/{storyboard_id}.json"
-        with open(storyboard_file, 'w') as f:
-            json.dump(storyboard.dict(), f, indent=2, default=str)
+        _save_storyboard(storyboard)
         
         print(f"\n{'='*80}")
         print(f"✅ STORYBOARD CREATED: {storyboard_id}")
@@ -438,10 +910,12 @@ async def create_storyboard(request: CreateStoryboardRequest):
         return JSONResponse(content={
             "success": True,
             "storyboard_id": storyboard_id,
-            "storyboard": storyboard.dict(default=str),
-            "message": f"Storyboard with {len(storyboard.shots)} shots created"
+            "storyboard": _storyboard_payload(storyboard),
+            "message": f"Storyboard with {storyboard.num_shots} shots created"
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"\n❌ ERROR: {str(e)}")
         import traceback
@@ -450,13 +924,257 @@ async def create_storyboard(request: CreateStoryboardRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/storyboards/{storyboard_id}")
-async def get_storyboard(storyboard_id: str):
-    """Get storyboard details"""
+async def get_storyboard(storyboard_id: str, shots: str = "full", fields: Optional[str] = None):
+    """
+    Get storyboard details
+    
+    shots=full embeds every shot, summary a few list fields, none only the
+    ordered shot_ids. fields=a,b,... projects each shot to those fields.
+    """
     if storyboard_id not in storyboards_db:
         raise HTTPException(status_code=404, detail="Storyboard not found")
+    if shots not in ("full", "summary", "none"):
+        raise HTTPException(status_code=400, detail="shots must be full, summary or none")
+    
+    projection = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    if projection:
+        unknown = [f for f in projection if f not in Shot.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown shot fields: {', '.join(unknown)}")
+    elif shots == "summary":
+        projection = SHOT_SUMMARY_FIELDS
     
     storyboard = storyboards_db[storyboard_id]
-    return JSONResponse(content=storyboard.dict(default=str))
+    return JSONResponse(content=_storyboard_payload(storyboard, include_shots=shots != "none" or bool(fields), fields=projection))
+
+@app.post("/api/storyboards/{storyboard_id}/reorder")
+async def reorder_storyboard(storyboard_id: str, request: ReorderStoryboardRequest):
+    """Put the storyboard's shots in the given order (every shot_id exactly once)"""
+    if storyboard_id not in storyboards_db:
+        raise HTTPException(status_code=404, detail="Storyboard not found")
+    
+    storyboard = storyboards_db[storyboard_id]
+    positions = [storyboard.position(shot_id) for shot_id in request.shot_ids]
+    if None in positions:
+        raise HTTPException(status_code=400, detail="Unknown shot_id in new order")
+    try:
+        storyboard.reorder_shots(positions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    _save_storyboard(storyboard)
+    return JSONResponse(content={"success": True, "storyboard_id": storyboard_id, "shot_ids": storyboard.shot_ids})
+
+@app.post("/api/storyboards/{storyboard_id}/grade")
+async def grade_storyboard(storyboard_id: str, request: GradeStoryboardRequest):
+    """
+    Grade every shot of a storyboard with one consistent look
+    
+    Runs the staged batch pipeline (downloads -> grader processes ->
+    encoder threads) and reports throughput in frames per second.
+    """
+    if storyboard_id not in storyboards_db:
+        raise HTTPException(status_code=404, detail="Storyboard not found")
+    
+    storyboard = storyboards_db[storyboard_id]
+    shots = [shot for _, shot in storyboard.iter_shots(shots_db)]
+    lut_file = _resolve_lut(request.hdr_lut) if request.hdr_lut else None
+    
+    items = [
+        {
+            "shot_id": shot.shot_id,
+            "image_url": shot.image_url,
+            "image_path": shot.image_local_path,
+            "request_id": shot.request_id
+        }
+        for shot in shots if shot.image_url or shot.image_local_path
+    ]
+    
+    try:
+        batch = await hdr_batch.run(
+            items,
+            preset=request.hdr_preset,
+            lut_file=lut_file,
+            formats=_storyboard_formats(storyboard, request.hdr_formats),
+            profile=request.hdr_profile,
+            **_grade_settings(request.hdr_settings)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for shot in shots:
+        paths = batch["results"].get(shot.shot_id)
+        if paths:
+            _record_hdr_paths(shot, paths)
+            _save_shot(shot)
+    
+    storyboard.color_grading = request.hdr_preset
+    storyboard.modified_at = datetime.now()
+    _save_storyboard(storyboard)
+    
+    return JSONResponse(content={
+        "success": not batch["errors"],
+        "storyboard_id": storyboard_id,
+        "preset": request.hdr_preset,
+        **batch
+    })
+
+@app.post("/api/storyboards/{storyboard_id}/match")
+async def match_storyboard(storyboard_id: str, request: MatchStoryboardRequest):
+    """
+    Auto-match shots to a reference shot (or the storyboard's average look)
+    
+    Corrections (exposure, contrast, saturation, temperature) are derived
+    purely from each shot's cached proxy colour stats, so computing them
+    never touches a full-resolution frame. With apply=true every shot is
+    then batch-graded with hdr_settings plus its own correction.
+    """
+    if storyboard_id not in storyboards_db:
+        raise HTTPException(status_code=404, detail="Storyboard not found")
+    
+    storyboard = storyboards_db[storyboard_id]
+    hdr_settings = _grade_settings(request.hdr_settings)
+    shots = [shot for _, shot in storyboard.iter_shots(shots_db) if shot.color_stats or shot.image_url or shot.image_local_path]
+    if not shots:
+        raise HTTPException(status_code=400, detail="Storyboard has no shots with source images")
+    if request.reference_shot_id and request.reference_shot_id not in {shot.shot_id for shot in shots}:
+        raise HTTPException(status_code=404, detail="Reference shot not in storyboard")
+    
+    try:
+        stats = {shot.shot_id: await asyncio.to_thread(_shot_color_stats, shot) for shot in shots}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    corrections = match_corrections(stats, reference=request.reference_shot_id)
+    settings = {shot_id: apply_correction(hdr_settings, c) for shot_id, c in corrections.items()}
+    
+    response = {
+        "success": True,
+        "storyboard_id": storyboard_id,
+        "reference_shot_id": request.reference_shot_id,
+        "corrections": corrections,
+        "settings": settings
+    }
+    if not request.apply:
+        return JSONResponse(content=response)
+    
+    lut_file = _resolve_lut(request.hdr_lut) if request.hdr_lut else None
+    items = [
+        {
+            "shot_id": shot.shot_id,
+            "image_url": shot.image_url,
+            "image_path": shot.image_local_path,
+            "request_id": shot.request_id,
+            "grade": settings[shot.shot_id]
+        }
+        for shot in shots if shot.image_url or shot.image_local_path
+    ]
+    
+    try:
+        batch = await hdr_batch.run(
+            items,
+            preset=request.hdr_preset,
+            lut_file=lut_file,
+            formats=_storyboard_formats(storyboard, request.hdr_formats),
+            profile=request.hdr_profile
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for shot in shots:
+        paths = batch["results"].get(shot.shot_id)
+        if paths:
+            _record_hdr_paths(shot, paths)
+            _save_shot(shot)
+    
+    storyboard.color_grading = request.hdr_preset
+    storyboard.modified_at = datetime.now()
+    _save_storyboard(storyboard)
+    
+    response.update(success=not batch["errors"], **batch)
+    return JSONResponse(content=response)
+
+@app.post("/api/storyboards/{storyboard_id}/animatic")
+async def render_animatic(storyboard_id: str, request: AnimaticRequest):
+    """
+    Render the storyboard as an animatic video at its target_fps
+    
+    Shots are decoded one at a time from the local image cache and
+    streamed through the writer, holding each for its duration and
+    crossfading into the next. Unchanged boards reuse the previous render.
+    """
+    if storyboard_id not in storyboards_db:
+        raise HTTPException(status_code=404, detail="Storyboard not found")
+    
+    storyboard = storyboards_db[storyboard_id]
+    shots = [shot for _, shot in storyboard.iter_shots(shots_db) if shot.image_url or shot.image_local_path]
+    if not shots:
+        raise HTTPException(status_code=400, detail="Storyboard has no shots with source images")
+    
+    holds = {**{shot.shot_id: request.hold for shot in shots}, **(request.holds or {})}
+    fps = request.fps or storyboard.target_fps
+    
+    try:
+        paths = [await asyncio.to_thread(_source_path, shot) for shot in shots]
+        result = await asyncio.to_thread(
+            animatics.render,
+            paths,
+            [holds[shot.shot_id] for shot in shots],
+            fps=fps,
+            crossfade=request.crossfade
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    filename = os.path.basename(result["path"])
+    return JSONResponse(content={
+        "success": True,
+        "storyboard_id": storyboard_id,
+        "shots": [{"shot_id": shot.shot_id, "hold": holds[shot.shot_id]} for shot in shots],
+        "video_url": f"/outputs/animatics/{filename}",
+        "download_url": f"/api/download/{filename}",
+        **result
+    })
+
+@app.get("/api/storyboards/{storyboard_id}/export.zip")
+async def export_storyboard_zip(storyboard_id: str, assets: Optional[str] = None):
+    """
+    Download a storyboard's assets as one ZIP, streamed as it's built
+    
+    assets is a comma-separated subset of shots, sources, previews and
+    masters (default: all). Files go straight from disk into the response
+    in 1 MB chunks; JPEG/PNG/EXR are stored as-is rather than deflated.
+    manifest.json (written last) lists every file with its SHA-256.
+    """
+    if storyboard_id not in storyboards_db:
+        raise HTTPException(status_code=404, detail="Storyboard not found")
+    
+    selected = [a.strip() for a in assets.split(",") if a.strip()] if assets else list(EXPORT_ASSETS)
+    unknown = [a for a in selected if a not in EXPORT_ASSETS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown assets: {', '.join(unknown)} (choose from {', '.join(EXPORT_ASSETS)})")
+    
+    storyboard = storyboards_db[storyboard_id]
+    entries, missing = await asyncio.to_thread(_export_entries, storyboard, selected)
+    manifest = {
+        "storyboard_id": storyboard_id,
+        "title": storyboard.title,
+        "exported_at": datetime.now().isoformat(),
+        "assets": selected,
+        "shots": [
+            {"shot_number": number, "shot_id": shot.shot_id, "scene_description": shot.scene_description}
+            for number, shot in storyboard.iter_shots(shots_db)
+        ],
+        "missing": missing
+    }
+    
+    return StreamingResponse(
+        stream_zip(entries, manifest),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{storyboard_id}.zip"'}
+    )
 
 @app.get("/api/storyboards")
 async def list_storyboards():
@@ -465,7 +1183,7 @@ async def list_storyboards():
         {
             "storyboard_id": sb.storyboard_id,
             "title": sb.title,
-            "num_shots": len(sb.shots),
+            "num_shots": sb.num_shots,
             "created_at": sb.created_at.isoformat()
         }
         for sb in storyboards_db.values()
@@ -473,6 +1191,209 @@ async def list_storyboards():
     
     return JSONResponse(content={"storyboards": storyboards, "total": len(storyboards)})
 
+def _cache_source(shot: Shot):
+    """
+    Fetch a freshly generated image into the local cache, record its path,
+    colour stats and quality, and queue its thumbnail ladder (blocking)
+    """
+    if not shot.image_url:
+        return
+    try:
+        shot.image_local_path = image_cache.fetch(shot.image_url, shot.request_id)
+        thumbnails.schedule(shot.image_local_path)
+        proxy = load_proxy(shot.image_local_path)
+        shot.color_stats = compute_color_stats(proxy)
+        color_scheme = (shot.structured_prompt.get("aesthetics") or {}).get("color_scheme")
+        shot.quality = score_image(proxy, color_scheme, stats=shot.color_stats, lighting=shot.structured_prompt.get("lighting"))
+    except Exception as e:
+        # Not fatal: HDR falls back to downloading the URL, stats are computed on demand
+        print(f"⚠️ Could not cache source image for {shot.shot_id}: {e}")
+
+def _record_hdr_paths(shot: Shot, paths: Dict[str, str]):
+    """Remember a grade's output files on the shot (formats not written this time keep their old path)"""
+    shot.hdr_paths = {**shot.hdr_paths, **paths}
+    shot.hdr_16bit_path = paths.get('tiff_16bit') or paths.get('png_16bit') or shot.hdr_16bit_path
+    shot.hdr_comparison_path = paths.get('comparison') or shot.hdr_comparison_path
+
+def _shot_payload(shot: Shot, fields: Optional[List[str]] = None, shot_number: Optional[int] = None) -> Dict[str, Any]:
+    """JSON-ready shot dict, optionally projected to a subset of fields (shot_number: its storyboard position)"""
+    shot_dict = shot.dict(include=set(fields) if fields else None)
+    if shot_number is not None and "shot_number" in shot_dict:
+        shot_dict["shot_number"] = shot_number
+    for key in ("created_at", "modified_at"):
+        if shot_dict.get(key):
+            shot_dict[key] = shot_dict[key].isoformat()
+    return shot_dict
+
+def _storyboard_payload(storyboard: Storyboard, include_shots: bool = True, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """JSON-ready storyboard dict, with its shots resolved from shots_db (and projected) if requested"""
+    board = storyboard.dict()
+    board["created_at"] = storyboard.created_at.isoformat()
+    board["modified_at"] = storyboard.modified_at.isoformat() if storyboard.modified_at else None
+    board["num_shots"] = storyboard.num_shots
+    if include_shots:
+        board["shots"] = [_shot_payload(shot, fields, number) for number, shot in storyboard.iter_shots(shots_db)]
+    return board
+
+def _save_shot(shot: Shot):
+    """
+    Persist a shot to outputs/shots (its prompt blocks go to PROMPT_BLOCK_DIR
+    once, referenced by digest). Its cached source is pinned for the shot
+    (up to the cache's pin cap): once the presigned image_url expires, that
+    blob is the only copy. A new source replaces the shot's old pin.
+    """
+    if not shot.image_local_path:
+        image_cache.unpin(shot.shot_id)
+    elif not image_cache.pin(shot.image_local_path, owner=shot.shot_id):
+        image_cache.unpin(shot.shot_id)
+        shot.image_local_path = None  # no longer in the cache; don't persist a dangling path
+    shot_dict = shot.dict()
+    shot_dict["structured_prompt"] = PROMPT_BLOCKS.pack(shot.structured_prompt, PROMPT_BLOCK_DIR)
+    with open(f"outputs/shots/{shot.shot_id}.json", 'w') as f:
+        json.dump(shot_dict, f, indent=2, default=str)
+
+def _save_storyboard(storyboard: Storyboard):
+    """Persist a storyboard (shot order and settings; shots are saved on their own)"""
+    with open(f"outputs/storyboards/{storyboard.storyboard_id}.json", 'w') as f:
+        json.dump(storyboard.dict(), f, indent=2, default=str)
+
+def _export_entries(storyboard: Storyboard, assets: List[str]):
+    """ZIP entries for a storyboard export, plus the files that couldn't be found (blocking)"""
+    root = storyboard.storyboard_id
+    entries, missing = [], []
+    
+    if "shots" in assets:
+        data = json.dumps(_storyboard_payload(storyboard, include_shots=False), indent=2).encode()
+        entries.append({"arcname": f"{root}/storyboard.json", "data": data, "kind": "storyboard"})
+    
+    for number, shot in storyboard.iter_shots(shots_db):
+        folder = f"{root}/{number:02d}_{shot.shot_id}"
+        meta = {"shot_id": shot.shot_id}
+        
+        if "shots" in assets:
+            data = json.dumps(shot.dict(), indent=2, default=str).encode()
+            entries.append({"arcname": f"{folder}/shot.json", "data": data, "kind": "shot", **meta})
+        
+        if "sources" in assets:
+            try:
+                path = _source_path(shot)
+                entries.append({"arcname": f"{folder}/source{os.path.splitext(path)[1]}", "path": path, "kind": "source", **meta})
+            except Exception:
+                missing.append({"kind": "source", **meta})
+        
+        outputs = dict(shot.hdr_paths)
+        if shot.hdr_16bit_path:
+            outputs.setdefault("png_16bit" if shot.hdr_16bit_path.endswith(".png") else "tiff_16bit", shot.hdr_16bit_path)
+        if shot.hdr_comparison_path:
+            outputs.setdefault("comparison", shot.hdr_comparison_path)
+        
+        for group in ("previews", "masters"):
+            if group not in assets:
+                continue
+            for fmt in EXPORT_ASSETS[group]:
+                path = outputs.get(fmt)
+                if not path:
+                    continue
+                if os.path.exists(path):
+                    entries.append({"arcname": f"{folder}/{os.path.basename(path)}", "path": path, "kind": fmt, **meta})
+                else:
+                    missing.append({"kind": fmt, "path": path, **meta})
+    
+    return entries, missing
+
+def _storyboard_formats(storyboard: Storyboard, requested: Optional[List[str]]) -> Optional[List[str]]:
+    """Requested HDR formats, else the defaults plus an EXR master for export_format="exr" boards"""
+    if requested or storyboard.export_format != "exr":
+        return requested
+    return list(DEFAULT_FORMATS) + ["exr_half"]
+
+def _source_path(shot: Shot) -> str:
+    """Local path of a shot's source image, fetching it into the cache if needed (blocking)"""
+    if not (shot.image_local_path and os.path.exists(shot.image_local_path)):
+        evicted = shot.image_local_path
+        shot.image_local_path = None
+        _cache_source(shot)
+        if not shot.image_local_path:
+            if evicted:
+                raise ValueError(f"Source image of shot {shot.shot_id} is no longer in the local cache and "
+                                 f"could not be downloaded again (its image URL may have expired)")
+            raise ValueError(f"Shot {shot.shot_id} has no source image")
+    return shot.image_local_path
+
+def _quality_score(shot: Shot) -> float:
+    """Ingest quality score, -1 for shots that were never scored"""
+    return shot.quality["score"] if shot.quality else -1.0
+
+def _shot_color_stats(shot: Shot) -> Dict[str, Any]:
+    """A shot's cached colour stats, computed from its source on first use (blocking)"""
+    if shot.color_stats is None:
+        if shot.image_local_path and os.path.exists(shot.image_local_path):
+            proxy = load_proxy(shot.image_local_path)
+        else:
+            proxy = hdr_pipeline.download_image(shot.image_url)
+        shot.color_stats = compute_color_stats(proxy)
+    return shot.color_stats
+
+def _resolve_lut(name: str) -> str:
+    """Path of a .cube file in LUT_DIR (404 if missing)"""
+    path = os.path.join(LUT_DIR, os.path.basename(name))
+    if not path.endswith(".cube"):
+        path += ".cube"
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"LUT not found: {name}")
+    return path
+
+def _grade_settings(settings: Optional[Dict[str, float]]) -> Dict[str, float]:
+    """Slider settings from a request (400 on unknown keys)"""
+    unknown = sorted(set(settings or {}) - set(GRADE_SETTINGS))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown hdr_settings: {', '.join(unknown)} (expected {', '.join(GRADE_SETTINGS)})"
+        )
+    return dict(settings or {})
+
+@app.get("/api/hdr/luts")
+async def list_luts():
+    """Available colourist LUTs (.cube files in HDR_LUT_DIR)"""
+    luts = sorted(f for f in os.listdir(LUT_DIR) if f.endswith(".cube"))
+    return JSONResponse(content={"luts": luts, "total": len(luts)})
+
+@app.get("/api/hdr/luts/{preset}.cube")
+async def export_grade_lut(
+    preset: str,
+    exposure: float = 0.0,
+    contrast: float = 1.0,
+    saturation: float = 1.0,
+    temperature: float = 0.0,
+    size: int = 33
+):
+    """Export a preset + slider grade as a .cube 3D LUT (loads in DaVinci Resolve)"""
+    if size not in (17, 33, 65):
+        raise HTTPException(status_code=400, detail="size must be 17, 33 or 65")
+    
+    filename = f"fibo_{preset}_e{exposure:+.2f}_c{contrast:.2f}_s{saturation:.2f}_t{temperature:+.2f}_{size}.cube"
+    path = os.path.join("outputs/luts", filename)
+    if not os.path.exists(path):
+        hdr_pipeline.export_cube(path, preset, exposure, contrast, saturation, temperature, size=size)
+    
+    return FileResponse(path, filename=filename, media_type="text/plain")
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Usage metrics: crew tokens/latency per agent, task and prompt mode, FIBO and HDR job stats"""
+    return JSONResponse(content={
+        "cinema_crew": cinema_crew.get_stats(),
+        "bria_client": bria_client.get_stats(),
+        "hdr_pipeline": hdr_pipeline.get_stats(),
+        "image_cache": image_cache.get_stats(),
+        "proxy_grader": proxy_grader.get_stats(),
+        "shot_differ": shot_differ.get_stats(),
+        "thumbnails": thumbnails.get_stats(),
+        "animatics": animatics.get_stats(),
+        "prompt_blocks": PROMPT_BLOCKS.get_stats()
+    })
+
 @app.get("/api/download/{filename}")
 async def download_file(filename: str):
     """Download generated files"""
@@ -480,7 +1401,8 @@ async def download_file(filename: str):
     possible_paths = [
         f"outputs/shots/{filename}",
         f"outputs/hdr/{filename}",
-        f"outputs/storyboards/{filename}"
+        f"outputs/storyboards/{filename}",
+        f"outputs/animatics/{filename}"
     ]
     
     for path in possible_paths:
@@ -501,13 +1423,19 @@ async def startup_event():
     print("="*80)
     print("✅ FastAPI server starting...")
     print("✅ Bria FIBO client connected")
-    print("✅ Cinema Crew ready (4 agents)")
+    print(f"✅ Cinema Crew pool ready ({cinema_crew.size} crews x 4 agents)")
     print("✅ HDR pipeline initialized")
     print("="*80)
     print("📍 Server: http://localhost:8000")
     print("📚 API Docs: http://localhost:8000/docs")
     print("="*80 + "\n")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop batch grader processes and thumbnail workers"""
+    hdr_batch.shutdown()
+    thumbnails.shutdown()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
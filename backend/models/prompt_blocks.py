@@ -0,0 +1,208 @@
+# models/prompt_blocks.py
+import hashlib
+import json
+import os
+import threading
+import weakref
+from typing import Dict, Any, Optional, Sequence
+
+# Top-level structured_prompt keys stored as shared, hash-consed blocks
+BLOCKS = ("objects", "lighting", "aesthetics", "photographic_characteristics")
+
+class FrozenDict(dict):
+    """
+    Read-only dict: still a dict for json.dumps, pydantic and .get(), but any
+    in-place change raises (derive a new prompt with PromptBlocks.assoc)
+    """
+
+    __slots__ = ("__weakref__",)
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Structured prompt blocks are shared between shots and immutable; use PromptBlocks.assoc")
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+class FrozenList(list):
+    """Read-only list, the FrozenDict counterpart (tuples can't be weakly referenced)"""
+
+    __slots__ = ("__weakref__",)
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Structured prompt blocks are shared between shots and immutable; use PromptBlocks.assoc")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _immutable
+    append = clear = extend = insert = pop = remove = reverse = sort = _immutable
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+def freeze(value: Any) -> Any:
+    """Deep read-only copy: dicts -> FrozenDict, lists -> FrozenList"""
+    if isinstance(value, dict):
+        return value if isinstance(value, FrozenDict) else FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return value if isinstance(value, FrozenList) else FrozenList(freeze(v) for v in value)
+    return value
+
+def _digest(value: Any) -> str:
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:20]
+
+def diff_prompts(old: Dict[str, Any], new: Dict[str, Any], prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    """
+    Leaf-level changes between two prompts, as {"lighting.direction": {"from", "to"}}
+
+    Shared blocks are the same object, so they're skipped without being
+    compared. Lists that change length are reported whole.
+    """
+    changes = {}
+    for key in sorted(set(old) | set(new), key=str):
+        a, b = old.get(key), new.get(key)
+        if a is b:
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(a, dict) and isinstance(b, dict):
+            changes.update(diff_prompts(a, b, path + "."))
+        elif isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)) and len(a) == len(b):
+            changes.update(diff_prompts(dict(enumerate(a)), dict(enumerate(b)), path + "."))
+        elif a != b:
+            changes[path] = {"from": a, "to": b}
+    return changes
+
+class PromptBlocks:
+    """
+    Hash-consed store of structured-prompt blocks
+
+    canonicalize() freezes a prompt and swaps each of its BLOCKS for the one
+    stored instance with the same content, so every shot (and every
+    /modify or /refine variant) that shares a lighting, camera or subject
+    block holds a reference to the same object instead of a copy. assoc()
+    changes one field copy-on-write: only the block on the path is rebuilt.
+    pack()/unpack() persist blocks once each, as <digest>.json, with shot
+    files referring to them by digest.
+
+    The store only holds blocks weakly: once no shot (or other prompt)
+    references a block any more, e.g. after its shots are deleted, it drops
+    out of the store. unpack() reloads it from block_dir if it's needed again.
+    """
+
+    def __init__(self):
+        self._blocks: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()  # digest -> canonical block
+        self._digests: Dict[int, str] = {}  # id(canonical block) -> digest, while the block is alive
+        self._persisted = set()
+        self._lock = threading.RLock()  # RLock: a block can be freed (and _forget run) while it's held
+
+        self.hits = 0
+        self.misses = 0
+
+    def intern(self, value: Any) -> Any:
+        """The shared instance of a block's content"""
+        with self._lock:
+            digest = self._digests.get(id(value))
+            if digest is not None and self._blocks[digest] is value:
+                return value
+
+        frozen = freeze(value)
+        digest = _digest(frozen)
+        with self._lock:
+            existing = self._blocks.get(digest)
+            if existing is not None:
+                self.hits += 1
+                return existing
+            self.misses += 1
+            self._blocks[digest] = frozen
+            self._digests[id(frozen)] = digest
+            weakref.finalize(frozen, self._forget, id(frozen), digest)
+            return frozen
+
+    def _forget(self, block_id: int, digest: str):
+        """Drop the bookkeeping of a block no prompt references any more"""
+        with self._lock:
+            if self._digests.get(block_id) == digest:
+                del self._digests[block_id]
+            self._persisted.discard(digest)
+
+    def digest(self, block: Any) -> str:
+        block = self.intern(block)
+        with self._lock:
+            return self._digests[id(block)]
+
+    def canonicalize(self, prompt: Dict[str, Any]) -> FrozenDict:
+        """Frozen prompt whose blocks are the shared instances"""
+        return FrozenDict(
+            (key, self.intern(value) if key in BLOCKS and value is not None else freeze(value))
+            for key, value in prompt.items()
+        )
+
+    def assoc(self, prompt: Dict[str, Any], path: Sequence[str], value: Any) -> FrozenDict:
+        """Copy of prompt with the field at path set to value; all other blocks stay shared"""
+        def rebuilt(node: Any, keys: Sequence[str]) -> Any:
+            if not keys:
+                return value
+            fields = dict(node) if isinstance(node, dict) else {}
+            fields[keys[0]] = rebuilt(fields.get(keys[0]), keys[1:])
+            return fields
+
+        return self.canonicalize(rebuilt(prompt, list(path)))
+
+    def pack(self, prompt: Dict[str, Any], block_dir: str) -> Dict[str, Any]:
+        """Prompt for a shot file: blocks written once to block_dir and replaced by {"$block": digest}"""
+        packed = {}
+        for key, value in prompt.items():
+            if key not in BLOCKS or value is None:
+                packed[key] = value
+                continue
+            digest = self.digest(value)
+            if digest not in self._persisted:
+                path = os.path.join(block_dir, f"{digest}.json")
+                if not os.path.exists(path):
+                    tmp = path + ".tmp"
+                    with open(tmp, "w") as f:
+                        json.dump(self._blocks[digest], f)
+                    os.replace(tmp, path)
+                self._persisted.add(digest)
+            packed[key] = {"$block": digest}
+        return packed
+
+    def unpack(self, packed: Dict[str, Any], block_dir: str) -> FrozenDict:
+        """Inverse of pack (prompts saved before blocks existed pass through unchanged)"""
+        prompt = {}
+        for key, value in packed.items():
+            if isinstance(value, dict) and set(value) == {"$block"}:
+                digest = value["$block"]
+                with self._lock:
+                    block = self._blocks.get(digest)
+                if block is None:
+                    with open(os.path.join(block_dir, f"{digest}.json")) as f:
+                        block = json.load(f)
+                    self._persisted.add(digest)
+                value = block
+            prompt[key] = value
+        return self.canonicalize(prompt)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "blocks": len(self._blocks),
+                "shared_hits": self.hits,
+                "misses": self.misses
+            }
+
+# Process-wide store: Shot.structured_prompt is canonicalized through it
+PROMPT_BLOCKS = PromptBlocks()
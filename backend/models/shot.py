@@ -1,8 +1,9 @@
 # models/shot.py
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
+from models.prompt_blocks import PROMPT_BLOCKS
 
 class ShotType(str, Enum):
     """Standard cinematography shot types"""
@@ -39,9 +40,10 @@ class Shot(BaseModel):
     purpose: Optional[str] = None  # "establishing", "reaction", "detail", etc.
     
     # FIBO data
-    structured_prompt: Dict[str, Any]
+    structured_prompt: Dict[str, Any]  # Immutable; blocks shared with other shots (models/prompt_blocks.py)
     simple_prompt: str
     seed: Optional[int] = None
+    request_id: Optional[str] = None  # Bria generation request (durable image cache key)
     
     # Generated outputs
     image_url: Optional[str] = None
@@ -50,6 +52,12 @@ class Shot(BaseModel):
     # HDR outputs
     hdr_16bit_path: Optional[str] = None
     hdr_comparison_path: Optional[str] = None
+    hdr_paths: Dict[str, str] = Field(default_factory=dict)  # Every format of the latest grade (tiff_16bit, web_preview, ...)
+    
+    # Colour statistics of a downsampled proxy (utils/color_stats.py), computed at ingest
+    color_stats: Optional[Dict[str, Any]] = None
+    # Ingest quality gate (utils/quality.py): score 0-100, flags (defects fail it), metrics
+    quality: Optional[Dict[str, Any]] = None
     
     # Metadata
     created_at: datetime = Field(default_factory=datetime.now)
@@ -57,11 +65,20 @@ class Shot(BaseModel):
     tags: List[str] = Field(default_factory=list)
     notes: Optional[str] = None
     
+    # Variant lineage (/modify, /refine): the parent shot and what changed in the prompt
+    parent_shot_id: Optional[str] = None
+    prompt_diff: Optional[Dict[str, Any]] = None  # {"lighting.direction": {"from": ..., "to": ...}}
+    
     # Generation settings
     aspect_ratio: str = "16:9"
     steps: int = 50
     guidance_scale: float = 5.0
     
+    @field_validator("structured_prompt", mode="after")
+    @classmethod
+    def _share_prompt_blocks(cls, prompt: Dict[str, Any]) -> Dict[str, Any]:
+        return PROMPT_BLOCKS.canonicalize(prompt)
+    
     class Config:
         json_schema_extra = {
             "example": {
@@ -1,12 +1,18 @@
 # models/storyboard.py
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import List, Optional, Dict, Any, Iterator, Mapping, Tuple
 from datetime import datetime
 from models.shot import Shot
 
 class Storyboard(BaseModel):
     """
     Collection of shots forming a sequence
+    
+    Shots are referenced by ID and live in the shot repository (shots_db):
+    the board keeps only their order plus an ID -> position index, so it
+    never duplicates shot payloads, lookups by number or ID are O(1), and
+    a reorder permutes a list of strings. A shot's number is its position
+    (1-based), reported by iter_shots.
     """
     
     # Identification
@@ -14,8 +20,9 @@ class Storyboard(BaseModel):
     title: str
     description: Optional[str] = None
     
-    # Shots
-    shots: List[Shot] = Field(default_factory=list)
+    # Shots, in order (resolve with iter_shots / get_shot)
+    shot_ids: List[str] = Field(default_factory=list)
+    _positions: Dict[str, int] = PrivateAttr(default_factory=dict)
     
     # Script/source
     original_script: Optional[str] = None
@@ -33,34 +40,55 @@ class Storyboard(BaseModel):
     export_format: str = "jpg"  # "jpg", "png", "exr", "tiff"
     target_fps: int = 24  # For video export
     
+    def model_post_init(self, __context: Any):
+        self._reindex()
+    
+    def _reindex(self):
+        self._positions = {shot_id: i for i, shot_id in enumerate(self.shot_ids)}
+    
+    @property
+    def num_shots(self) -> int:
+        return len(self.shot_ids)
+    
     def add_shot(self, shot: Shot):
         """Add shot to storyboard"""
-        shot.shot_number = len(self.shots) + 1
-        self.shots.append(shot)
+        if shot.shot_id in self._positions:
+            raise ValueError(f"Shot {shot.shot_id} is already in the storyboard")
+        self._positions[shot.shot_id] = len(self.shot_ids)
+        self.shot_ids.append(shot.shot_id)
+        shot.shot_number = len(self.shot_ids)
         self.modified_at = datetime.now()
     
     def reorder_shots(self, new_order: List[int]):
-        """Reorder shots by shot_number list"""
-        if len(new_order) != len(self.shots):
-            raise ValueError("new_order must match number of shots")
+        """Reorder shots: new_order[i] is the current (0-based) position of the shot to put at i"""
+        if sorted(new_order) != list(range(len(self.shot_ids))):
+            raise ValueError("new_order must be a permutation of the current shot positions")
         
-        # Create new list in specified order
-        reordered = [None] * len(self.shots)
-        for new_pos, old_pos in enumerate(new_order):
-            if old_pos < len(self.shots):
-                shot = self.shots[old_pos]
-                shot.shot_number = new_pos + 1
-                reordered[new_pos] = shot
-        
-        self.shots = [s for s in reordered if s is not None]
+        self.shot_ids = [self.shot_ids[old_pos] for old_pos in new_order]
+        self._reindex()
         self.modified_at = datetime.now()
     
-    def get_shot(self, shot_number: int) -> Optional[Shot]:
-        """Get shot by number"""
-        for shot in self.shots:
-            if shot.shot_number == shot_number:
-                return shot
-        return None
+    def position(self, shot_id: str) -> Optional[int]:
+        """0-based position of a shot, or None if it isn't on this board"""
+        return self._positions.get(shot_id)
+    
+    def get_shot(self, shot_number: int, shots: Mapping[str, Shot]) -> Optional[Shot]:
+        """Get shot by number, resolved from the shot repository (not modified)"""
+        if not 1 <= shot_number <= len(self.shot_ids):
+            return None
+        return shots.get(self.shot_ids[shot_number - 1])
+    
+    def iter_shots(self, shots: Mapping[str, Shot]) -> Iterator[Tuple[int, Shot]]:
+        """
+        (shot number, shot) pairs in order, resolved lazily from the shot
+        repository (missing IDs are skipped). Shots are shared with the
+        repository, so their stored shot_number is left alone; use the
+        number yielded here.
+        """
+        for number, shot_id in enumerate(self.shot_ids, 1):
+            shot = shots.get(shot_id)
+            if shot is not None:
+                yield number, shot
     
     class Config:
         json_schema_extra = {
@@ -68,6 +96,6 @@ class Storyboard(BaseModel):
                 "storyboard_id": "20251216_150000",
                 "title": "Mars Discovery Scene",
                 "description": "Hero discovers ancient alien technology",
-                "shots": []
+                "shot_ids": []
             }
         }
\ No newline at end of file
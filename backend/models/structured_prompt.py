@@ -0,0 +1,78 @@
+# models/structured_prompt.py
+import re
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Optional, List
+
+class SceneObject(BaseModel):
+    """Subject entry in 'objects' (Director's subject anchor)"""
+    description: str
+    location: Optional[str] = None
+    relationship: Optional[str] = None
+    relative_size: Optional[str] = None
+    shape_and_color: Optional[str] = None
+    texture: Optional[str] = None
+    appearance_details: Optional[str] = None
+    pose: Optional[str] = None
+    orientation: Optional[str] = None
+
+    model_config = ConfigDict(extra="allow")
+
+class Lighting(BaseModel):
+    """'lighting' block (Gaffer)"""
+    conditions: str
+    direction: str
+    shadow: Optional[str] = None
+    quality: Optional[str] = None
+
+    model_config = ConfigDict(extra="allow")
+
+class Aesthetics(BaseModel):
+    """'aesthetics' block"""
+    composition: Optional[str] = None
+    color_scheme: Optional[str] = None
+    mood_atmosphere: Optional[str] = None
+    preference_score: Optional[str] = None
+    aesthetic_score: Optional[str] = None
+
+    model_config = ConfigDict(extra="allow")
+
+class PhotographicCharacteristics(BaseModel):
+    """'photographic_characteristics' block (DP)"""
+    depth_of_field: Optional[str] = None
+    focus: Optional[str] = None
+    camera_angle: str
+    lens_focal_length: str
+    camera_movement: Optional[str] = None
+
+    @field_validator("lens_focal_length", mode="before")
+    @classmethod
+    def lens_has_mm(cls, value):
+        """Must name a focal length in mm; a bare number like 50 becomes "50mm" """
+        text = str(value).strip()
+        if text.isdigit():
+            return f"{text}mm"
+        if re.search(r"\d+\s*mm", text, re.IGNORECASE):
+            return text
+        raise ValueError("lens_focal_length must be a focal length in mm, e.g. '50mm'")
+
+    model_config = ConfigDict(extra="allow")
+
+class StructuredPrompt(BaseModel):
+    """
+    FIBO structured_prompt as assembled by the Editor
+
+    Only the blocks FIBO and parameter isolation depend on are required;
+    unknown keys are kept so nothing the Editor adds is dropped.
+    """
+    short_description: str
+    objects: List[SceneObject] = Field(min_length=1)
+    background_setting: Optional[str] = None
+    lighting: Lighting
+    aesthetics: Optional[Aesthetics] = None
+    photographic_characteristics: PhotographicCharacteristics
+    style_medium: Optional[str] = None
+    context: Optional[str] = None
+    artistic_style: Optional[str] = None
+    negative_prompt: Optional[str] = None
+
+    model_config = ConfigDict(extra="allow")
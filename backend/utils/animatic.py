@@ -0,0 +1,208 @@
+# utils/animatic.py
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.image_cache import content_hash
+
+# fourcc -> container; mp4v is the first one OpenCV's FFmpeg backend can always write
+CODECS = {
+    "mp4v": ".mp4",
+    "MJPG": ".avi"
+}
+
+class AnimaticRenderer:
+    """
+    Storyboard animatics: shots held on screen and crossfaded into a video
+
+    Frames flow through a chain of generators (decode -> letterbox -> timeline
+    -> writer), so at most two shots are decoded at any time however long the
+    board is: the one on screen and, during a crossfade, the next. Renders
+    are keyed by the shots' content hashes and the timing, so re-requesting
+    an unchanged board returns the existing file.
+    """
+
+    def __init__(self, output_dir: str = "outputs/animatics", width: int = 1280, codec: str = "mp4v"):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown animatic codec '{codec}' (available: {', '.join(CODECS)})")
+        self.output_dir = output_dir
+        self.width = width
+        self.codec = codec
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.renders = 0
+        self.reused = 0
+        self.frames_written = 0
+        self.total_ms = 0.0
+
+    @staticmethod
+    def _decode(paths: List[str], width: int) -> Iterator[np.ndarray]:
+        """Each source decoded on demand, downscaled to at most width"""
+        for path in paths:
+            h, w = _image_size(path)
+            # Let libjpeg/libpng skip work when the source is 2x/4x/8x the output
+            flag = cv2.IMREAD_COLOR
+            for factor, reduced in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2)):
+                if w and w >= width * factor:
+                    flag = reduced
+                    break
+            img = cv2.imread(path, flag)
+            if img is None:
+                raise ValueError(f"Could not decode {path}")
+            if img.shape[1] > width:
+                h, w = img.shape[:2]
+                img = cv2.resize(img, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+            yield img
+
+    @staticmethod
+    def _letterbox(frames: Iterator[np.ndarray], size: Tuple[int, int]) -> Iterator[np.ndarray]:
+        """Fit each frame inside a (width, height) black canvas, centred"""
+        cw, ch = size
+        for img in frames:
+            h, w = img.shape[:2]
+            if (w, h) == (cw, ch):
+                yield img
+                continue
+            scale = min(cw / w, ch / h)
+            nw, nh = max(1, round(w * scale)), max(1, round(h * scale))
+            img = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+            canvas = np.zeros((ch, cw, 3), dtype=np.uint8)
+            x, y = (cw - nw) // 2, (ch - nh) // 2
+            canvas[y:y + nh, x:x + nw] = img
+            yield canvas
+
+    @staticmethod
+    def _timeline(frames: Iterator[np.ndarray], counts: List[int], fade: int) -> Iterator[np.ndarray]:
+        """
+        Video frames: shot i for counts[i] frames, the last `fade` of which
+        dissolve into shot i+1 (so the total length is exactly sum(counts))
+        """
+        current = next(frames)
+        for i, count in enumerate(counts):
+            following = next(frames, None) if i + 1 < len(counts) else None
+            blend = min(fade, count) if following is not None else 0
+
+            for _ in range(count - blend):
+                yield current
+            for k in range(blend):
+                alpha = (k + 1) / (blend + 1)
+                yield cv2.addWeighted(current, 1 - alpha, following, alpha, 0)
+            current = following
+
+    def output_path(self, paths: List[str], holds: List[float], fps: int, crossfade: float) -> str:
+        """Where a render with these inputs lives (content-addressed)"""
+        key = json.dumps({
+            "sources": [content_hash(p) for p in paths],
+            "holds": holds,
+            "fps": fps,
+            "crossfade": crossfade,
+            "width": self.width,
+            "codec": self.codec
+        }, sort_keys=True)
+        digest = hashlib.sha256(key.encode()).hexdigest()[:24]
+        return os.path.join(self.output_dir, f"animatic_{digest}{CODECS[self.codec]}")
+
+    def render(self, paths: List[str], holds: List[float], fps: int = 24, crossfade: float = 0.5) -> Dict[str, Any]:
+        """
+        Render source images (in order) held for holds[i] seconds each, with
+        crossfade seconds of dissolve between consecutive shots (blocking)
+
+        Returns:
+            {"path", "frames", "duration", "fps", "size", "cached", "render_ms"}
+        """
+        if not paths:
+            raise ValueError("Animatic needs at least one shot")
+        if len(holds) != len(paths):
+            raise ValueError("holds must have one duration per shot")
+        if fps <= 0 or fps > 120:
+            raise ValueError("fps must be between 1 and 120")
+        if any(h <= 0 for h in holds) or crossfade < 0:
+            raise ValueError("Hold durations must be positive and crossfade non-negative")
+
+        counts = [max(1, round(h * fps)) for h in holds]
+        fade = round(crossfade * fps)
+
+        path = self.output_path(paths, holds, fps, crossfade)
+        if os.path.exists(path):
+            self.reused += 1
+            return self._result(path, counts, fps, cached=True, elapsed_ms=0.0)
+
+        start = time.perf_counter()
+        decoded = self._decode(paths, self.width)
+
+        # The first frame fixes the canvas (even dimensions for the encoder)
+        first = next(decoded)
+        h, w = first.shape[:2]
+        size = (w - w % 2, h - h % 2)
+        frames = self._letterbox(_chain(first, decoded), size)
+
+        tmp = path + ".tmp" + CODECS[self.codec]
+        writer = cv2.VideoWriter(tmp, cv2.VideoWriter_fourcc(*self.codec), fps, size)
+        if not writer.isOpened():
+            raise ValueError(f"OpenCV cannot write {self.codec} video on this build")
+        try:
+            written = 0
+            for frame in self._timeline(frames, counts, fade):
+                writer.write(frame)
+                written += 1
+        finally:
+            writer.release()
+        os.replace(tmp, path)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.renders += 1
+        self.frames_written += written
+        self.total_ms += elapsed_ms
+        return self._result(path, counts, fps, cached=False, elapsed_ms=elapsed_ms, size=size)
+
+    @staticmethod
+    def _result(path: str, counts: List[int], fps: int, cached: bool, elapsed_ms: float, size: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        if size is None:
+            capture = cv2.VideoCapture(path)
+            size = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            capture.release()
+        frames = sum(counts)
+        return {
+            "path": path,
+            "frames": frames,
+            "duration": round(frames / fps, 3),
+            "fps": fps,
+            "size": list(size),
+            "cached": cached,
+            "render_ms": round(elapsed_ms, 1)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "renders": self.renders,
+            "reused": self.reused,
+            "frames_written": self.frames_written,
+            "avg_render_ms": round(self.total_ms / self.renders, 1) if self.renders else 0.0
+        }
+
+def _chain(first: np.ndarray, rest: Iterator[np.ndarray]) -> Iterator[np.ndarray]:
+    yield first
+    yield from rest
+
+def _image_size(path: str) -> Tuple[int, int]:
+    """(height, width) from a PNG/JPEG/WebP header without decoding; (0, 0) if unknown"""
+    with open(path, "rb") as f:
+        head = f.read(64 * 1024)
+    if head.startswith(b"\x89PNG"):
+        return int.from_bytes(head[20:24], "big"), int.from_bytes(head[16:20], "big")
+    if head.startswith(b"\xff\xd8"):
+        i = 2
+        while i + 9 < len(head):
+            if head[i] != 0xFF:
+                break
+            marker = head[i + 1]
+            length = int.from_bytes(head[i + 2:i + 4], "big")
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                return int.from_bytes(head[i + 5:i + 7], "big"), int.from_bytes(head[i + 7:i + 9], "big")
+            i += 2 + length
+    return 0, 0
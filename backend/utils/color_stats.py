@@ -0,0 +1,122 @@
+# utils/color_stats.py
+import math
+from typing import Dict, Any, List, Optional
+
+import cv2
+import numpy as np
+
+STATS_WIDTH = 256
+HIST_BINS = 32
+
+# b* shift per unit of the grade's temperature slider (0.1 added to red,
+# subtracted from blue), measured on sRGB grays 0.3-0.7
+TEMPERATURE_B_PER_UNIT = 18.0
+
+def load_proxy(path: str, width: int = STATS_WIDTH) -> np.ndarray:
+    """Small 8-bit BGR proxy of an image file (JPEGs are decoded at 1/4 scale)"""
+    img = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_4)
+    if img is None:
+        raise ValueError(f"Could not decode {path}")
+    h, w = img.shape[:2]
+    if w > width:
+        img = cv2.resize(img, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+    return img
+
+def compute_color_stats(img_bgr: np.ndarray, width: int = STATS_WIDTH) -> Dict[str, Any]:
+    """
+    Per-shot colour statistics on a downsampled 8-bit BGR proxy
+
+    Per-channel histograms, Lab mean/std (plus mean chroma) and the share
+    of clipped highlights/shadows. Everything is a handful of OpenCV passes
+    over ~256px (about 1 ms), so it is cheap enough to run at ingest.
+    """
+    h, w = img_bgr.shape[:2]
+    if w > width:
+        img_bgr = cv2.resize(img_bgr, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+
+    # 8-bit Lab (L scaled to 0-255, a/b offset by 128): ~4x faster than float
+    lab = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2LAB)
+    mean, std = cv2.meanStdDev(lab)
+    scale = np.array([100 / 255, 1.0, 1.0])
+    mean = mean.ravel() * scale - [0, 128, 128]
+    std = std.ravel() * scale
+    a, b = (lab[..., i].astype(np.float32) - 128 for i in (1, 2))
+    chroma = float(cv2.magnitude(a, b).mean())
+
+    channels = cv2.split(img_bgr)
+    brightest = cv2.max(cv2.max(channels[0], channels[1]), channels[2])
+    darkest = cv2.min(cv2.min(channels[0], channels[1]), channels[2])
+    n = brightest.size
+
+    histograms = {
+        name: np.round(cv2.calcHist([img_bgr], [i], None, [HIST_BINS], [0, 256]).ravel() / n, 4).tolist()
+        for i, name in enumerate("bgr")
+    }
+
+    return {
+        "proxy_size": [int(img_bgr.shape[1]), int(img_bgr.shape[0])],
+        "lab_mean": [round(float(v), 3) for v in mean],
+        "lab_std": [round(float(v), 3) for v in std],
+        "chroma_mean": round(chroma, 3),
+        "clipped_highlights_pct": round(np.count_nonzero(brightest >= 254) * 100 / n, 3),
+        "clipped_shadows_pct": round(np.count_nonzero(darkest <= 1) * 100 / n, 3),
+        "histograms": histograms
+    }
+
+def target_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Average look of a set of shots (the auto-match target when no reference is given)"""
+    return {
+        "lab_mean": np.mean([s["lab_mean"] for s in stats], axis=0).tolist(),
+        "lab_std": np.mean([s["lab_std"] for s in stats], axis=0).tolist(),
+        "chroma_mean": float(np.mean([s["chroma_mean"] for s in stats]))
+    }
+
+def match_correction(stats: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Grade sliders (exposure, contrast, saturation, temperature) that move a
+    shot's statistics toward the target's
+
+    Treats L*/100 as roughly linear in code value (true within a few % for
+    sRGB midtones), so the grade's gain k = contrast * 2^exposure scales the
+    L* spread, and contrast (pivot 0.5) then fixes the mean:
+        k = S_t / S,  contrast = 2 (k m - M_t) + 1,  2^exposure = k / contrast
+    Saturation scales chroma on top of k; temperature shifts b*.
+    """
+    m, s = stats["lab_mean"][0] / 100, max(stats["lab_std"][0] / 100, 1e-3)
+    m_t, s_t = target["lab_mean"][0] / 100, target["lab_std"][0] / 100
+
+    k = s_t / s
+    contrast = min(max(2 * (k * m - m_t) + 1, 0.5), 2.0)
+    exposure = min(max(math.log2(max(k / contrast, 1e-3)), -2.0), 2.0)
+    gain = contrast * 2 ** exposure
+
+    saturation = target["chroma_mean"] / max(stats["chroma_mean"] * gain, 1e-3)
+    saturation = min(max(saturation, 0.3), 2.0)
+
+    b_after = stats["lab_mean"][2] * saturation * gain
+    temperature = min(max((target["lab_mean"][2] - b_after) / TEMPERATURE_B_PER_UNIT, -1.0), 1.0)
+
+    return {
+        "exposure": round(exposure, 3),
+        "contrast": round(contrast, 3),
+        "saturation": round(saturation, 3),
+        "temperature": round(temperature, 3)
+    }
+
+def match_corrections(
+    stats_by_shot: Dict[str, Dict[str, Any]],
+    reference: Optional[str] = None
+) -> Dict[str, Dict[str, float]]:
+    """Per-shot corrections toward a reference shot, or toward the set's average"""
+    target = stats_by_shot[reference] if reference else target_stats(list(stats_by_shot.values()))
+    return {shot_id: match_correction(stats, target) for shot_id, stats in stats_by_shot.items()}
+
+def apply_correction(settings: Optional[Dict[str, float]], correction: Dict[str, float]) -> Dict[str, float]:
+    """Stack a correction on top of base slider settings (exposure/temperature add, contrast/saturation multiply)"""
+    settings = settings or {}
+    return {
+        "exposure": round(settings.get("exposure", 0.0) + correction["exposure"], 3),
+        "contrast": round(settings.get("contrast", 1.0) * correction["contrast"], 3),
+        "saturation": round(settings.get("saturation", 1.0) * correction["saturation"], 3),
+        "temperature": round(settings.get("temperature", 0.0) + correction["temperature"], 3)
+    }
@@ -0,0 +1,119 @@
+# utils/event_stream.py
+import asyncio
+import json
+import threading
+import time
+from typing import Dict, Any, List, Callable, AsyncIterator, Optional
+
+class _Stream:
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.subscribers: List[tuple] = []  # (loop, asyncio.Queue)
+        self.closed = False
+        self.updated_at = time.time()
+
+class ShotEventBroker:
+    """
+    Per-request event streams for Server-Sent Events
+
+    Crews publish from worker threads; SSE handlers consume on the event loop.
+    Events are buffered per stream so a client that subscribes late (or
+    reconnects) replays everything it missed. Subscribers get a heartbeat
+    every heartbeat seconds of silence (keeps proxies from dropping the
+    connection) and an error event, then the end of the stream, after
+    idle_timeout seconds without a real event (default: ttl).
+    """
+
+    def __init__(self, ttl: int = 600, max_events: int = 5000, heartbeat: float = 15.0, idle_timeout: Optional[float] = None):
+        self.ttl = ttl
+        self.max_events = max_events
+        self.heartbeat = heartbeat
+        self.idle_timeout = idle_timeout if idle_timeout is not None else ttl
+        self._streams: Dict[str, _Stream] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, stream_id: str) -> _Stream:
+        stream = self._streams.get(stream_id)
+        if stream is None:
+            self._expire()
+            stream = self._streams[stream_id] = _Stream()
+        return stream
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for stream_id in [k for k, s in self._streams.items() if s.updated_at < cutoff]:
+            del self._streams[stream_id]
+
+    def publish(self, stream_id: str, event: str, data: Optional[Dict[str, Any]] = None):
+        """Publish an event (thread-safe)"""
+        message = {"event": event, "data": data or {}, "ts": time.time()}
+        with self._lock:
+            stream = self._get(stream_id)
+            if stream.closed:
+                return
+            if len(stream.events) < self.max_events:
+                stream.events.append(message)
+            stream.updated_at = message["ts"]
+            subscribers = list(stream.subscribers)
+
+        for loop, q in subscribers:
+            loop.call_soon_threadsafe(q.put_nowait, message)
+
+    def close(self, stream_id: str):
+        """Mark a stream finished; subscribers drain and stop (idempotent)"""
+        with self._lock:
+            stream = self._get(stream_id)
+            if stream.closed:
+                return
+            stream.closed = True
+            subscribers = list(stream.subscribers)
+
+        for loop, q in subscribers:
+            loop.call_soon_threadsafe(q.put_nowait, None)
+
+    def sink(self, stream_id: str) -> Callable[[str, Dict[str, Any]], None]:
+        """Callable the crew can publish through without knowing about streams"""
+        return lambda event, data=None: self.publish(stream_id, event, data)
+
+    async def subscribe(self, stream_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Replay buffered events, then yield live ones until the stream closes or goes idle"""
+        q: asyncio.Queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            stream = self._get(stream_id)
+            backlog = list(stream.events)
+            closed = stream.closed
+            if not closed:
+                stream.subscribers.append((loop, q))
+
+        try:
+            for message in backlog:
+                yield message
+            if closed:
+                return
+
+            last_event = loop.time()
+            while True:
+                try:
+                    message = await asyncio.wait_for(q.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    if loop.time() - last_event >= self.idle_timeout:
+                        yield {"event": "error", "data": {"detail": f"No events for {self.idle_timeout:.0f}s"}, "ts": time.time()}
+                        return
+                    yield {"event": "heartbeat", "data": {}, "ts": time.time()}
+                    continue
+                if message is None:
+                    return
+                last_event = loop.time()
+                yield message
+        finally:
+            with self._lock:
+                if (loop, q) in stream.subscribers:
+                    stream.subscribers.remove((loop, q))
+
+def format_sse(message: Dict[str, Any]) -> str:
+    """Encode one event in text/event-stream format (heartbeats as comments, which EventSource ignores)"""
+    if message["event"] == "heartbeat":
+        return ": heartbeat\n\n"
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
@@ -0,0 +1,179 @@
+# utils/hdr_batch.py
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import requests
+
+from utils.hdr_pipeline import CinematicHDR
+
+# One pipeline per grader process, created by the pool initializer
+_worker_hdr: Optional[CinematicHDR] = None
+
+def _init_worker(output_dir: str, max_memory_mb: Optional[float], preview_max_width: int, encode_workers: int):
+    global _worker_hdr
+    _worker_hdr = CinematicHDR(output_dir=output_dir, max_memory_mb=max_memory_mb, encode_workers=encode_workers)
+    _worker_hdr.preview_max_width = preview_max_width
+
+def _grade_worker(
+    source: Union[str, bytes],
+    shot_id: str,
+    grade: Dict[str, Any],
+    lut_file: Optional[str],
+    formats: Optional[List[str]],
+    profile: Union[str, Dict[str, str]]
+) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    Grader stage (runs in a worker process): decode, grade, encode
+
+    Every output is written here, through process_frame, so frames above the
+    memory ceiling are graded in strips and no full-resolution buffer is
+    pickled back to the parent. Returns (paths, job stats).
+    """
+    hdr = _worker_hdr
+    original = hdr.load_image(source) if isinstance(source, str) else hdr.decode_image(source)
+    paths = hdr.process_frame(original, shot_id, lut_file=lut_file, formats=formats, profile=profile, **grade)
+    return paths, hdr.job_stats[shot_id]
+
+class HDRBatchGrader:
+    """
+    Storyboard-level HDR batch grading as a staged pipeline
+
+        downloads (asyncio) -> graders (process pool: grade + encode)
+
+    Each grader process runs the full single-shot pipeline (process_frame),
+    with the parent pipeline's memory ceiling and `encoders` encode threads, so only
+    encoded sources go in and output paths come back. The download queue is
+    bounded, so at most queue_size fetched sources wait for a grader. Every
+    shot gets the same grade, unless its item carries a "grade" dict of
+    per-shot slider overrides (storyboard auto-match).
+    """
+
+    def __init__(
+        self,
+        hdr: CinematicHDR,
+        graders: Optional[int] = None,
+        encoders: int = 2,
+        downloads: int = 4,
+        queue_size: int = 2
+    ):
+        self.hdr = hdr
+        self.graders = graders or os.cpu_count() or 1
+        self.encoders = encoders
+        self.downloads = downloads
+        self.queue_size = queue_size
+
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.graders,
+                initializer=_init_worker,
+                initargs=(self.hdr.output_dir, self.hdr.max_memory_mb, self.hdr.preview_max_width, self.encoders)
+            )
+        return self._processes
+
+    def _fetch(self, item: Dict[str, Any]) -> Union[str, bytes]:
+        """Local path of a shot's source (image cache), or its bytes (blocking)"""
+        path = item.get("image_path")
+        if path and os.path.exists(path):
+            return path
+        if self.hdr.image_cache is not None:
+            return self.hdr.image_cache.fetch(item["image_url"], item.get("request_id"))
+        response = requests.get(item["image_url"], timeout=30)
+        response.raise_for_status()
+        return response.content
+
+    async def run(
+        self,
+        items: List[Dict[str, Any]],
+        preset: str = "neutral",
+        exposure: float = 0.0,
+        contrast: float = 1.0,
+        saturation: float = 1.0,
+        temperature: float = 0.0,
+        lut_file: Optional[str] = None,
+        formats: Optional[List[str]] = None,
+        profile: Union[str, Dict[str, str]] = "balanced"
+    ) -> Dict[str, Any]:
+        """
+        Grade and export every item ({"shot_id", "image_url", "image_path"?, "request_id"?, "grade"?})
+
+        Returns:
+            {"results": {shot_id: paths}, "errors": {shot_id: message},
+             "frames", "seconds", "fps", "stage_seconds"}
+        """
+        self.hdr.export_options(formats, profile)  # fail fast on bad formats/profiles
+        grade = dict(preset=preset, exposure=exposure, contrast=contrast,
+                     saturation=saturation, temperature=temperature)
+
+        loop = asyncio.get_running_loop()
+        pending: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            pending.put_nowait(item)
+        downloaded: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        results: Dict[str, Dict[str, str]] = {}
+        errors: Dict[str, str] = {}
+        busy = {"download": 0.0, "grade": 0.0}
+
+        async def downloader():
+            while not pending.empty():
+                item = pending.get_nowait()
+                start = time.perf_counter()
+                try:
+                    source = await asyncio.to_thread(self._fetch, item)
+                except Exception as e:
+                    errors[item["shot_id"]] = f"download: {e}"
+                    continue
+                busy["download"] += time.perf_counter() - start
+                await downloaded.put((item, source))
+
+        async def grader():
+            while (entry := await downloaded.get()) is not None:
+                item, source = entry
+                start = time.perf_counter()
+                try:
+                    paths, stats = await loop.run_in_executor(
+                        self._process_pool(), _grade_worker,
+                        source, item["shot_id"], {**grade, **item.get("grade", {})}, lut_file, formats, profile
+                    )
+                except Exception as e:
+                    errors[item["shot_id"]] = f"grade: {e}"
+                    continue
+                busy["grade"] += time.perf_counter() - start
+                results[item["shot_id"]] = paths
+                self.hdr.record_job_stats(item["shot_id"], stats)
+
+        print(f"\n🎞️ Batch grading {len(items)} shots ('{preset}'): "
+              f"{self.downloads} downloaders -> {self.graders} graders x {self.encoders} encoders")
+        start = time.perf_counter()
+
+        download_tasks = [asyncio.create_task(downloader()) for _ in range(self.downloads)]
+        grade_tasks = [asyncio.create_task(grader()) for _ in range(self.graders)]
+
+        # Drain: a None per grader tells it to stop once the downloads are done
+        await asyncio.gather(*download_tasks)
+        for _ in grade_tasks:
+            await downloaded.put(None)
+        await asyncio.gather(*grade_tasks)
+
+        seconds = time.perf_counter() - start
+        fps = len(results) / seconds if seconds > 0 else 0.0
+        print(f"✅ Batch complete: {len(results)}/{len(items)} shots in {seconds:.2f}s ({fps:.2f} fps)")
+
+        return {
+            "results": results,
+            "errors": errors,
+            "frames": len(results),
+            "seconds": round(seconds, 3),
+            "fps": round(fps, 3),
+            "stage_seconds": {stage: round(v, 3) for stage, v in busy.items()}
+        }
+
+    def shutdown(self):
+        if self._processes is not None:
+            self._processes.shutdown(wait=True, cancel_futures=True)
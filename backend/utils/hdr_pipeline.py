@@ -1,52 +1,229 @@
 # utils/hdr_pipeline.py
+import os
 import numpy as np
 import cv2
 from PIL import Image
-import os
-from typing import Tuple, Optional, Dict
+import json
+import hashlib
+import math
+import time
+import resource
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Optional, Dict, Any, List, Union
 import requests
 from io import BytesIO
 from datetime import datetime
 
+from utils.lut3d import LUT3D
+from utils.image_cache import ImageCache
+from utils.strip_writers import TiffStripWriter, PngStripWriter, ExrStripWriter
+
+# Rough working-set cost per pixel: whole-frame pipeline vs one strip in flight
+UNTILED_BYTES_PER_PIXEL = 40
+STRIP_BYTES_PER_PIXEL = 40
+EXR_BYTES_PER_PIXEL = 18  # extra for an EXR master: float32 frame + half copy
+# Tiled preview stage, per preview pixel: 16-bit graded + 8-bit original buffers,
+# then the 8-bit preview (tone map) or preview + comparison canvas; plus the
+# tone map's float chunks
+SMALL_BYTES_PER_PIXEL = 9
+PREVIEW_BYTES_PER_PIXEL = 3
+TONEMAP_CHUNK_ROWS = 64
+# Strips' worth of freed memory the allocator may keep resident (glibc raises its
+# mmap threshold after large frees, and each encoder thread has its own heap
+# arena), budgeted on top of the strip in flight
+ALLOCATOR_SLACK_STRIPS = 2
+TONEMAP_BYTES_PER_PIXEL = 64
+
+EXPORT_FORMATS = ("tiff_16bit", "png_16bit", "exr_half", "web_preview", "comparison")
+DEFAULT_FORMATS = ("tiff_16bit", "png_16bit", "web_preview", "comparison")  # EXR is opt-in
+
+# EXR codecs: ZIP/ZIPS/uncompressed are written by ExrStripWriter (streamable,
+# no dependencies); PIZ and DWA need an OpenCV build with OpenEXR
+EXR_NATIVE_CODECS = tuple(ExrStripWriter.COMPRESSION)
+EXR_CV2_CODECS = {
+    "piz": cv2.IMWRITE_EXR_COMPRESSION_PIZ,
+    "dwaa": cv2.IMWRITE_EXR_COMPRESSION_DWAA,
+    "dwab": cv2.IMWRITE_EXR_COMPRESSION_DWAB
+}
+
+# Quality/speed profiles per output; "balanced" matches the historical defaults
+EXPORT_PROFILES = {
+    "tiff_16bit": {
+        "fast": {"deflate": None, "predictor": False},
+        "balanced": {"deflate": None, "predictor": False},
+        "small": {"deflate": 6, "predictor": True}
+    },
+    "png_16bit": {
+        "fast": {"compress_level": 1},
+        "balanced": {"compress_level": 6},
+        "small": {"compress_level": 9}
+    },
+    # Half-float, linear light; profiles can also name the codec directly
+    "exr_half": {
+        "fast": {"compression": "zips", "zip_level": 1},
+        "balanced": {"compression": "zip", "zip_level": 4},
+        "small": {"compression": "zip", "zip_level": 6},
+        "none": {"compression": "none"},
+        "zip": {"compression": "zip", "zip_level": 4},
+        "piz": {"compression": "piz"},
+        "dwaa": {"compression": "dwaa", "dwa_level": 45},
+        "dwab": {"compression": "dwab", "dwa_level": 45}
+    },
+    "web_preview": {
+        "fast": {"quality": 85},
+        "balanced": {"quality": 95},
+        "small": {"quality": 75}
+    },
+    "comparison": {
+        "fast": {"quality": 85},
+        "balanced": {"quality": 95},
+        "small": {"quality": 75}
+    }
+}
+
+def srgb_to_linear(img: np.ndarray) -> np.ndarray:
+    """sRGB-encoded float -> linear light (the curve extends past 1.0, below 0 it stays linear)"""
+    out = np.maximum(img, 0.04045)
+    out += 0.055
+    out *= 1 / 1.055
+    cv2.pow(out, 2.4, dst=out)
+    np.copyto(out, img * (1 / 12.92), where=img <= 0.04045)
+    return out
+
+# OpenEXR file signature. Sources are never decoded as EXR: OpenCV's EXR
+# reader is only enabled by the deployment (OPENCV_IO_ENABLE_OPENEXR) for
+# PIZ/DWA masters, and downloaded images are untrusted input.
+EXR_MAGIC = b"\x76\x2f\x31\x01"
+
+def exr_cv2_available() -> bool:
+    """Whether OpenCV can write EXR here (PIZ / DWA codecs): built with OpenEXR and enabled via OPENCV_IO_ENABLE_OPENEXR"""
+    if os.environ.get("OPENCV_IO_ENABLE_OPENEXR", "").lower() not in ("1", "true", "on", "yes"):
+        return False
+    try:
+        return cv2.haveImageWriter(".exr")
+    except cv2.error:
+        return False
+
+def _process_memory_mb() -> Tuple[float, float]:
+    """
+    (current, peak) resident set size of the whole process in MB
+
+    Process-wide, not per job: concurrent grades, the web server and
+    glibc's freed-but-retained heap all count. Per-job figures are the
+    pipeline's own buffer estimates (see process_frame).
+    """
+    rss = hwm = None
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    hwm = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if hwm is None:
+        hwm = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB on Linux
+    return (rss if rss is not None else hwm), hwm
+
 class CinematicHDR:
     """
     Professional 16-bit HDR pipeline for FIBO Cinematics Studio
     Converts 8-bit FIBO outputs to 16-bit with cinematic color grading
+    
+    Frames are BGR end to end (the layout cv2 decodes, grades and encodes
+    in), so no colour-order conversions happen between download and export.
     """
     
-    def __init__(self, output_dir: str = "outputs/hdr"):
+    def __init__(
+        self,
+        output_dir: str = "outputs/hdr",
+        max_memory_mb: Optional[float] = None,
+        image_cache: Optional[ImageCache] = None,
+        encode_workers: int = 4
+    ):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
         
+        # Source images are read from the local cache when one is configured
+        self.image_cache = image_cache
+        
         # Color science constants
         self.bit_depth_16 = 65535  # 2^16 - 1
         self.bit_depth_8 = 255      # 2^8 - 1
         
+        # Baked 3D LUTs keyed by settings hash, loaded .cube files keyed by (path, mtime)
+        self.lut_cache_size = 32
+        self._lut_cache: "OrderedDict[str, LUT3D]" = OrderedDict()
+        self._cube_cache: Dict[Tuple[str, float], LUT3D] = {}
+        
+        # Frames whose whole-frame working set would exceed this are graded in strips
+        self.max_memory_mb = max_memory_mb
+        self.preview_max_width = 1920
+        
+        # Decoded regrade sources (full + preview-size) by source key, bounded by bytes
+        self.source_cache_bytes = 1024 * 1024**2
+        self._source_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._source_bytes = 0
+        
+        # Regrade outputs memoized per (source, settings) hash
+        self._grade_results: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self.grade_results_size = 256
+        self._cache_lock = threading.Lock()
+        
+        # Per-job stats (memory estimate, strip layout, timing), most recent last
+        self.job_stats: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.job_stats_size = 256
+        self._stats_lock = threading.Lock()
+        
+        # Encoders (cv2 / zlib) release the GIL, so formats are written concurrently
+        self._encode_pool = ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix="hdr-encode")
+        
         print(f"🎨 Cinematic HDR Pipeline initialized")
         print(f"   Output: {output_dir}")
+        if max_memory_mb:
+            print(f"   Memory ceiling: {max_memory_mb:.0f} MB per job")
     
     def download_image(self, url: str) -> np.ndarray:
-        """Download image from URL"""
-        print(f"📥 Downloading image...")
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        img = Image.open(BytesIO(response.content))
-        img_array = np.array(img)
+        """Download image from URL (8-bit BGR); served from the image cache when set"""
+        if self.image_cache is not None:
+            print(f"📥 Loading image (local cache)...")
+            data = self.image_cache.read(url)
+        else:
+            print(f"📥 Downloading image...")
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+            data = response.content
         
-        # Handle RGBA
-        if len(img_array.shape) == 3 and img_array.shape[2] == 4:
-            img_array = img_array[:, :, :3]
+        img_array = self.decode_image(data)
         
         print(f"✅ Downloaded: {img_array.shape}")
         return img_array
     
+    def load_image(self, path: str) -> np.ndarray:
+        """Decode a local image file (8-bit BGR)"""
+        with open(path, "rb") as f:
+            return self.decode_image(f.read())
+    
+    def decode_image(self, data: bytes) -> np.ndarray:
+        """Decode straight from the encoded buffer into 8-bit BGR (alpha/gray -> 3 channels)"""
+        if data[:4] == EXR_MAGIC:
+            raise ValueError("EXR images are not accepted as sources")
+        img_array = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img_array is None:
+            # Formats OpenCV can't read (e.g. GIF): PIL, then the one RGB -> BGR swap
+            img_array = cv2.cvtColor(np.array(Image.open(BytesIO(data)).convert("RGB")), cv2.COLOR_RGB2BGR)
+        return img_array
+    
     def convert_to_16bit(self, img_8bit: np.ndarray) -> np.ndarray:
         """Convert 8-bit to 16-bit color space"""
         print(f"🔄 Converting to 16-bit...")
         
-        # Scale to 16-bit range
-        img_16bit = (img_8bit.astype(np.uint16) * 257)  # 257 = 65535/255
+        # Scale to 16-bit range (in place - one full-frame allocation)
+        img_16bit = img_8bit.astype(np.uint16)
+        img_16bit *= 257  # 257 = 65535/255
         
         print(f"✅ 16-bit conversion complete")
         return img_16bit
@@ -58,7 +235,8 @@ class CinematicHDR:
         exposure: float = 0.0,
         contrast: float = 1.0,
         saturation: float = 1.0,
-        temperature: float = 0.0
+        temperature: float = 0.0,
+        inplace: bool = False
     ) -> np.ndarray:
         """
         Apply professional color grading
@@ -70,11 +248,125 @@ class CinematicHDR:
         - dramatic: High contrast
         - vintage: Desaturated, warm
         - noir: High contrast B&W tint
+        
+        Exposure, contrast, saturation and temperature are all affine, so the
+        whole grade is folded into ONE 3x4 matrix and applied in a single
+        cv2.transform pass (saturating to the 16-bit range = the old clip).
+        With inplace=True the input buffer is reused for the output.
+        
+        8-bit input takes a lookup-table fast path straight to 16-bit output,
+        so callers can skip convert_to_16bit entirely.
         """
         
         print(f"🎨 Applying '{preset}' grade...")
         
-        # Apply preset adjustments
+        exposure, contrast, saturation, temperature = self._resolve_grade(
+            preset, exposure, contrast, saturation, temperature
+        )
+        
+        if img_16bit.dtype == np.uint8:
+            img_graded = self._grade_8bit(img_16bit, exposure, contrast, saturation, temperature)
+            print(f"✅ Grading complete (8-bit LUT path)")
+            return img_graded
+        
+        matrix = self._grade_matrix(exposure, contrast, saturation, temperature)
+        
+        # Fold the [0,1] normalisation into the offsets: operate on raw 16-bit values
+        matrix[:, 3] *= self.bit_depth_16
+        
+        img_graded = cv2.transform(img_16bit, matrix, dst=img_16bit if inplace else None)
+        
+        print(f"✅ Grading complete")
+        return img_graded
+    
+    def _grade_8bit(
+        self,
+        img_8bit: np.ndarray,
+        exposure: float,
+        contrast: float,
+        saturation: float,
+        temperature: float
+    ) -> np.ndarray:
+        """
+        8-bit in -> 16-bit out via 256-entry lookup tables
+        
+        Exposure, contrast and temperature are per-channel point operations, so
+        with saturation == 1 the whole grade is one per-channel LUT lookup.
+        Saturation mixes channels: then a plain 8->16-bit LUT lookup replaces
+        convert_to_16bit and one in-place 3x4 cv2.transform pass finishes.
+        """
+        matrix = self._grade_matrix(exposure, contrast, saturation, temperature)
+        matrix[:, 3] *= self.bit_depth_16
+        levels = np.arange(256, dtype=np.float64) * 257  # 8-bit code -> 16-bit value
+        
+        if saturation == 1.0:
+            # Diagonal matrix: out_c = gain * v + offset_c
+            lut = np.clip(np.rint(np.outer(levels, np.diag(matrix)) + matrix[:, 3]), 0, self.bit_depth_16)
+            return cv2.LUT(img_8bit, lut.astype(np.uint16).reshape(1, 256, 3))
+        
+        img_16bit = cv2.LUT(img_8bit, levels.astype(np.uint16))
+        return cv2.transform(img_16bit, matrix, dst=img_16bit)
+    
+    def _grade_float(
+        self,
+        img_8bit: np.ndarray,
+        exposure: float,
+        contrast: float,
+        saturation: float,
+        temperature: float
+    ) -> np.ndarray:
+        """
+        8-bit in -> unclipped linear-light float32 out (the EXR working buffer)
+        
+        Same grade as _grade_8bit, but nothing is clipped or quantized to
+        16-bit, so pushed exposure keeps its highlights above 1.0. With
+        saturation == 1 the grade and the sRGB decode fold into one float
+        LUT; otherwise the 3x4 matrix runs on float and the decode follows.
+        """
+        matrix = self._grade_matrix(exposure, contrast, saturation, temperature)
+        levels = np.arange(256, dtype=np.float64) / self.bit_depth_8
+        
+        if saturation == 1.0:
+            lut = np.outer(levels, np.diag(matrix)) + matrix[:, 3]
+            lut = srgb_to_linear(lut.astype(np.float32))
+            return cv2.LUT(img_8bit, lut.reshape(1, 256, 3))
+        
+        img_float = cv2.LUT(img_8bit, levels.astype(np.float32))
+        img_float = cv2.transform(img_float, matrix.astype(np.float32), dst=img_float)
+        return srgb_to_linear(img_float)
+    
+    def grade_linear(
+        self,
+        img_8bit: np.ndarray,
+        preset: str = "neutral",
+        exposure: float = 0.0,
+        contrast: float = 1.0,
+        saturation: float = 1.0,
+        temperature: float = 0.0,
+        lut_file: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Linear-light float32 grade for an EXR master, never via 16-bit
+        
+        Without a LUT this is _grade_float (unclipped). With one, the baked
+        LUT is sampled straight to float, so the only clipping is the
+        colourist LUT's own [0,1] input domain.
+        """
+        if lut_file:
+            lut = self.get_grade_lut(preset, exposure, contrast, saturation, temperature, lut_file=lut_file)
+            graded = lut.apply(img_8bit, out=np.empty(img_8bit.shape, dtype=np.float32), channel_order="BGR")
+            return srgb_to_linear(graded)
+        return self._grade_float(img_8bit, *self._resolve_grade(preset, exposure, contrast, saturation, temperature))
+    
+    def _resolve_grade(
+        self,
+        preset: str,
+        exposure: float,
+        contrast: float,
+        saturation: float,
+        temperature: float
+    ) -> Tuple[float, float, float, float]:
+        """Apply preset adjustments on top of the slider values"""
         if preset == "warm":
             exposure += 0.1
             temperature += 0.15
@@ -94,131 +386,379 @@ class CinematicHDR:
             saturation *= 0.3
             contrast *= 1.4
         
-        # Convert to float [0, 1]
-        img_float = img_16bit.astype(np.float32) / self.bit_depth_16
+        return exposure, contrast, saturation, temperature
+    
+    def grade_matrix(
+        self,
+        preset: str = "neutral",
+        exposure: float = 0.0,
+        contrast: float = 1.0,
+        saturation: float = 1.0,
+        temperature: float = 0.0
+    ) -> np.ndarray:
+        """Preset + sliders as one 3x4 float32 BGR matrix on [0,1] pixels"""
+        return self._grade_matrix(
+            *self._resolve_grade(preset, exposure, contrast, saturation, temperature)
+        ).astype(np.float32)
+    
+    def _grade_matrix(
+        self,
+        exposure: float,
+        contrast: float,
+        saturation: float,
+        temperature: float,
+        channel_order: str = "BGR"
+    ) -> np.ndarray:
+        """
+        3x4 affine grade on [0,1] pixels:  out = A @ px + b  (BGR unless channel_order="RGB")
         
-        # 1. Exposure (in stops)
-        if exposure != 0:
-            img_float = img_float * (2 ** exposure)
+        1. Exposure (stops):  x * 2^exposure
+        2. Contrast:          (x - 0.5) * contrast + 0.5
+        3. Saturation:        gray + saturation * (x - gray)   (Rec.601 luma)
+        4. Temperature:       red += 0.1 * t, blue -= 0.1 * t
         
-        # 2. Contrast
-        if contrast != 1.0:
-            img_float = (img_float - 0.5) * contrast + 0.5
+        Saturation maps gray to gray, so the contrast offset passes through it unchanged.
+        """
+        red, blue = (2, 0) if channel_order == "BGR" else (0, 2)
         
-        # 3. Saturation
-        if saturation != 1.0:
-            gray = 0.299 * img_float[:,:,0] + 0.587 * img_float[:,:,1] + 0.114 * img_float[:,:,2]
-            gray = gray[:,:,np.newaxis]
-            img_float = gray + saturation * (img_float - gray)
+        luma = np.empty(3, dtype=np.float64)
+        luma[[red, 1, blue]] = [0.299, 0.587, 0.114]
+        sat = saturation * np.eye(3) + (1.0 - saturation) * np.tile(luma, (3, 1))
         
-        # 4. Color temperature
-        if temperature != 0:
-            img_float[:,:,0] = img_float[:,:,0] + (temperature * 0.1)  # Red
-            img_float[:,:,2] = img_float[:,:,2] - (temperature * 0.1)  # Blue
+        gain = contrast * (2.0 ** exposure)
+        offset = np.full(3, 0.5 - 0.5 * contrast)
+        offset[red] += temperature * 0.1
+        offset[blue] -= temperature * 0.1
         
-        # Clip to valid range
-        img_float = np.clip(img_float, 0.0, 1.0)
+        matrix = np.empty((3, 4), dtype=np.float64)
+        matrix[:, :3] = gain * sat
+        matrix[:, 3] = offset
+        return matrix
+    
+    def load_cube(self, path: str) -> LUT3D:
+        """Load a colourist's .cube LUT (cached until the file changes)"""
+        key = (os.path.abspath(path), os.path.getmtime(path))
+        if key not in self._cube_cache:
+            self._cube_cache[key] = LUT3D.from_cube(path)
+            print(f"🎞️ Loaded LUT: {os.path.basename(path)} ({self._cube_cache[key].size}³)")
+        return self._cube_cache[key]
+    
+    def get_grade_lut(
+        self,
+        preset: str = "neutral",
+        exposure: float = 0.0,
+        contrast: float = 1.0,
+        saturation: float = 1.0,
+        temperature: float = 0.0,
+        lut_file: Optional[str] = None,
+        size: int = 33
+    ) -> LUT3D:
+        """
+        Bake preset + sliders (+ optional .cube applied after them) into one 3D LUT
         
-        # Convert back to 16-bit
-        img_graded = (img_float * self.bit_depth_16).astype(np.uint16)
+        Baked tables are cached by a hash of the settings, so repeat grades
+        with the same combination cost a single LUT application.
+        """
+        settings = [preset, exposure, contrast, saturation, temperature, size]
+        if lut_file:
+            settings += [os.path.abspath(lut_file), os.path.getmtime(lut_file)]
+        key = hashlib.sha1(json.dumps(settings).encode()).hexdigest()
         
-        print(f"✅ Grading complete")
-        return img_graded
+        if key in self._lut_cache:
+            self._lut_cache.move_to_end(key)
+            return self._lut_cache[key]
+        
+        # LUT lattices are RGB (the .cube convention)
+        matrix = self._grade_matrix(
+            *self._resolve_grade(preset, exposure, contrast, saturation, temperature), channel_order="RGB"
+        )
+        custom = self.load_cube(lut_file) if lut_file else None
+        
+        def transform(rgb: np.ndarray) -> np.ndarray:
+            graded = np.clip(rgb @ matrix[:, :3].T + matrix[:, 3], 0.0, 1.0).astype(np.float32)
+            if custom is not None:
+                graded = custom.apply(graded.reshape(-1, 1, 3)).reshape(-1, 3)
+            return graded
+        
+        title = f"FIBO {preset}" + (f" + {os.path.basename(lut_file)}" if lut_file else "")
+        lut = LUT3D.bake(transform, size=size, title=title)
+        
+        self._lut_cache[key] = lut
+        if len(self._lut_cache) > self.lut_cache_size:
+            self._lut_cache.popitem(last=False)
+        return lut
+    
+    def apply_lut(self, img: np.ndarray, lut: LUT3D) -> np.ndarray:
+        """Grade an 8/16-bit BGR image through a 3D LUT -> 16-bit BGR"""
+        print(f"🎞️ Applying 3D LUT '{lut.title}' ({lut.size}³)...")
+        graded = lut.apply(img, channel_order="BGR")
+        print(f"✅ LUT grading complete")
+        return graded
+    
+    def export_cube(
+        self,
+        path: str,
+        preset: str = "neutral",
+        exposure: float = 0.0,
+        contrast: float = 1.0,
+        saturation: float = 1.0,
+        temperature: float = 0.0,
+        size: int = 33
+    ) -> str:
+        """Write a grade as a .cube file for Resolve and other finishing tools"""
+        self.get_grade_lut(preset, exposure, contrast, saturation, temperature, size=size).to_cube(path)
+        return path
+    
+    def export_options(
+        self,
+        formats: Optional[List[str]] = None,
+        profile: Union[str, Dict[str, str]] = "balanced"
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolve requested formats + profile into per-format encoder options
+        
+        profile is one name for every format ("fast", "balanced", "small")
+        or a {format: profile} dict; formats not named use "balanced".
+        Raises ValueError for unknown formats or profiles.
+        """
+        formats = list(formats) if formats else list(DEFAULT_FORMATS)
+        unknown = [f for f in formats if f not in EXPORT_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown export format(s): {', '.join(unknown)} (choose from {', '.join(EXPORT_FORMATS)})")
+        
+        options = {}
+        for fmt in formats:
+            name = profile if isinstance(profile, str) else profile.get(fmt, "balanced")
+            if name not in EXPORT_PROFILES[fmt]:
+                raise ValueError(f"Unknown profile '{name}' for {fmt} (choose from {', '.join(EXPORT_PROFILES[fmt])})")
+            options[fmt] = {"profile": name, **EXPORT_PROFILES[fmt][name]}
+        
+        if "exr_half" in options and options["exr_half"]["compression"] in EXR_CV2_CODECS and not exr_cv2_available():
+            raise ValueError(f"EXR {options['exr_half']['compression'].upper()} needs OpenCV built with OpenEXR "
+                             f"and OPENCV_IO_ENABLE_OPENEXR=1 (available here: {', '.join(EXR_NATIVE_CODECS)})")
+        return options
     
     def export_formats(
         self,
         img_16bit: np.ndarray,
-        base_filename: str
+        base_filename: str,
+        formats: Optional[List[str]] = None,
+        profile: Union[str, Dict[str, str]] = "balanced",
+        original_8bit: Optional[np.ndarray] = None,
+        timings: Optional[Dict[str, float]] = None,
+        preview: Optional[np.ndarray] = None,
+        img_float: Optional[np.ndarray] = None
     ) -> Dict[str, str]:
         """
         Export in multiple professional formats
         
+        Only the requested formats are written (default: DEFAULT_FORMATS),
+        each with the options of its profile, and the encoders run
+        concurrently. The tone-mapped preview is computed once, at preview
+        resolution, and shared by the preview JPEG and the comparison (which
+        is only produced when original_8bit is given).
+        
+        Args:
+            timings: Optional dict filled with per-format encode seconds
+            preview: Already tone-mapped 8-bit preview, if the caller has one
+            img_float: Linear float grade for the EXR master (grade_linear);
+                without it the EXR is decoded from img_16bit (clipped to [0,1])
+        
         Returns:
             Dict with paths to each format
         """
         
-        paths = {}
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # 1. 16-bit TIFF (DaVinci Resolve, Nuke)
-        tiff_path = os.path.join(self.output_dir, f"{base_filename}_{timestamp}_16bit.tiff")
-        print(f"💾 Exporting TIFF...")
-        
-        # Convert RGB to BGR for OpenCV
-        img_bgr = cv2.cvtColor(img_16bit, cv2.COLOR_RGB2BGR)
-        cv2.imwrite(tiff_path, img_bgr)
-        paths['tiff_16bit'] = tiff_path
-        
-        file_size = os.path.getsize(tiff_path) / (1024 * 1024)
-        print(f"✅ TIFF: {file_size:.2f} MB")
+        options = self.export_options(formats, profile)
+        if original_8bit is None:
+            options.pop('comparison', None)
         
-        # 2. 16-bit PNG (universal)
-        png_path = os.path.join(self.output_dir, f"{base_filename}_{timestamp}_16bit.png")
-        print(f"💾 Exporting PNG...")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffixes = {
+            'tiff_16bit': "16bit.tiff",
+            'png_16bit': "16bit.png",
+            'exr_half': "half.exr",
+            'web_preview': "preview.jpg",
+            'comparison': "comparison.jpg"
+        }
+        paths = {fmt: os.path.join(self.output_dir, f"{base_filename}_{timestamp}_{suffixes[fmt]}") for fmt in options}
         
-        # PIL for 16-bit PNG
-        img_pil = Image.fromarray(img_16bit, mode='RGB')
-        img_pil.save(png_path, format='PNG', compress_level=6)
-        paths['png_16bit'] = png_path
+        encoders = {
+            'tiff_16bit': lambda path, opts: self._encode_tiff(img_16bit, path, opts),
+            'png_16bit': lambda path, opts: self._encode_png(img_16bit, path, opts),
+            'exr_half': lambda path, opts: self._encode_exr(
+                img_float if img_float is not None else srgb_to_linear(img_16bit.astype(np.float32) / self.bit_depth_16),
+                path, opts
+            ),
+            'web_preview': lambda path, opts: cv2.imwrite(path, preview, [cv2.IMWRITE_JPEG_QUALITY, opts["quality"]]),
+            'comparison': lambda path, opts: self.create_comparison(
+                original_8bit, img_16bit, path, quality=opts["quality"], preview=preview
+            )
+        }
         
-        file_size = os.path.getsize(png_path) / (1024 * 1024)
-        print(f"✅ PNG: {file_size:.2f} MB")
+        summary = ", ".join(f"{fmt} ({opts['profile']})" for fmt, opts in options.items())
+        print(f"💾 Exporting {summary}...")
         
-        # 3. 8-bit web preview (tone mapped)
-        preview_path = os.path.join(self.output_dir, f"{base_filename}_{timestamp}_preview.jpg")
-        print(f"🌐 Creating web preview...")
+        def timed(fmt):
+            start = time.perf_counter()
+            encoders[fmt](paths[fmt], options[fmt])
+            return time.perf_counter() - start
         
-        web_preview = self._create_web_preview(img_16bit)
-        cv2.imwrite(preview_path, cv2.cvtColor(web_preview, cv2.COLOR_RGB2BGR), 
-                    [cv2.IMWRITE_JPEG_QUALITY, 95])
-        paths['web_preview'] = preview_path
+        # 16-bit masters start encoding while the preview is tone-mapped here
+        futures = {fmt: self._encode_pool.submit(timed, fmt) for fmt in options if fmt in ('tiff_16bit', 'png_16bit', 'exr_half')}
+        if preview is None and ('web_preview' in options or 'comparison' in options):
+            start = time.perf_counter()
+            preview = self._create_web_preview(img_16bit, max_width=self.preview_max_width)
+            if timings is not None:
+                timings['tonemap'] = round(time.perf_counter() - start, 3)
+        futures.update({fmt: self._encode_pool.submit(timed, fmt) for fmt in options if fmt not in futures})
         
-        file_size = os.path.getsize(preview_path) / 1024
-        print(f"✅ Preview: {file_size:.2f} KB")
+        for fmt, future in futures.items():
+            seconds = future.result()
+            if timings is not None:
+                timings[fmt] = round(seconds, 3)
+            size_mb = os.path.getsize(paths[fmt]) / (1024 * 1024)
+            print(f"✅ {fmt}: {size_mb:.2f} MB in {seconds * 1000:.0f} ms")
         
         return paths
     
-    def _create_web_preview(self, img_16bit: np.ndarray) -> np.ndarray:
-        """Create 8-bit web preview with tone mapping"""
-        
-        # Convert to float
-        img_float = img_16bit.astype(np.float32) / self.bit_depth_16
+    def _encode_tiff(self, img_16bit: np.ndarray, path: str, opts: Dict[str, Any]):
+        """16-bit TIFF (DaVinci Resolve, Nuke)"""
+        params = []
+        if opts["deflate"] is not None:
+            params = [cv2.IMWRITE_TIFF_COMPRESSION, cv2.IMWRITE_TIFF_COMPRESSION_ADOBE_DEFLATE]
+            if opts["predictor"]:
+                params += [cv2.IMWRITE_TIFF_PREDICTOR, cv2.IMWRITE_TIFF_PREDICTOR_HORIZONTAL]
         
-        # Apply Reinhard tone mapping
-        img_bgr = cv2.cvtColor(img_float, cv2.COLOR_RGB2BGR)
-        tonemap = cv2.createTonemapReinhard(gamma=2.2, intensity=0, light_adapt=0.8, color_adapt=0)
-        ldr = tonemap.process(img_bgr)
-        
-        # Back to RGB
-        ldr_rgb = cv2.cvtColor(ldr, cv2.COLOR_BGR2RGB)
+        cv2.imwrite(path, img_16bit, params)
+    
+    def _encode_png(self, img_16bit: np.ndarray, path: str, opts: Dict[str, Any]):
+        """16-bit PNG (universal)"""
+        cv2.imwrite(path, img_16bit, [cv2.IMWRITE_PNG_COMPRESSION, opts["compress_level"]])
+    
+    def _encode_exr(self, img_float: np.ndarray, path: str, opts: Dict[str, Any]):
+        """Half-float OpenEXR, linear light (Nuke, Resolve, finishing)"""
+        codec = opts["compression"]
+        if codec in EXR_NATIVE_CODECS:
+            h, w = img_float.shape[:2]
+            writer = ExrStripWriter(path, w, h, compression=codec, zip_level=opts.get("zip_level", 4), channel_order="BGR")
+            writer.write_strip(img_float)
+            writer.close()
+            return
         
-        # Convert to 8-bit
-        img_8bit = (np.clip(ldr_rgb, 0, 1) * 255).astype(np.uint8)
+        params = [cv2.IMWRITE_EXR_TYPE, cv2.IMWRITE_EXR_TYPE_HALF, cv2.IMWRITE_EXR_COMPRESSION, EXR_CV2_CODECS[codec]]
+        if "dwa_level" in opts:
+            params += [cv2.IMWRITE_EXR_DWA_COMPRESSION_LEVEL, opts["dwa_level"]]
+        if not cv2.imwrite(path, img_float, params):
+            raise ValueError(f"OpenCV could not write EXR ({codec})")
+    
+    def _create_web_preview(self, img_16bit: np.ndarray, max_width: Optional[int] = None) -> np.ndarray:
+        """Create 8-bit web preview with tone mapping (BGR in, BGR out)"""
         
-        return img_8bit
+        # Downscale first so the tone map runs at preview size
+        h, w = img_16bit.shape[:2]
+        if max_width and w > max_width:
+            size = (max_width, max(1, round(h * max_width / w)))
+            img_16bit = cv2.resize(img_16bit, size, interpolation=cv2.INTER_AREA)
+
+        return self.tonemap(img_16bit)
+
+    def tonemap(self, img: np.ndarray, out: Optional[np.ndarray] = None, chunk_rows: int = TONEMAP_CHUNK_ROWS) -> np.ndarray:
+        """
+        Reinhard tone map of a BGR image (uint16, or float in [0,1]) -> 8-bit BGR
+
+        Same operator and parameters as cv2.createTonemapReinhard(gamma=2.2,
+        intensity=0, light_adapt=0.8, color_adapt=0), but its global
+        statistics (log-luminance range and mean, then the mapped range) are
+        gathered in passes over chunk_rows-row chunks, so the float working
+        set is a few chunks rather than several whole-frame copies.
+        Output matches OpenCV's to within 1 LSB.
+        """
+        h, w = img.shape[:2]
+        scale = 1.0 / self.bit_depth_16 if img.dtype == np.uint16 else 1.0
+        if out is None:
+            out = np.empty((h, w, 3), dtype=np.uint8)
+
+        def chunks():
+            for y in range(0, h, chunk_rows):
+                chunk = img[y:y + chunk_rows].astype(np.float32)
+                if scale != 1.0:
+                    chunk *= scale
+                # OpenCV's operator takes luminance with RGB2GRAY weights on the BGR buffer
+                yield y, chunk, cv2.cvtColor(chunk, cv2.COLOR_RGB2GRAY)
+
+        # Pass 1: log-luminance range and mean -> the map key, and the mean luminance
+        log_sum = gray_sum = 0.0
+        log_min, log_max = math.inf, -math.inf
+        for _, _, gray in chunks():
+            gray_sum += float(gray.sum(dtype=np.float64))
+            log_gray = cv2.log(np.maximum(gray, 1e-4))
+            log_sum += float(log_gray.sum(dtype=np.float64))
+            log_min = min(log_min, float(log_gray.min()))
+            log_max = max(log_max, float(log_gray.max()))
+        n = h * w
+        key = (log_max - log_sum / n) / (log_max - log_min) if log_max > log_min else 0.0
+        map_key = 0.3 + 0.7 * key ** 1.4
+        gray_mean = gray_sum / n
+
+        def mapped(chunk, gray):
+            adapt = gray * 0.8
+            adapt += 0.2 * gray_mean
+            cv2.pow(adapt, map_key, dst=adapt)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return chunk / (adapt[..., None] + chunk)  # pure black -> NaN, as in OpenCV
+
+        # Pass 2: range of the mapped values (normalised to [0,1] before gamma)
+        lo, hi = math.inf, -math.inf
+        for _, chunk, gray in chunks():
+            values = mapped(chunk, gray)
+            if not np.isnan(values).all():
+                lo = min(lo, float(np.nanmin(values)))
+                hi = max(hi, float(np.nanmax(values)))
+        span = hi - lo if hi - lo > 1e-12 else 1.0
+
+        # Pass 3: normalise, gamma 2.2, 8-bit
+        for y, chunk, gray in chunks():
+            values = mapped(chunk, gray)
+            values -= lo
+            values *= 1.0 / span
+            np.nan_to_num(values, copy=False)
+            np.clip(values, 0, 1, out=values)
+            cv2.pow(values, 1 / 2.2, dst=values)
+            values *= 255
+            out[y:y + chunk_rows] = values  # truncates, like the old astype(np.uint8)
+
+        return out
     
     def create_comparison(
         self,
         original_8bit: np.ndarray,
         graded_16bit: np.ndarray,
-        output_path: str
+        output_path: str,
+        quality: int = 95,
+        preview: Optional[np.ndarray] = None
     ):
-        """Create side-by-side before/after comparison"""
+        """
+        Create side-by-side before/after comparison
+        
+        Composed at preview resolution: pass the already tone-mapped preview
+        to skip a second tone map. Both halves are slice-assigned into one
+        preallocated canvas (10px black separator between them).
+        """
         
         print(f"📊 Creating comparison...")
         
         # Convert graded to 8-bit for display
-        graded_8bit = self._create_web_preview(graded_16bit)
+        if preview is None:
+            preview = self._create_web_preview(graded_16bit, max_width=self.preview_max_width)
         
-        # Ensure same size
-        h, w = original_8bit.shape[:2]
-        graded_8bit_resized = cv2.resize(graded_8bit, (w, h))
+        h, w = preview.shape[:2]
+        comparison = np.zeros((h, 2 * w + 10, 3), dtype=np.uint8)
         
-        # Add 10px black separator
-        separator = np.zeros((h, 10, 3), dtype=np.uint8)
-        
-        # Create side-by-side
-        comparison = np.hstack([original_8bit, separator, graded_8bit_resized])
+        if original_8bit.shape[:2] == (h, w):
+            comparison[:, :w] = original_8bit
+        else:
+            comparison[:, :w] = cv2.resize(original_8bit, (w, h), interpolation=cv2.INTER_AREA)
+        comparison[:, w + 10:] = preview
         
         # Add labels
         font = cv2.FONT_HERSHEY_SIMPLEX
@@ -238,8 +778,7 @@ class CinematicHDR:
                     (w + 40, 60), font, font_scale, (0, 0, 0), thickness - 1)
         
         # Save
-        cv2.imwrite(output_path, cv2.cvtColor(comparison, cv2.COLOR_RGB2BGR), 
-                    [cv2.IMWRITE_JPEG_QUALITY, 95])
+        cv2.imwrite(output_path, comparison, [cv2.IMWRITE_JPEG_QUALITY, quality])
         
         print(f"✅ Comparison saved: {output_path}")
     
@@ -251,55 +790,446 @@ class CinematicHDR:
         exposure: float = 0.0,
         contrast: float = 1.0,
         saturation: float = 1.0,
-        temperature: float = 0.0
+        temperature: float = 0.0,
+        lut_file: Optional[str] = None,
+        max_memory_mb: Optional[float] = None,
+        formats: Optional[List[str]] = None,
+        profile: Union[str, Dict[str, str]] = "balanced",
+        image_path: Optional[str] = None
     ) -> Dict[str, str]:
         """
         Complete HDR pipeline for a shot
         
+        Args:
+            image_path: Local copy of the source (Shot.image_local_path);
+                image_url is only fetched when it's missing
+            lut_file: Optional .cube LUT applied after the preset/sliders;
+                both are baked into one cached 3D LUT and applied in one pass
+            max_memory_mb: Working-memory ceiling for this job (defaults to the
+                pipeline's); larger frames go through process_shot_tiled
+            formats: Outputs to write (default: DEFAULT_FORMATS; add exr_half for EXR)
+            profile: Encoder profile name, or {format: profile}
+        
         Returns:
-            Dict with all output paths
+            Dict with all output paths (timing and memory figures go to job_stats)
         """
         
         print(f"\n{'='*70}")
         print(f"🎬 HDR PIPELINE: Processing shot {shot_id}")
         print(f"{'='*70}\n")
         
-        # Download
-        original_8bit = self.download_image(image_url)
+        self.export_options(formats, profile)  # fail fast on bad formats/profiles
         
-        # Convert to 16-bit
-        img_16bit = self.convert_to_16bit(original_8bit)
+        # Local source if we have it, else download
+        if image_path and os.path.exists(image_path):
+            original_8bit = self.load_image(image_path)
+        else:
+            original_8bit = self.download_image(image_url)
         
-        # Apply grading
-        graded_16bit = self.apply_cinematic_grade(
-            img_16bit,
-            preset=preset,
-            exposure=exposure,
-            contrast=contrast,
-            saturation=saturation,
-            temperature=temperature
+        return self.process_frame(
+            original_8bit, shot_id, preset, exposure, contrast, saturation, temperature,
+            lut_file=lut_file, max_memory_mb=max_memory_mb, formats=formats, profile=profile
         )
+    
+    def process_frame(
+        self,
+        original_8bit: np.ndarray,
+        shot_id: str,
+        preset: str = "neutral",
+        exposure: float = 0.0,
+        contrast: float = 1.0,
+        saturation: float = 1.0,
+        temperature: float = 0.0,
+        lut_file: Optional[str] = None,
+        max_memory_mb: Optional[float] = None,
+        formats: Optional[List[str]] = None,
+        profile: Union[str, Dict[str, str]] = "balanced"
+    ) -> Dict[str, str]:
+        """
+        Grade + export an already decoded 8-bit BGR frame (see process_shot)
         
-        # Export formats
-        paths = self.export_formats(graded_16bit, shot_id)
+        job_stats gets this job's estimated peak working set (source plus the
+        pipeline's buffers, the figure the ceiling is enforced on) and, for
+        reference, the process-wide RSS, which concurrent jobs share.
+        """
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
         
-        # Create comparison
-        comparison_path = os.path.join(
-            self.output_dir, 
-            f"{shot_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_comparison.jpg"
-        )
-        self.create_comparison(original_8bit, graded_16bit, comparison_path)
-        paths['comparison'] = comparison_path
+        options = self.export_options(formats, profile)
+        bytes_per_pixel = UNTILED_BYTES_PER_PIXEL + (EXR_BYTES_PER_PIXEL if 'exr_half' in options else 0)
+        
+        ceiling = max_memory_mb or self.max_memory_mb
+        h, w = original_8bit.shape[:2]
+        if ceiling and h * w * bytes_per_pixel > ceiling * 2**20:
+            paths, strip_rows, memory_floor_mb, estimated_peak_mb = self.process_shot_tiled(
+                original_8bit, shot_id, preset, exposure, contrast, saturation, temperature,
+                lut_file=lut_file, max_memory_mb=ceiling,
+                formats=formats, profile=profile, timings=timings
+            )
+        else:
+            strip_rows = memory_floor_mb = None
+            estimated_peak_mb = round((original_8bit.nbytes + h * w * bytes_per_pixel) / 2**20, 1)
+            graded_float = None
+            
+            if 'exr_half' in options:
+                # Linear float grade for the EXR master (no 16-bit requantization)
+                graded_float = self.grade_linear(
+                    original_8bit, preset, exposure, contrast, saturation, temperature, lut_file=lut_file
+                )
+            
+            if lut_file:
+                # Preset + sliders + colourist LUT -> one baked 3D LUT
+                lut = self.get_grade_lut(preset, exposure, contrast, saturation, temperature, lut_file=lut_file)
+                graded_16bit = self.apply_lut(original_8bit, lut)
+            else:
+                # Grade 8-bit -> 16-bit directly (LUT fast path, no separate upcast)
+                graded_16bit = self.apply_cinematic_grade(
+                    original_8bit,
+                    preset=preset,
+                    exposure=exposure,
+                    contrast=contrast,
+                    saturation=saturation,
+                    temperature=temperature
+                )
+            
+            # Export formats + comparison (concurrent encoders)
+            paths = self.export_formats(
+                graded_16bit, shot_id, formats=formats, profile=profile,
+                original_8bit=original_8bit, timings=timings, img_float=graded_float
+            )
+            del graded_float
+        
+        process_rss, process_peak = _process_memory_mb()
+        stats = {
+            "resolution": f"{w}x{h}",
+            "tiled": strip_rows is not None,
+            "strip_rows": strip_rows,
+            "memory_ceiling_mb": ceiling,
+            "memory_floor_mb": memory_floor_mb,
+            "estimated_peak_mb": estimated_peak_mb,
+            "process_rss_mb": round(process_rss, 1),
+            "process_peak_rss_mb": round(process_peak, 1),
+            "encode_seconds": timings,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+        self.record_job_stats(shot_id, stats)
         
         print(f"\n{'='*70}")
-        print(f"✅ HDR PIPELINE COMPLETE")
+        print(f"✅ HDR PIPELINE COMPLETE ({stats['seconds']}s, ~{estimated_peak_mb} MB working set"
+              f"{f', {strip_rows}-row strips' if strip_rows else ''})")
         print(f"{'='*70}\n")
         
         for format_name, path in paths.items():
             print(f"  {format_name}: {os.path.basename(path)}")
         
         return paths
-
+    
+    def record_job_stats(self, shot_id: str, stats: Dict[str, Any]):
+        """Keep a job's stats (also used for jobs graded in batch worker processes)"""
+        with self._stats_lock:
+            self.job_stats[shot_id] = stats
+            self.job_stats.move_to_end(shot_id)
+            if len(self.job_stats) > self.job_stats_size:
+                self.job_stats.popitem(last=False)
+    
+    def process_shot_tiled(
+        self,
+        original_8bit: np.ndarray,
+        shot_id: str,
+        preset: str = "neutral",
+        exposure: float = 0.0,
+        contrast: float = 1.0,
+        saturation: float = 1.0,
+        temperature: float = 0.0,
+        lut_file: Optional[str] = None,
+        max_memory_mb: float = 512,
+        formats: Optional[List[str]] = None,
+        profile: Union[str, Dict[str, str]] = "balanced",
+        timings: Optional[Dict[str, float]] = None
+    ) -> Tuple[Dict[str, str], int, float, float]:
+        """
+        Grade and encode in row strips so the working set stays under max_memory_mb
+        
+        Only the decoded 8-bit source is held whole. Each strip is graded to
+        16-bit, appended to the TIFF and PNG writers, and block-averaged down
+        into preview-resolution buffers; the preview (same size as the untiled
+        path's) and comparison are then tone-mapped chunk by chunk from those
+        small buffers. TIFF and PNG strips encode concurrently. Strip height is
+        what's left of the ceiling after the source and the preview stage;
+        when those alone exceed it the job runs at the floor and says so.
+        EXR strips get their own unclipped float grade; PIZ/DWA need the whole
+        frame in OpenCV's encoder, so tiled jobs write those as ZIP instead.
+        
+        Returns:
+            (paths, strip_rows, memory_floor_mb, estimated_peak_mb)
+        """
+        h, w = original_8bit.shape[:2]
+        options = self.export_options(formats, profile)
+        
+        # Preview at the same size as the untiled path. Strips are block-averaged
+        # horizontally to the target width and vertically by an integer factor
+        # (strips are multiples of it); one small resize fixes up the height.
+        preview_w = min(w, self.preview_max_width)
+        preview_h = max(1, round(h * preview_w / w))
+        factor = max(1, h // preview_h)
+        small_h = math.ceil(h / factor)
+        
+        # Whole-job budget: the source, the preview-resolution buffers (16-bit
+        # graded + 8-bit original, held through the strips) and then the
+        # preview stage: fix-up resize, tone map chunks, preview, comparison
+        small_formats = [fmt for fmt in ('web_preview', 'comparison') if fmt in options]
+        small_bytes = preview_bytes = 0
+        if small_formats:
+            preview_px = preview_w * preview_h
+            small_bytes = preview_w * small_h * SMALL_BYTES_PER_PIXEL
+            preview_bytes = max(
+                small_bytes + preview_px * SMALL_BYTES_PER_PIXEL if small_h != preview_h else 0,
+                preview_px * (SMALL_BYTES_PER_PIXEL + PREVIEW_BYTES_PER_PIXEL)
+                + preview_w * TONEMAP_CHUNK_ROWS * TONEMAP_BYTES_PER_PIXEL
+            )
+        bytes_per_pixel = STRIP_BYTES_PER_PIXEL + (EXR_BYTES_PER_PIXEL if 'exr_half' in options else 0)
+        budget = max_memory_mb * 2**20 - original_8bit.nbytes - small_bytes
+        strip_rows = int(budget // (w * bytes_per_pixel * (1 + ALLOCATOR_SLACK_STRIPS))) // factor * factor
+        strip_rows = min(max(strip_rows, factor), h)
+        
+        strip_bytes = w * bytes_per_pixel * (1 + ALLOCATOR_SLACK_STRIPS)
+        floor = original_8bit.nbytes + max(small_bytes + factor * strip_bytes, preview_bytes)
+        memory_floor_mb = round(floor / 2**20, 1)
+        estimated_peak_mb = round((original_8bit.nbytes + max(small_bytes + strip_rows * strip_bytes, preview_bytes)) / 2**20, 1)
+        
+        print(f"🧱 Tiled grading: {w}x{h} in {strip_rows}-row strips (ceiling {max_memory_mb:.0f} MB)")
+        if memory_floor_mb > max_memory_mb:
+            print(f"⚠️ Source + preview need ~{memory_floor_mb:.0f} MB; ceiling {max_memory_mb:.0f} MB can't be met")
+        
+        if lut_file:
+            lut = self.get_grade_lut(preset, exposure, contrast, saturation, temperature, lut_file=lut_file)
+            grade = lambda strip: lut.apply(strip, chunk_rows=min(64, strip_rows), channel_order="BGR")
+            grade_float = lambda strip: srgb_to_linear(lut.apply(
+                strip, out=np.empty(strip.shape, dtype=np.float32),
+                chunk_rows=min(64, strip_rows), channel_order="BGR"
+            ))
+        else:
+            settings = self._resolve_grade(preset, exposure, contrast, saturation, temperature)
+            grade = lambda strip: self._grade_8bit(strip, *settings)
+            grade_float = lambda strip: self._grade_float(strip, *settings)
+        
+        timings = {} if timings is None else timings
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        paths = {}
+        writers = {}
+        
+        if 'tiff_16bit' in options:
+            paths['tiff_16bit'] = os.path.join(self.output_dir, f"{shot_id}_{timestamp}_16bit.tiff")
+            writers['tiff_16bit'] = TiffStripWriter(
+                paths['tiff_16bit'], w, h,
+                compress_level=options['tiff_16bit']["deflate"],
+                predictor=options['tiff_16bit']["predictor"],
+                channel_order="BGR"
+            )
+        if 'png_16bit' in options:
+            paths['png_16bit'] = os.path.join(self.output_dir, f"{shot_id}_{timestamp}_16bit.png")
+            writers['png_16bit'] = PngStripWriter(
+                paths['png_16bit'], w, h,
+                compress_level=options['png_16bit']["compress_level"],
+                channel_order="BGR"
+            )
+        if 'exr_half' in options:
+            codec = options['exr_half']["compression"]
+            if codec not in EXR_NATIVE_CODECS:
+                print(f"⚠️ EXR {codec.upper()} needs the whole frame; writing ZIP strips instead")
+                codec = "zip"
+            paths['exr_half'] = os.path.join(self.output_dir, f"{shot_id}_{timestamp}_half.exr")
+            writers['exr_half'] = ExrStripWriter(
+                paths['exr_half'], w, h,
+                compression=codec,
+                zip_level=options['exr_half'].get("zip_level", 4),
+                channel_order="BGR"
+            )
+        
+        def timed_write(fmt, strip, graded):
+            start = time.perf_counter()
+            writers[fmt].write_strip(grade_float(strip) if fmt == 'exr_half' else graded)
+            return time.perf_counter() - start
+        
+        for fmt in writers:
+            timings[fmt] = 0.0
+        if small_formats:
+            graded_small = np.empty((small_h, preview_w, 3), dtype=np.uint16)
+            original_small = np.empty((small_h, preview_w, 3), dtype=np.uint8) if 'comparison' in options else None
+        
+        for y in range(0, h, strip_rows):
+            strip = original_8bit[y:y + strip_rows]
+            graded = grade(strip)
+            futures = {fmt: self._encode_pool.submit(timed_write, fmt, strip, graded) for fmt in writers}
+            
+            if small_formats:
+                rows = slice(y // factor, math.ceil((y + strip.shape[0]) / factor))
+                small_size = (preview_w, rows.stop - rows.start)
+                cv2.resize(graded, small_size, dst=graded_small[rows], interpolation=cv2.INTER_AREA)
+                if original_small is not None:
+                    cv2.resize(strip, small_size, dst=original_small[rows], interpolation=cv2.INTER_AREA)
+            
+            for fmt, future in futures.items():
+                timings[fmt] += future.result()
+            del graded
+        
+        for fmt, writer in writers.items():
+            writer.close()
+            timings[fmt] = round(timings[fmt], 3)
+            print(f"✅ {fmt}: {os.path.getsize(paths[fmt]) / 2**20:.2f} MB in {timings[fmt] * 1000:.0f} ms")
+        
+        if small_formats:
+            # Written here rather than through export_formats so the 16-bit
+            # buffer is freed as soon as it's tone-mapped
+            if small_h != preview_h:
+                graded_small = cv2.resize(graded_small, (preview_w, preview_h), interpolation=cv2.INTER_AREA)
+                if original_small is not None:
+                    original_small = cv2.resize(original_small, (preview_w, preview_h), interpolation=cv2.INTER_AREA)
+            start = time.perf_counter()
+            preview = self.tonemap(graded_small)
+            timings['tonemap'] = round(time.perf_counter() - start, 3)
+            del graded_small
+            
+            encoders = {
+                'web_preview': lambda path, opts: cv2.imwrite(path, preview, [cv2.IMWRITE_JPEG_QUALITY, opts["quality"]]),
+                'comparison': lambda path, opts: self.create_comparison(
+                    original_small, None, path, quality=opts["quality"], preview=preview
+                )
+            }
+            suffixes = {'web_preview': "preview.jpg", 'comparison': "comparison.jpg"}
+            for fmt in small_formats:
+                paths[fmt] = os.path.join(self.output_dir, f"{shot_id}_{timestamp}_{suffixes[fmt]}")
+                start = time.perf_counter()
+                encoders[fmt](paths[fmt], options[fmt])
+                timings[fmt] = round(time.perf_counter() - start, 3)
+                print(f"✅ {fmt}: {os.path.getsize(paths[fmt]) / 2**20:.2f} MB in {timings[fmt] * 1000:.0f} ms")
+        
+        return paths, strip_rows, memory_floor_mb, estimated_peak_mb
+    
+    def grade_key(
+        self,
+        source: str,
+        preset: str = "neutral",
+        exposure: float = 0.0,
+        contrast: float = 1.0,
+        saturation: float = 1.0,
+        temperature: float = 0.0,
+        lut_file: Optional[str] = None
+    ) -> str:
+        """Hash of a source + grade settings (same scheme as the baked LUT cache)"""
+        settings = [source, preset, exposure, contrast, saturation, temperature]
+        if lut_file:
+            settings += [os.path.abspath(lut_file), os.path.getmtime(lut_file)]
+        return hashlib.sha1(json.dumps(settings).encode()).hexdigest()
+    
+    def get_source(self, image_url: str, image_path: Optional[str] = None, preview: bool = False) -> np.ndarray:
+        """
+        Decoded 8-bit BGR source for regrading, kept in a byte-bounded LRU
+        
+        preview=True returns a copy downscaled to preview_max_width, which is
+        all a preview-only regrade needs (the grade is per pixel). Only that
+        proxy is cached; the full decode is reused if it's already cached,
+        otherwise decoded, downscaled and dropped.
+        """
+        source = image_path or image_url
+        key = f"{source}|preview" if preview else source
+        
+        with self._cache_lock:
+            if key in self._source_cache:
+                self._source_cache.move_to_end(key)
+                return self._source_cache[key]
+            full = self._source_cache.get(source) if preview else None
+        
+        if full is not None:
+            img = full
+        elif image_path and os.path.exists(image_path):
+            img = self.load_image(image_path)
+        else:
+            img = self.download_image(image_url)
+        
+        if preview:
+            h, w = img.shape[:2]
+            if w <= self.preview_max_width and full is not None:
+                return full  # already cached at preview size
+            if w > self.preview_max_width:
+                size = (self.preview_max_width, max(1, round(h * self.preview_max_width / w)))
+                img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        
+        with self._cache_lock:
+            if key not in self._source_cache:
+                self._source_cache[key] = img
+                self._source_bytes += img.nbytes
+            self._source_cache.move_to_end(key)
+            while self._source_bytes > self.source_cache_bytes and len(self._source_cache) > 1:
+                _, evicted = self._source_cache.popitem(last=False)
+                self._source_bytes -= evicted.nbytes
+        return img
+    
+    def regrade(
+        self,
+        shot_id: str,
+        image_url: str,
+        image_path: Optional[str] = None,
+        preset: str = "neutral",
+        exposure: float = 0.0,
+        contrast: float = 1.0,
+        saturation: float = 1.0,
+        temperature: float = 0.0,
+        lut_file: Optional[str] = None,
+        commit: bool = False,
+        formats: Optional[List[str]] = None,
+        profile: Union[str, Dict[str, str]] = "balanced"
+    ) -> Dict[str, Any]:
+        """
+        Regrade an existing shot from its cached decoded source
+        
+        Without commit only the preview and comparison are written, graded
+        at preview resolution. commit=True also writes the 16-bit masters
+        (or the requested formats) at full resolution. Outputs are memoized
+        per settings hash, so repeating a combination is a lookup.
+        
+        Returns:
+            {"settings_hash", "paths", "cached", "committed"}
+        """
+        grade = dict(preset=preset, exposure=exposure, contrast=contrast,
+                     saturation=saturation, temperature=temperature)
+        key = self.grade_key(image_path or image_url, lut_file=lut_file, **grade)
+        wanted = list(self.export_options(formats if commit else ['web_preview', 'comparison'], profile))
+        
+        with self._cache_lock:
+            cached = self._grade_results.get(key, {})
+            if all(fmt in cached and os.path.exists(cached[fmt]) for fmt in wanted):
+                self._grade_results.move_to_end(key)
+                return {"settings_hash": key, "paths": dict(cached), "cached": True, "committed": commit}
+        
+        source = self.get_source(image_url, image_path, preview=not commit)
+        paths = self.process_frame(
+            source, f"{shot_id}_grade_{key[:8]}", lut_file=lut_file,
+            formats=wanted, profile=profile, **grade
+        )
+        
+        with self._cache_lock:
+            merged = {**self._grade_results.get(key, {}), **paths}
+            self._grade_results[key] = merged
+            self._grade_results.move_to_end(key)
+            if len(self._grade_results) > self.grade_results_size:
+                self._grade_results.popitem(last=False)
+        
+        return {"settings_hash": key, "paths": merged, "cached": False, "committed": commit}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Recent per-job HDR stats (memory, tiling, timing) and regrade cache sizes"""
+        with self._cache_lock:
+            source_cache = {"entries": len(self._source_cache), "mb": round(self._source_bytes / 2**20, 1)}
+            memoized = len(self._grade_results)
+        with self._stats_lock:
+            jobs = dict(self.job_stats)
+        return {
+            "memory_ceiling_mb": self.max_memory_mb,
+            "source_cache": source_cache,
+            "memoized_grades": memoized,
+            "jobs": jobs
+        }
 
 if __name__ == "__main__":
     pipeline = CinematicHDR()
@@ -0,0 +1,306 @@
+# utils/image_cache.py
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import requests
+
+# Magic bytes -> file extension for the formats FIBO / Bria return. Nothing
+# else is cached: blobs are decoded with cv2.imread all over (proxies,
+# thumbnails, diffs, animatics), so an unexpected format (e.g. EXR, when
+# OPENCV_IO_ENABLE_OPENEXR is set for masters) must never reach the disk.
+SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"RIFF", ".webp"),  # plus "WEBP" at offset 8, checked below
+    (b"GIF8", ".gif")
+)
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+def _extension(data: bytes) -> Optional[str]:
+    """Cache file extension for image bytes, or None if they aren't PNG/JPEG/WebP/GIF"""
+    for magic, ext in SIGNATURES:
+        if data.startswith(magic) and (ext != ".webp" or data[8:12] == b"WEBP"):
+            return ext
+    return None
+
+def content_hash(path: str) -> str:
+    """SHA-256 of an image file (free for cache blobs, which are named by it)"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if _DIGEST.fullmatch(stem):
+        return stem
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ImageCache:
+    """
+    Content-addressed local cache of generated source images
+
+    Blobs are stored once per SHA-256 of their bytes and looked up by image
+    URL or by the generation's request id (Bria URLs are presigned and
+    expire; the request id doesn't). Total size is bounded with LRU
+    eviction. A saved shot's source may be the only copy left once its URL
+    expires, so each shot pins its blob (one pin per owner; re-pinning an
+    owner releases its previous blob) and pinned blobs are skipped, up to
+    max_pinned_bytes (default: half of max_bytes). Past that cap the least
+    recently used pinned blobs lose their pins and fall back to plain LRU;
+    those are counted as pin_overflows. The key index is persisted next to the blobs (debounced: at most one
+    write per flush_interval seconds, and on exit) so the cache survives
+    restarts; blobs missing from a stale index are re-adopted on load.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "outputs/cache/images",
+        max_bytes: int = 2 * 1024**3,
+        flush_interval: float = 2.0,
+        max_pinned_bytes: Optional[int] = None
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_pinned_bytes = max_pinned_bytes if max_pinned_bytes is not None else max_bytes // 2
+        self.flush_interval = flush_interval
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._blobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # digest -> {path, size}, LRU order
+        self._keys: Dict[str, str] = {}                                  # "url:..." / "request:..." -> digest
+        self._pins: Dict[str, set] = {}                                  # digest -> owners (shot ids)
+        self._pin_owners: Dict[str, str] = {}                            # owner -> pinned digest
+        self._pinned_bytes = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.pin_overflows = 0
+
+        self._load_index()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def _lookup_keys(url: Optional[str], request_id: Optional[str]):
+        keys = []
+        if request_id:
+            keys.append(f"request:{request_id}")
+        if url:
+            keys.append(f"url:{url}")
+        return keys
+
+    def _load_index(self):
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {"blobs": [], "keys": {}}
+
+        listed = [(digest, filename) for digest, filename in index.get("blobs", [])]
+        known = {digest for digest, _ in listed}
+        # Blobs written after the last index flush (crash, kill): least recently used first
+        listed[:0] = [
+            (os.path.splitext(name)[0], name) for name in sorted(os.listdir(self.cache_dir))
+            if _DIGEST.fullmatch(os.path.splitext(name)[0]) and os.path.splitext(name)[0] not in known
+        ]
+        extensions = {ext for _, ext in SIGNATURES}
+        for digest, filename in listed:
+            path = os.path.join(self.cache_dir, filename)
+            if os.path.splitext(filename)[1] not in extensions:
+                # Unrecognised bytes cached by older versions (".bin"): never decode them
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if os.path.exists(path):
+                size = os.path.getsize(path)
+                self._blobs[digest] = {"path": path, "size": size}
+                self._bytes += size
+        self._keys = {k: d for k, d in index.get("keys", {}).items() if d in self._blobs}
+        for owner, digest in index.get("pins", {}).items():
+            if digest in self._blobs:
+                self._pin_locked(owner, digest)
+
+    def _save_index(self):
+        index = {
+            "blobs": [[d, os.path.basename(b["path"])] for d, b in self._blobs.items()],
+            "keys": self._keys,
+            "pins": self._pin_owners
+        }
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, self._index_path)
+
+    def _mark_dirty_locked(self):
+        """Schedule an index write (batches bursts of puts into one write)"""
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Write the index now if it has unsaved changes"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty:
+                self._dirty = False
+                self._save_index()
+
+    def get_path(self, url: Optional[str] = None, request_id: Optional[str] = None) -> Optional[str]:
+        """Local path of a cached image (marks it recently used), or None"""
+        with self._lock:
+            for key in self._lookup_keys(url, request_id):
+                digest = self._keys.get(key)
+                if digest in self._blobs:
+                    self._blobs.move_to_end(digest)
+                    self.hits += 1
+                    return self._blobs[digest]["path"]
+            self.misses += 1
+            return None
+
+    def put(self, data: bytes, url: Optional[str] = None, request_id: Optional[str] = None) -> str:
+        """Store image bytes (deduplicated by content) and index them under url/request_id"""
+        ext = _extension(data)
+        if ext is None:
+            raise ValueError(f"Not a PNG/JPEG/WebP/GIF image (starts with {data[:8]!r}); refusing to cache it")
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            if digest not in self._blobs:
+                path = os.path.join(self.cache_dir, digest + ext)
+                tmp = path + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                self._blobs[digest] = {"path": path, "size": len(data)}
+                self._bytes += len(data)
+
+            self._blobs.move_to_end(digest)
+            for key in self._lookup_keys(url, request_id):
+                self._keys[key] = digest
+
+            self._evict_locked(keep=digest)
+            self._mark_dirty_locked()
+            return self._blobs[digest]["path"]
+
+    def fetch(self, url: str, request_id: Optional[str] = None, timeout: int = 30) -> str:
+        """Local path for an image URL, downloading it on a miss"""
+        path = self.get_path(url, request_id)
+        if path:
+            # Index any key we didn't know yet (e.g. new URL for the same request)
+            with self._lock:
+                digest = os.path.splitext(os.path.basename(path))[0]
+                new_keys = [k for k in self._lookup_keys(url, request_id) if self._keys.get(k) != digest]
+                for key in new_keys:
+                    self._keys[key] = digest
+                if new_keys:
+                    self._mark_dirty_locked()
+            return path
+
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return self.put(response.content, url=url, request_id=request_id)
+
+    def read(self, url: str, request_id: Optional[str] = None) -> bytes:
+        """Image bytes from local disk (downloading once on a miss)"""
+        with open(self.fetch(url, request_id), "rb") as f:
+            return f.read()
+
+    def pin(self, path: str, owner: str) -> bool:
+        """
+        Make path's blob owner's pinned source (releasing the blob it pinned
+        before, if different); False if the blob isn't in the cache
+        """
+        digest = content_hash(path)
+        with self._lock:
+            if digest not in self._blobs:
+                return False
+            if self._pin_owners.get(owner) != digest:
+                self._unpin_locked(owner)
+                self._pin_locked(owner, digest)
+                self._blobs.move_to_end(digest)
+                self._enforce_pin_cap_locked(keep=digest)
+                self._evict_locked()
+                self._mark_dirty_locked()
+            return True
+
+    def unpin(self, owner: str):
+        """Release owner's pin (its blob becomes evictable once no other owner pins it)"""
+        with self._lock:
+            if owner in self._pin_owners:
+                self._unpin_locked(owner)
+                self._evict_locked()
+                self._mark_dirty_locked()
+
+    def _pin_locked(self, owner: str, digest: str):
+        owners = self._pins.setdefault(digest, set())
+        if not owners:
+            self._pinned_bytes += self._blobs[digest]["size"]
+        owners.add(owner)
+        self._pin_owners[owner] = digest
+
+    def _unpin_locked(self, owner: str):
+        digest = self._pin_owners.pop(owner, None)
+        owners = self._pins.get(digest)
+        if owners is None:
+            return
+        owners.discard(owner)
+        if not owners:
+            del self._pins[digest]
+            self._pinned_bytes -= self._blobs[digest]["size"]
+
+    def _enforce_pin_cap_locked(self, keep: Optional[str] = None):
+        """Past max_pinned_bytes, drop the pins of the least recently used pinned blobs"""
+        for digest in [d for d in self._blobs if d in self._pins and d != keep]:
+            if self._pinned_bytes <= self.max_pinned_bytes:
+                break
+            for owner in list(self._pins[digest]):
+                self._unpin_locked(owner)
+            self.pin_overflows += 1
+
+    def _evict_locked(self, keep: Optional[str] = None):
+        if self._bytes <= self.max_bytes:
+            return
+        evictable = [d for d in self._blobs if d != keep and d not in self._pins]  # LRU order
+        for digest in evictable:
+            if self._bytes <= self.max_bytes:
+                break
+            blob = self._blobs.pop(digest)
+            self._bytes -= blob["size"]
+            self.evictions += 1
+            try:
+                os.remove(blob["path"])
+            except OSError:
+                pass
+            self._keys = {k: d for k, d in self._keys.items() if d != digest}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "images": len(self._blobs),
+                "keys": len(self._keys),
+                "pinned": len(self._pins),
+                "pinned_mb": round(self._pinned_bytes / 2**20, 1),
+                "max_pinned_mb": round(self.max_pinned_bytes / 2**20, 1),
+                "pin_overflows": self.pin_overflows,
+                "size_mb": round(self._bytes / 2**20, 1),
+                "max_mb": round(self.max_bytes / 2**20, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
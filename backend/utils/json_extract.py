@@ -0,0 +1,125 @@
+# utils/json_extract.py
+import json
+from typing import Dict, Any, Optional
+
+class JSONExtractionError(ValueError):
+    """No JSON object could be recovered from LLM output"""
+
+class StreamingJSONExtractor:
+    """
+    Incremental, tolerant JSON object extractor for LLM output
+
+    Feed text chunks as they arrive. Prose and markdown fences around the
+    object are skipped, trailing commas are dropped, and a truncated object
+    can be closed off with finish(). Strings (and escapes) are tracked so
+    braces inside values never confuse the scanner.
+    """
+
+    def __init__(self):
+        self._out = []           # cleaned characters of the current object
+        self._stack = []         # open '{' / '[' with the last member boundary in _out
+        self._in_string = False
+        self._escape = False
+        self.complete = False
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """Consume a chunk; returns the object once it is complete"""
+        for ch in chunk:
+            if self.complete:
+                break
+
+            if not self._stack:
+                # Still outside the object - wait for the first '{'
+                if ch == "{":
+                    self._out.append(ch)
+                    self._stack.append(["{", len(self._out)])
+                continue
+
+            if self._in_string:
+                self._out.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                elif ch == "\n":
+                    # Raw newline inside a string is invalid JSON - escape it
+                    self._out[-1] = "\\n"
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._out.append(ch)
+            elif ch in "{[":
+                self._out.append(ch)
+                self._stack.append([ch, len(self._out)])
+            elif ch in "}]":
+                self._drop_trailing_comma()
+                self._stack.pop()
+                self._out.append(ch)
+                if not self._stack:
+                    self.complete = True
+            elif ch == ",":
+                self._out.append(ch)
+                self._stack[-1][1] = len(self._out) - 1
+            else:
+                self._out.append(ch)
+
+        if self.complete:
+            return self._loads()
+        return None
+
+    def finish(self) -> Dict[str, Any]:
+        """Close a truncated object (open string, arrays, objects) and parse it"""
+        if self.complete:
+            return self._loads()
+        if not self._stack:
+            raise JSONExtractionError("No JSON object found in output")
+
+        closed = self._closed_text(self._out, self._in_string)
+        try:
+            return json.loads(closed)
+        except json.JSONDecodeError:
+            pass
+
+        # Last member of the innermost container is incomplete (e.g. a key
+        # with no value yet) - cut back to the previous member and retry
+        boundary = self._stack[-1][1]
+        closed = self._closed_text(self._out[:boundary], in_string=False)
+        self.complete = True
+        self._out = list(closed)
+        return self._loads()
+
+    def _closed_text(self, out, in_string: bool) -> str:
+        chars = list(out)
+        if in_string:
+            if self._escape:
+                chars.pop()
+            chars.append('"')
+        for opener, _ in reversed(self._stack):
+            while chars and chars[-1].isspace():
+                chars.pop()
+            if chars and chars[-1] == ",":
+                chars.pop()
+            chars.append("}" if opener == "{" else "]")
+        return "".join(chars)
+
+    def _drop_trailing_comma(self):
+        i = len(self._out) - 1
+        while i >= 0 and self._out[i].isspace():
+            i -= 1
+        if i >= 0 and self._out[i] == ",":
+            del self._out[i]
+
+    def _loads(self) -> Dict[str, Any]:
+        try:
+            return json.loads("".join(self._out))
+        except json.JSONDecodeError as e:
+            raise JSONExtractionError(f"Recovered text is not valid JSON: {e}") from e
+
+def extract_json(text: str) -> Dict[str, Any]:
+    """Extract the first JSON object from LLM output, repairing what it can"""
+    extractor = StreamingJSONExtractor()
+    result = extractor.feed(text)
+    return result if result is not None else extractor.finish()
@@ -0,0 +1,164 @@
+# utils/lut3d.py
+import numpy as np
+from typing import Callable, Optional
+
+class LUT3D:
+    """
+    3D colour lookup table (RGB -> RGB) with .cube import/export
+
+    table[r, g, b] holds the output RGB (float, nominally 0-1) for the lattice
+    point (r, g, b) / (size - 1). Images are mapped with vectorized trilinear
+    interpolation, processed in row chunks so temporaries stay bounded.
+    """
+
+    def __init__(
+        self,
+        table: np.ndarray,
+        title: str = "",
+        domain_min=(0.0, 0.0, 0.0),
+        domain_max=(1.0, 1.0, 1.0)
+    ):
+        if table.ndim != 4 or table.shape[3] != 3 or len(set(table.shape[:3])) != 1:
+            raise ValueError(f"LUT table must be (N, N, N, 3), got {table.shape}")
+
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+        self.title = title
+        self.domain_min = np.asarray(domain_min, dtype=np.float32)
+        self.domain_max = np.asarray(domain_max, dtype=np.float32)
+
+    @property
+    def size(self) -> int:
+        return self.table.shape[0]
+
+    @classmethod
+    def identity(cls, size: int = 33) -> "LUT3D":
+        axis = np.linspace(0.0, 1.0, size, dtype=np.float32)
+        r, g, b = np.meshgrid(axis, axis, axis, indexing="ij")
+        return cls(np.stack([r, g, b], axis=-1), title="identity")
+
+    @classmethod
+    def bake(
+        cls,
+        transform: Callable[[np.ndarray], np.ndarray],
+        size: int = 33,
+        title: str = ""
+    ) -> "LUT3D":
+        """Sample transform((M, 3) RGB in [0, 1]) -> (M, 3) on a size^3 lattice"""
+        lattice = cls.identity(size).table.reshape(-1, 3)
+        table = np.asarray(transform(lattice), dtype=np.float32).reshape(size, size, size, 3)
+        return cls(table, title=title)
+
+    def apply(
+        self,
+        img: np.ndarray,
+        out: Optional[np.ndarray] = None,
+        chunk_rows: int = 64,
+        channel_order: str = "RGB"
+    ) -> np.ndarray:
+        """
+        Map an image through the LUT
+
+        uint8/uint16 input -> uint16 output (clipped); float input -> float32.
+        A float32 out gets the table's values unquantized whatever the input.
+        channel_order="BGR" reads and writes OpenCV-ordered pixels directly.
+        """
+        if img.dtype == np.uint8:
+            in_scale, out_dtype = 255.0, np.uint16
+        elif img.dtype == np.uint16:
+            in_scale, out_dtype = 65535.0, np.uint16
+        else:
+            in_scale, out_dtype = 1.0, np.float32
+
+        if out is None:
+            out = np.empty(img.shape, dtype=out_dtype)
+        out_dtype = out.dtype
+
+        n = self.size
+        flat = self.table.reshape(-1, 3)
+        span = self.domain_max - self.domain_min
+        # Lattice axes are RGB: reverse BGR input on the way in and out (views, no copies)
+        order = slice(None, None, -1) if channel_order == "BGR" else slice(None)
+
+        for y in range(0, img.shape[0], chunk_rows):
+            rows = img[y:y + chunk_rows].reshape(-1, 3)[:, order].astype(np.float32)
+            rows /= in_scale
+            rows -= self.domain_min
+            rows *= (n - 1) / span
+            np.clip(rows, 0, n - 1, out=rows)
+
+            base = np.minimum(rows.astype(np.int32), n - 2)
+            frac = rows - base
+            r0, g0, b0 = base[:, 0], base[:, 1], base[:, 2]
+            fr, fg, fb = frac[:, 0:1], frac[:, 1:2], frac[:, 2:3]
+            index = (r0 * n + g0) * n + b0
+
+            # Trilinear: interpolate along b, then g, then r
+            def lerp_b(i):
+                c0 = flat[i]
+                return c0 + fb * (flat[i + 1] - c0)
+
+            c00 = lerp_b(index)
+            c01 = lerp_b(index + n)
+            c10 = lerp_b(index + n * n)
+            c11 = lerp_b(index + n * n + n)
+            c0 = c00 + fg * (c01 - c00)
+            c1 = c10 + fg * (c11 - c10)
+            result = c0 + fr * (c1 - c0)
+
+            if out_dtype == np.uint16:
+                result *= 65535.0
+                np.clip(result, 0, 65535, out=result)
+                np.rint(result, out=result)
+            out[y:y + chunk_rows] = result[:, order].reshape(out[y:y + chunk_rows].shape)
+
+        return out
+
+    # ------------------------------------------------------------------
+    # .cube (Resolve / Adobe) format: red varies fastest, then green, then blue
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_cube(cls, path: str) -> "LUT3D":
+        """Load an Adobe/Resolve .cube 3D LUT"""
+        title = ""
+        size = None
+        domain_min, domain_max = (0.0, 0.0, 0.0), (1.0, 1.0, 1.0)
+        values = []
+
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                keyword = line.split()[0].upper()
+                if keyword == "TITLE":
+                    title = line[5:].strip().strip('"')
+                elif keyword == "LUT_3D_SIZE":
+                    size = int(line.split()[1])
+                elif keyword == "LUT_1D_SIZE":
+                    raise ValueError(f"{path}: 1D LUTs are not supported")
+                elif keyword == "DOMAIN_MIN":
+                    domain_min = tuple(float(v) for v in line.split()[1:4])
+                elif keyword == "DOMAIN_MAX":
+                    domain_max = tuple(float(v) for v in line.split()[1:4])
+                elif keyword[0].isdigit() or keyword[0] in "-.":
+                    values.append(line)
+
+        if size is None:
+            raise ValueError(f"{path}: missing LUT_3D_SIZE")
+        if len(values) != size ** 3:
+            raise ValueError(f"{path}: expected {size ** 3} entries, found {len(values)}")
+
+        data = np.loadtxt(values, dtype=np.float32).reshape(size, size, size, 3)  # [b][g][r]
+        return cls(data.transpose(2, 1, 0, 3), title=title, domain_min=domain_min, domain_max=domain_max)
+
+    def to_cube(self, path: str):
+        """Write as a .cube file (loads in Resolve, Premiere, Nuke, ...)"""
+        data = self.table.transpose(2, 1, 0, 3).reshape(-1, 3)  # [b][g][r] -> red fastest
+        with open(path, "w") as f:
+            if self.title:
+                f.write(f'TITLE "{self.title}"\n')
+            f.write(f"LUT_3D_SIZE {self.size}\n")
+            f.write("DOMAIN_MIN {:.6f} {:.6f} {:.6f}\n".format(*self.domain_min))
+            f.write("DOMAIN_MAX {:.6f} {:.6f} {:.6f}\n".format(*self.domain_max))
+            np.savetxt(f, data, fmt="%.6f")
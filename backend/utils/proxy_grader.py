@@ -0,0 +1,100 @@
+# utils/proxy_grader.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+import cv2
+import numpy as np
+
+from utils.hdr_pipeline import CinematicHDR
+
+class ProxyGrader:
+    """
+    Interactive grade previews from small in-memory float proxies
+
+    Each shot gets one downscaled float32 BGR proxy (default 960px wide),
+    kept under an LRU policy. A render is one cv2.transform with the fused
+    grade matrix, the same Reinhard tone map as the real preview, and a
+    JPEG encode: tens of milliseconds, no files written.
+    """
+
+    def __init__(self, hdr: CinematicHDR, width: int = 960, max_proxies: int = 32, quality: int = 85):
+        self.hdr = hdr
+        self.width = width
+        self.max_proxies = max_proxies
+        self.quality = quality
+
+        self._proxies: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.renders = 0
+        self.total_ms = 0.0
+
+    def get_proxy(self, shot_id: str, image_url: str, image_path: Optional[str] = None) -> np.ndarray:
+        """Float [0,1] BGR proxy for a shot (built from the cached source once)"""
+        with self._lock:
+            if shot_id in self._proxies:
+                self._proxies.move_to_end(shot_id)
+                return self._proxies[shot_id]
+
+        img = self.hdr.get_source(image_url, image_path, preview=True)
+        h, w = img.shape[:2]
+        if w > self.width:
+            img = cv2.resize(img, (self.width, max(1, round(h * self.width / w))), interpolation=cv2.INTER_AREA)
+        proxy = img.astype(np.float32)
+        proxy *= 1.0 / 255
+
+        with self._lock:
+            self._proxies[shot_id] = proxy
+            self._proxies.move_to_end(shot_id)
+            while len(self._proxies) > self.max_proxies:
+                self._proxies.popitem(last=False)
+        return proxy
+
+    def render(
+        self,
+        shot_id: str,
+        image_url: str,
+        image_path: Optional[str] = None,
+        preset: str = "neutral",
+        exposure: float = 0.0,
+        contrast: float = 1.0,
+        saturation: float = 1.0,
+        temperature: float = 0.0,
+        lut_file: Optional[str] = None
+    ) -> bytes:
+        """Graded, tone-mapped JPEG of the shot's proxy"""
+        proxy = self.get_proxy(shot_id, image_url, image_path)
+        start = time.perf_counter()
+
+        if lut_file:
+            lut = self.hdr.get_grade_lut(preset, exposure, contrast, saturation, temperature, lut_file=lut_file)
+            graded = lut.apply(proxy, channel_order="BGR")
+        else:
+            matrix = self.hdr.grade_matrix(preset, exposure, contrast, saturation, temperature)
+            graded = cv2.transform(proxy, matrix)
+            np.clip(graded, 0.0, 1.0, out=graded)
+
+        preview = self.hdr.tonemap(graded)
+        ok, jpeg = cv2.imencode(".jpg", preview, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise RuntimeError("JPEG encode failed")
+
+        with self._lock:
+            self.renders += 1
+            self.total_ms += (time.perf_counter() - start) * 1000
+        return jpeg.tobytes()
+
+    def evict(self, shot_id: str):
+        with self._lock:
+            self._proxies.pop(shot_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "proxies": len(self._proxies),
+                "proxy_width": self.width,
+                "renders": self.renders,
+                "avg_render_ms": round(self.total_ms / self.renders, 1) if self.renders else 0
+            }
@@ -0,0 +1,175 @@
+# utils/quality.py
+import math
+import re
+from typing import Dict, Any, Optional, Union
+
+import cv2
+import numpy as np
+
+from utils.color_stats import STATS_WIDTH, compute_color_stats
+
+# Thresholds for the ingest quality gate, on the ~256px stats proxy
+SHARPNESS_REF = 150.0       # Laplacian variance where sharpness scores ~0.63 (1 - 1/e)
+SHARPNESS_MIN = 40.0        # below this the shot is flagged "blurry"
+CLIP_LIMIT_PCT = 5.0        # clipped highlights / crushed shadows, % of pixels
+KEY_CLIP_LIMIT_PCT = 30.0   # same, when the prompt's lighting calls for it (low-key, noir, high-key)
+NOISE_LIMIT = 2.5           # noise sigma on the proxy, 8-bit levels (downsampling averages
+                            # most noise away: ~2.5 here is sigma ~20 at 1080p)
+CAST_LIMIT = 10.0           # mean a*/b* offset allowed for a neutral palette
+LOW_CHROMA_MAX = 18.0       # mean chroma allowed for desaturated / monochrome palettes
+HIGH_CHROMA_MIN = 10.0      # mean chroma expected of vibrant / complementary palettes
+
+# Immerkær's noise kernel: the difference of two Laplacians cancels image
+# structure up to second order, leaving (mostly) the noise
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+# Palette keywords in a structured prompt's aesthetics.color_scheme
+_WARM = ("warm", "golden", "gold", "amber", "orange", "sunset", "sepia")
+_COOL = ("cool", "cold", "blue", "teal", "cyan", "icy", "moonlit")
+_LOW_CHROMA = ("monochrome", "black and white", "grayscale", "greyscale", "noir", "desaturated", "muted", "faded")
+_HIGH_CHROMA = ("vibrant", "saturated", "neon", "vivid")
+
+# Lighting keywords (structured prompt lighting / color_scheme) that make clipping intended
+_LOW_KEY = ("low key", "low-key", "noir", "night", "nighttime", "silhouette", "silhouetted",
+            "chiaroscuro", "dark", "shadowy", "moody", "candlelight", "moonlit")
+_HIGH_KEY = ("high key", "high-key", "overexposed", "blown out", "bloom", "glare", "snow")
+
+WEIGHTS = {"sharpness": 0.35, "exposure": 0.25, "noise": 0.2, "color": 0.2}
+
+# Flags that fail the gate (and cost a re-roll); the rest are advisory,
+# since clipping and colour can be the look the prompt asked for
+DEFECT_FLAGS = ("blurry", "noisy")
+
+def _mentions(text: str, words) -> bool:
+    return any(re.search(rf"\b{re.escape(w)}\b", text) for w in words)
+
+def _text(value: Any) -> str:
+    """Lowercased text of a prompt field (nested dicts/lists flattened)"""
+    if isinstance(value, dict):
+        return " ".join(_text(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(_text(v) for v in value)
+    return str(value or "").lower().replace("_", " ")
+
+def lighting_expectation(lighting: Union[str, Dict[str, Any], None], color_scheme: Optional[str] = None) -> Dict[str, float]:
+    """
+    Clipping the prompt's lighting allows, in % of pixels
+
+    Low-key / noir / night lighting is meant to crush shadows, high-key
+    lighting to clip highlights; those get KEY_CLIP_LIMIT_PCT instead of
+    CLIP_LIMIT_PCT. Returns {"shadows": pct, "highlights": pct}.
+    """
+    text = f"{_text(lighting)} {_text(color_scheme)}"
+    return {
+        "shadows": KEY_CLIP_LIMIT_PCT if _mentions(text, _LOW_KEY) else CLIP_LIMIT_PCT,
+        "highlights": KEY_CLIP_LIMIT_PCT if _mentions(text, _HIGH_KEY) else CLIP_LIMIT_PCT
+    }
+
+def palette_expectation(color_scheme: Optional[str]) -> Dict[str, Any]:
+    """
+    What the intended palette implies for the image's colour
+
+    Returns {"warmth": +1 warm / -1 cool / 0 none, "chroma": "low" | "high" | None}.
+    Warm and cool together (teal & orange) is a complementary palette: no
+    overall cast expected, but plenty of chroma.
+    """
+    text = (color_scheme or "").lower().replace("_", " ")
+    warm, cool = _mentions(text, _WARM), _mentions(text, _COOL)
+
+    chroma = None
+    if _mentions(text, _LOW_CHROMA):
+        chroma = "low"
+    elif _mentions(text, _HIGH_CHROMA) or (warm and cool):
+        chroma = "high"
+
+    return {"warmth": 0 if warm == cool else (1 if warm else -1), "chroma": chroma}
+
+def score_image(
+    img_bgr: np.ndarray,
+    color_scheme: Optional[str] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    lighting: Union[str, Dict[str, Any], None] = None
+) -> Dict[str, Any]:
+    """
+    Quality score (0-100) and flags for a generated image
+
+    Runs on the downsampled 8-bit BGR proxy (a few ms): sharpness as
+    Laplacian variance, exposure clipping (against what the prompt's
+    lighting allows), a noise sigma estimate, and the colour cast /
+    saturation against the prompt's intended color_scheme. Pass the shot's
+    cached color stats to skip recomputing them.
+
+    Only DEFECT_FLAGS fail the gate ("passed"); clipping and colour flags
+    are advisory and lower the score.
+
+    Returns:
+        {"score", "passed", "flags", "defects", "metrics": {...}, "components": {...}}
+    """
+    h, w = img_bgr.shape[:2]
+    if w > STATS_WIDTH:
+        img_bgr = cv2.resize(img_bgr, (STATS_WIDTH, max(1, round(h * STATS_WIDTH / w))), interpolation=cv2.INTER_AREA)
+    if stats is None:
+        stats = compute_color_stats(img_bgr)
+
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    _, std = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_32F))
+    sharpness = float(std[0, 0]) ** 2
+
+    residual = cv2.filter2D(gray, -1, _NOISE_KERNEL)[1:-1, 1:-1]
+    noise = math.sqrt(math.pi / 2) * cv2.norm(residual, cv2.NORM_L1) / (6 * residual.size)
+
+    highlights = stats["clipped_highlights_pct"]
+    shadows = stats["clipped_shadows_pct"]
+    _, a, b = stats["lab_mean"]
+    chroma = stats["chroma_mean"]
+
+    limits = lighting_expectation(lighting, color_scheme)
+
+    flags = []
+    if sharpness < SHARPNESS_MIN:
+        flags.append("blurry")
+    if highlights > limits["highlights"]:
+        flags.append("clipped_highlights")
+    if shadows > limits["shadows"]:
+        flags.append("crushed_shadows")
+    if noise > NOISE_LIMIT:
+        flags.append("noisy")
+
+    expected = palette_expectation(color_scheme)
+    if expected["warmth"]:
+        cast = b * expected["warmth"] < -2.0  # e.g. a warm palette that rendered blue
+    else:
+        cast = expected["chroma"] is None and math.hypot(a, b) > CAST_LIMIT
+    if cast:
+        flags.append("color_cast")
+    if (expected["chroma"] == "low" and chroma > LOW_CHROMA_MAX) or \
+       (expected["chroma"] == "high" and chroma < HIGH_CHROMA_MIN):
+        flags.append("saturation_mismatch")
+
+    components = {
+        "sharpness": 1 - math.exp(-sharpness / SHARPNESS_REF),
+        "exposure": max(0.0, 1 - (highlights / limits["highlights"] + shadows / limits["shadows"]) / 4),
+        "noise": max(0.0, 1 - noise / (2 * NOISE_LIMIT)),
+        "color": 1.0 - 0.5 * ("color_cast" in flags) - 0.5 * ("saturation_mismatch" in flags)
+    }
+    score = 100 * sum(WEIGHTS[k] * v for k, v in components.items())
+
+    defects = [flag for flag in flags if flag in DEFECT_FLAGS]
+
+    return {
+        "score": round(score, 1),
+        "passed": not defects,
+        "flags": flags,
+        "defects": defects,
+        "metrics": {
+            "laplacian_variance": round(sharpness, 2),
+            "noise_sigma": round(noise, 2),
+            "clipped_highlights_pct": highlights,
+            "clipped_shadows_pct": shadows,
+            "lab_mean_ab": [a, b],
+            "chroma_mean": chroma,
+            "clip_limits_pct": limits
+        },
+        "components": {k: round(v, 3) for k, v in components.items()},
+        "color_scheme": color_scheme
+    }
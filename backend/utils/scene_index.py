@@ -0,0 +1,161 @@
+# utils/scene_index.py
+import glob
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Any, List, Optional
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "at", "by", "to", "for", "with",
+    "under", "over", "from", "into", "onto", "is", "are", "was", "be", "being", "his",
+    "her", "their", "its", "he", "she", "they", "it", "as", "while", "who", "that",
+    "this", "some", "up", "down", "through", "across", "along", "around", "near",
+    "beside", "behind", "toward", "towards", "inside", "outside", "very"
+}
+
+# Longest first; a trailing "e" goes too, so examine/examines/examining/examined agree
+SUFFIXES = ("ingly", "edly", "ing", "ies", "ed", "es", "ly", "s", "y", "e")
+
+def _stem(word: str) -> str:
+    """Tiny suffix stripper: 'examines'/'examining' -> 'examin', 'rainy' -> 'rain'"""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stemmed content words"""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return [_stem(w) for w in words if w not in STOPWORDS]
+
+class SceneIndex:
+    """
+    Local TF-IDF index over past scene_description -> structured_prompt results
+
+    Catches scenes that differ only in wording ("a detective examines evidence
+    under a desk lamp" vs "detective examining evidence by lamp light") so a
+    previous structured prompt can be offered or reused instead of running
+    the crew again. Everything stays in memory; no external service.
+    """
+
+    def __init__(self, threshold: float = 0.65):
+        self.threshold = threshold
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._term_counts: Dict[str, Counter] = {}
+        self._postings: Dict[str, set] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(
+        self,
+        shot_id: str,
+        scene_description: str,
+        shot_type: str,
+        structured_prompt: Dict[str, Any],
+        simple_prompt: Optional[str] = None
+    ):
+        """Index one shot (re-adding a shot_id replaces it)"""
+        counts = Counter(tokenize(scene_description))
+        if not counts:
+            return
+
+        with self._lock:
+            self._remove_locked(shot_id)
+            self._entries[shot_id] = {
+                "shot_id": shot_id,
+                "scene_description": scene_description,
+                "shot_type": shot_type,
+                "structured_prompt": structured_prompt,
+                "simple_prompt": simple_prompt or scene_description
+            }
+            self._term_counts[shot_id] = counts
+            for term in counts:
+                self._postings[term].add(shot_id)
+
+    def remove(self, shot_id: str):
+        with self._lock:
+            self._remove_locked(shot_id)
+
+    def _remove_locked(self, shot_id: str):
+        counts = self._term_counts.pop(shot_id, None)
+        self._entries.pop(shot_id, None)
+        for term in counts or ():
+            self._postings[term].discard(shot_id)
+            if not self._postings[term]:
+                del self._postings[term]
+
+    def load_directory(
+        self,
+        shots_dir: str = "outputs/shots",
+        resolve_prompt: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+    ) -> int:
+        """Index shot JSON files saved by previous runs (resolve_prompt expands stored prompt references)"""
+        loaded = 0
+        for path in glob.glob(os.path.join(shots_dir, "*.json")):
+            try:
+                with open(path) as f:
+                    shot = json.load(f)
+                self.add(
+                    shot_id=shot["shot_id"],
+                    scene_description=shot["scene_description"],
+                    shot_type=shot.get("shot_type", "medium shot"),
+                    structured_prompt=resolve_prompt(shot["structured_prompt"]) if resolve_prompt else shot["structured_prompt"],
+                    simple_prompt=shot.get("simple_prompt")
+                )
+                loaded += 1
+            except (OSError, ValueError, KeyError):
+                continue
+        return loaded
+
+    def _idf(self, term: str) -> float:
+        n = len(self._entries)
+        return math.log((1 + n) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def _vector(self, counts: Counter) -> Dict[str, float]:
+        vec = {term: tf * self._idf(term) for term, tf in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {term: v / norm for term, v in vec.items()}
+
+    def search(
+        self,
+        scene_description: str,
+        k: int = 5,
+        shot_type: Optional[str] = None,
+        exclude: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Top-k most similar indexed shots (cosine similarity, 0-1)"""
+        counts = Counter(tokenize(scene_description))
+        if not counts:
+            return []
+
+        with self._lock:
+            query = self._vector(counts)
+            # Only shots sharing at least one term can score above zero
+            candidates = set()
+            for term in query:
+                candidates |= self._postings.get(term, set())
+            candidates.discard(exclude)
+
+            scored = []
+            for shot_id in candidates:
+                entry = self._entries[shot_id]
+                if shot_type and entry["shot_type"] != shot_type:
+                    continue
+                doc = self._vector(self._term_counts[shot_id])
+                score = sum(w * doc.get(term, 0.0) for term, w in query.items())
+                scored.append((score, entry))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [{**entry, "similarity": round(score, 4)} for score, entry in scored[:k]]
+
+    def best_match(self, scene_description: str, shot_type: str) -> Optional[Dict[str, Any]]:
+        """Closest shot of the same type above the reuse threshold, if any"""
+        results = self.search(scene_description, k=1, shot_type=shot_type)
+        if results and results[0]["similarity"] >= self.threshold:
+            return results[0]
+        return None
@@ -0,0 +1,166 @@
+# utils/shot_diff.py
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+
+import cv2
+import numpy as np
+
+from utils.image_cache import content_hash
+
+# SSIM constants for 8-bit data (Wang et al. 2004: K1=0.01, K2=0.03, L=255)
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+
+def ssim_map(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Per-pixel SSIM of two single-channel float32 images (11x11 Gaussian, sigma 1.5)"""
+    blur = lambda x: cv2.GaussianBlur(x, (11, 11), 1.5)
+    mu_a, mu_b = blur(a), blur(b)
+    mu_aa, mu_bb, mu_ab = mu_a * mu_a, mu_b * mu_b, mu_a * mu_b
+    var_a = blur(a * a) - mu_aa
+    var_b = blur(b * b) - mu_bb
+    cov = blur(a * b) - mu_ab
+    return ((2 * mu_ab + _C1) * (2 * cov + _C2)) / ((mu_aa + mu_bb + _C1) * (var_a + var_b + _C2))
+
+class ShotDiffer:
+    """
+    Quantitative A/B comparison of two shots on downsampled proxies
+
+    Reports SSIM (structure), mean Lab delta E split into lightness and
+    chroma (colour), a grid of per-region change scores rendered as a
+    heatmap, and a difference overlay. Results are keyed by the pair of
+    content hashes, so a pair is only ever computed once (memory LRU, plus
+    the JSON/images on disk across restarts).
+    """
+
+    def __init__(self, output_dir: str = "outputs/diffs", width: int = 512, grid: Tuple[int, int] = (8, 8), max_entries: int = 256):
+        self.output_dir = output_dir
+        self.width = width
+        self.grid = grid  # (rows, cols)
+        self.max_entries = max_entries
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.total_ms = 0.0
+
+    def _load(self, path: str) -> np.ndarray:
+        img = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_2)
+        if img is None:
+            raise ValueError(f"Could not decode {path}")
+        h, w = img.shape[:2]
+        if w > self.width:
+            img = cv2.resize(img, (self.width, max(1, round(h * self.width / w))), interpolation=cv2.INTER_AREA)
+        return img
+
+    def diff(self, path_a: str, path_b: str) -> Dict[str, Any]:
+        """Compare two image files; cached by (content hash A, content hash B)"""
+        key = f"{content_hash(path_a)[:16]}_{content_hash(path_b)[:16]}"
+        json_path = os.path.join(self.output_dir, f"{key}.json")
+
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return {**self._results[key], "cached": True}
+
+        if os.path.exists(json_path):
+            with open(json_path) as f:
+                result = json.load(f)
+            self._remember(key, result, hit=True)
+            return {**result, "cached": True}
+
+        start = time.perf_counter()
+        result = self._compute(path_a, path_b, key)
+        self.total_ms += (time.perf_counter() - start) * 1000
+
+        tmp = json_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp, json_path)
+
+        self._remember(key, result, hit=False)
+        return {**result, "cached": False}
+
+    def _remember(self, key: str, result: Dict[str, Any], hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def _compute(self, path_a: str, path_b: str, key: str) -> Dict[str, Any]:
+        a = self._load(path_a)
+        b = self._load(path_b)
+        h, w = a.shape[:2]
+        if b.shape[:2] != (h, w):
+            b = cv2.resize(b, (w, h), interpolation=cv2.INTER_AREA)
+
+        # Structure: SSIM on luma
+        gray_a = cv2.cvtColor(a, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        gray_b = cv2.cvtColor(b, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        ssim = ssim_map(gray_a, gray_b)
+        change = np.clip(1 - ssim, 0, 1)
+
+        # Colour: delta E in Lab, split into lightness and chroma (a*, b*)
+        lab_a = cv2.cvtColor(a.astype(np.float32) * (1.0 / 255), cv2.COLOR_BGR2LAB)
+        lab_b = cv2.cvtColor(b.astype(np.float32) * (1.0 / 255), cv2.COLOR_BGR2LAB)
+        delta = lab_b - lab_a
+        delta_l = np.abs(delta[..., 0])
+        delta_c = cv2.magnitude(delta[..., 1], delta[..., 2])
+        delta_e = cv2.magnitude(delta_l, delta_c)
+
+        # Per-region scores: area-average the change map down to the grid
+        rows, cols = self.grid
+        regions = cv2.resize(change, (cols, rows), interpolation=cv2.INTER_AREA)
+        region_delta_e = cv2.resize(delta_e, (cols, rows), interpolation=cv2.INTER_AREA)
+
+        heatmap = cv2.applyColorMap(
+            cv2.resize((np.clip(regions * 2, 0, 1) * 255).astype(np.uint8), (w, h), interpolation=cv2.INTER_NEAREST),
+            cv2.COLORMAP_INFERNO
+        )
+        heatmap = cv2.addWeighted(b, 0.4, heatmap, 0.6, 0)
+
+        # Overlay: B in grayscale, changed pixels (structure or colour) in red
+        changed = (change > 0.25) | (delta_e > 10)
+        overlay = cv2.cvtColor(gray_b.astype(np.uint8), cv2.COLOR_GRAY2BGR)
+        overlay[changed] = (0.4 * overlay[changed] + (0, 0, 153)).astype(np.uint8)
+
+        heatmap_path = os.path.join(self.output_dir, f"{key}_heatmap.jpg")
+        overlay_path = os.path.join(self.output_dir, f"{key}_overlay.jpg")
+        cv2.imwrite(heatmap_path, heatmap, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        cv2.imwrite(overlay_path, overlay, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+        return {
+            "key": key,
+            "proxy_size": [w, h],
+            "ssim": round(float(ssim.mean()), 4),
+            "changed_pct": round(float(changed.mean() * 100), 2),
+            "delta_e_mean": round(float(delta_e.mean()), 3),
+            "delta_l_mean": round(float(delta_l.mean()), 3),
+            "delta_chroma_mean": round(float(delta_c.mean()), 3),
+            "grid": [rows, cols],
+            "regions": np.round(regions, 3).tolist(),
+            "region_delta_e": np.round(region_delta_e, 2).tolist(),
+            "heatmap_path": heatmap_path,
+            "overlay_path": overlay_path
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cached_pairs": len(self._results),
+                "hits": self.hits,
+                "misses": self.misses,
+                "avg_compute_ms": round(self.total_ms / self.misses, 1) if self.misses else 0.0
+            }
@@ -0,0 +1,284 @@
+# utils/strip_writers.py
+import struct
+import zlib
+import numpy as np
+from typing import Optional
+
+def _as_rgb(rows: np.ndarray, channel_order: str) -> np.ndarray:
+    """RGB view of a strip (BGR is reversed without copying)"""
+    return rows[..., ::-1] if channel_order == "BGR" else rows
+
+class TiffStripWriter:
+    """
+    Incremental baseline TIFF writer (16-bit RGB, little-endian)
+
+    Rows are appended strip by strip and never held in memory as a whole
+    frame; the IFD is written at the end and the header patched to point at it.
+    Every strip except the last must have the same number of rows.
+
+    With compress_level set, each strip is Adobe Deflate compressed, after
+    horizontal differencing when predictor=True. channel_order="BGR" accepts
+    OpenCV-ordered strips (reordered during the little-endian copy).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        width: int,
+        height: int,
+        compress_level: Optional[int] = None,
+        predictor: bool = False,
+        channel_order: str = "RGB"
+    ):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.compress_level = compress_level
+        self.predictor = predictor and compress_level is not None
+        self.channel_order = channel_order
+        self.rows_per_strip = None
+        self.rows_written = 0
+        self.strip_offsets = []
+        self.strip_byte_counts = []
+
+        self._f = open(path, "wb")
+        self._f.write(b"II" + struct.pack("<HI", 42, 0))  # IFD offset patched in close()
+
+    def write_strip(self, rows16: np.ndarray):
+        h = rows16.shape[0]
+        if self.rows_per_strip is None:
+            self.rows_per_strip = h
+        elif h != self.rows_per_strip and self.rows_written + h != self.height:
+            raise ValueError("Only the last strip may have a different row count")
+
+        rows = np.ascontiguousarray(_as_rgb(rows16, self.channel_order), dtype="<u2")
+        if self.predictor:
+            # Predictor 2: each sample minus the same channel one pixel earlier (mod 2^16)
+            diff = rows.copy()
+            np.subtract(rows[:, 1:], rows[:, :-1], out=diff[:, 1:])
+            rows = diff
+        data = rows.tobytes()
+        if self.compress_level is not None:
+            data = zlib.compress(data, self.compress_level)
+
+        self.strip_offsets.append(self._f.tell())
+        self.strip_byte_counts.append(len(data))
+        self._f.write(data)
+        self.rows_written += h
+
+    def close(self):
+        if self.rows_written != self.height:
+            self._f.close()
+            raise ValueError(f"TIFF incomplete: {self.rows_written}/{self.height} rows written")
+
+        f = self._f
+        n = len(self.strip_offsets)
+
+        def aligned_tell():
+            if f.tell() % 2:
+                f.write(b"\0")
+            return f.tell()
+
+        bits_offset = aligned_tell()
+        f.write(struct.pack("<3H", 16, 16, 16))
+
+        offsets_pos = aligned_tell()
+        f.write(struct.pack(f"<{n}I", *self.strip_offsets))
+        counts_pos = f.tell()
+        f.write(struct.pack(f"<{n}I", *self.strip_byte_counts))
+
+        SHORT, LONG = 3, 4
+        # (tag, type, count, value-or-offset), ascending tag order
+        entries = [
+            (256, LONG, 1, self.width),
+            (257, LONG, 1, self.height),
+            (258, SHORT, 3, bits_offset),
+            (259, SHORT, 1, 1 if self.compress_level is None else 8),  # none / Adobe Deflate
+            (262, SHORT, 1, 2),                                   # RGB
+            (273, LONG, n, offsets_pos if n > 1 else self.strip_offsets[0]),
+            (277, SHORT, 1, 3),
+            (278, LONG, 1, self.rows_per_strip),
+            (279, LONG, n, counts_pos if n > 1 else self.strip_byte_counts[0]),
+            (284, SHORT, 1, 1)                                    # chunky RGBRGB
+        ]
+        if self.predictor:
+            entries.append((317, SHORT, 1, 2))                    # horizontal differencing
+
+        ifd_offset = aligned_tell()
+        f.write(struct.pack("<H", len(entries)))
+        for tag, typ, count, value in entries:
+            if typ == SHORT and count == 1:
+                f.write(struct.pack("<HHIHH", tag, typ, count, value, 0))
+            else:
+                f.write(struct.pack("<HHII", tag, typ, count, value))
+        f.write(struct.pack("<I", 0))  # no next IFD
+
+        f.seek(4)
+        f.write(struct.pack("<I", ifd_offset))
+        f.close()
+
+class PngStripWriter:
+    """
+    Incremental 16-bit RGB PNG writer
+
+    Each strip is Sub-filtered and pushed through one streaming zlib
+    compressor, so only the current strip's bytes are in memory.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        width: int,
+        height: int,
+        compress_level: int = 6,
+        channel_order: str = "RGB"
+    ):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.channel_order = channel_order
+        self.rows_written = 0
+
+        self._z = zlib.compressobj(compress_level)
+        self._f = open(path, "wb")
+        self._f.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 16, 2, 0, 0, 0))
+
+    def _chunk(self, kind: bytes, data: bytes):
+        self._f.write(struct.pack(">I", len(data)))
+        self._f.write(kind)
+        self._f.write(data)
+        self._f.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    def write_strip(self, rows16: np.ndarray):
+        h = rows16.shape[0]
+        raw = np.ascontiguousarray(_as_rgb(rows16, self.channel_order), dtype=">u2").view(np.uint8).reshape(h, -1)
+
+        # Sub filter (type 1): each byte minus the byte one pixel (6 bytes) earlier
+        filtered = np.empty((h, raw.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 1
+        filtered[:, 1:7] = raw[:, :6]
+        np.subtract(raw[:, 6:], raw[:, :-6], out=filtered[:, 7:])
+
+        data = self._z.compress(filtered.tobytes())
+        if data:
+            self._chunk(b"IDAT", data)
+        self.rows_written += h
+
+    def close(self):
+        if self.rows_written != self.height:
+            self._f.close()
+            raise ValueError(f"PNG incomplete: {self.rows_written}/{self.height} rows written")
+        self._chunk(b"IDAT", self._z.flush())
+        self._chunk(b"IEND", b"")
+        self._f.close()
+
+class ExrStripWriter:
+    """
+    Incremental OpenEXR writer (scanline, half-float B/G/R)
+
+    Float strips of any height are converted to half and cut into the
+    codec's scanline blocks (16 lines for ZIP, 1 for ZIPS / uncompressed);
+    the offset table is reserved after the header and patched in close().
+    ZIP/ZIPS use OpenEXR's byte split + delta predictor ahead of zlib, and
+    a block that doesn't shrink is stored raw, as the format requires.
+    """
+
+    COMPRESSION = {"none": (0, 1), "zips": (2, 1), "zip": (3, 16)}  # name -> (code, lines per block)
+
+    def __init__(
+        self,
+        path: str,
+        width: int,
+        height: int,
+        compression: str = "zip",
+        zip_level: int = 4,
+        channel_order: str = "BGR"
+    ):
+        if compression not in self.COMPRESSION:
+            raise ValueError(f"Unsupported EXR compression '{compression}' (choose from {', '.join(self.COMPRESSION)})")
+        self.path = path
+        self.width = width
+        self.height = height
+        self.compression = compression
+        self.zip_level = zip_level
+        self.channel_order = channel_order
+        self.code, self.block_lines = self.COMPRESSION[compression]
+        self.rows_written = 0
+        self.offsets = []
+
+        self._carry: Optional[np.ndarray] = None  # rows waiting for a full block
+        self._f = open(path, "wb")
+        self._f.write(self._header())
+        self._table_pos = self._f.tell()
+        self._f.write(b"\0" * 8 * (-(-height // self.block_lines)))  # offset table, patched in close()
+
+    def _header(self) -> bytes:
+        def attr(name: str, kind: str, value: bytes) -> bytes:
+            return name.encode() + b"\0" + kind.encode() + b"\0" + struct.pack("<i", len(value)) + value
+
+        # Channels in alphabetical order: HALF (1), not linear-perceptual, 1x1 sampling
+        channels = b"".join(c + b"\0" + struct.pack("<iB3xii", 1, 0, 1, 1) for c in (b"B", b"G", b"R")) + b"\0"
+        window = struct.pack("<4i", 0, 0, self.width - 1, self.height - 1)
+        rec709 = struct.pack("<8f", 0.64, 0.33, 0.30, 0.60, 0.15, 0.06, 0.3127, 0.3290)
+
+        return b"".join((
+            struct.pack("<ii", 20000630, 2),  # magic, version 2 single-part scanline
+            attr("channels", "chlist", channels),
+            attr("chromaticities", "chromaticities", rec709),
+            attr("compression", "compression", bytes([self.code])),
+            attr("dataWindow", "box2i", window),
+            attr("displayWindow", "box2i", window),
+            attr("lineOrder", "lineOrder", b"\0"),  # increasing y
+            attr("pixelAspectRatio", "float", struct.pack("<f", 1.0)),
+            attr("screenWindowCenter", "v2f", struct.pack("<2f", 0.0, 0.0)),
+            attr("screenWindowWidth", "float", struct.pack("<f", 1.0)),
+            b"\0"
+        ))
+
+    def _write_block(self, y: int, rows: np.ndarray):
+        # Per scanline: all B samples, then all G, then all R
+        raw = np.ascontiguousarray(rows.transpose(0, 2, 1)).tobytes()
+        data = raw
+        if self.code:
+            b = np.frombuffer(raw, dtype=np.uint8)
+            split = np.concatenate((b[0::2], b[1::2]))
+            predicted = np.empty_like(split)
+            predicted[0] = split[0]
+            np.subtract(split[1:], split[:-1], out=predicted[1:])
+            predicted[1:] += 128
+            compressed = zlib.compress(predicted.tobytes(), self.zip_level)
+            if len(compressed) < len(raw):
+                data = compressed
+
+        self.offsets.append(self._f.tell())
+        self._f.write(struct.pack("<ii", y, len(data)))
+        self._f.write(data)
+
+    def write_strip(self, rows: np.ndarray):
+        half = np.clip(rows, -65504, 65504).astype("<f2")
+        if self.channel_order != "BGR":
+            half = half[..., ::-1]
+        if self._carry is not None:
+            half = np.concatenate((self._carry, half))
+            self._carry = None
+
+        y0 = self.rows_written - (half.shape[0] - rows.shape[0])  # first row of `half`
+        full = half.shape[0] // self.block_lines * self.block_lines
+        for i in range(0, full, self.block_lines):
+            self._write_block(y0 + i, half[i:i + self.block_lines])
+        if full < half.shape[0]:
+            self._carry = half[full:]
+        self.rows_written += rows.shape[0]
+
+    def close(self):
+        if self.rows_written != self.height:
+            self._f.close()
+            raise ValueError(f"EXR incomplete: {self.rows_written}/{self.height} rows written")
+        if self._carry is not None:
+            self._write_block(self.height - self._carry.shape[0], self._carry)
+            self._carry = None
+
+        self._f.seek(self._table_pos)
+        self._f.write(struct.pack(f"<{len(self.offsets)}Q", *self.offsets))
+        self._f.close()
@@ -0,0 +1,127 @@
+# utils/thumbnails.py
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+import cv2
+
+from utils.image_cache import content_hash
+
+ENCODERS = {
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY)
+}
+
+class ThumbnailCache:
+    """
+    Multi-resolution thumbnail ladder for shot sources
+
+    Each source image is decoded once and area-downsampled rung by rung
+    (1280 -> 640 -> 320 -> 160, each from the previous rung), and every rung
+    is written as <content hash>_<width>.<ext>. Because files are keyed by
+    content, they never change and can be served as immutable. New sources
+    are generated in a small background pool at ingest; a request for a
+    ladder that isn't ready waits for (or runs) its generation.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "outputs/cache/thumbnails",
+        ladder: Tuple[int, ...] = (160, 320, 640, 1280),
+        fmt: str = "webp",
+        quality: int = 80,
+        workers: int = 2
+    ):
+        if fmt not in ENCODERS:
+            raise ValueError(f"Unknown thumbnail format '{fmt}' (available: {', '.join(ENCODERS)})")
+        self.output_dir = output_dir
+        self.ladder = tuple(sorted(ladder))
+        self.fmt = fmt
+        self.quality = quality
+        os.makedirs(output_dir, exist_ok=True)
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+        self._pending: Dict[Tuple[str, str], Future] = {}  # (digest, fmt) -> generation in flight
+        self._lock = threading.Lock()
+
+        self.generated = 0
+        self.served = 0
+
+    def rung(self, width: int) -> int:
+        """Smallest ladder width that covers the requested width (largest rung if none does)"""
+        return next((w for w in self.ladder if w >= width), self.ladder[-1])
+
+    def _path(self, digest: str, width: int, fmt: str) -> str:
+        return os.path.join(self.output_dir, f"{digest[:32]}_{width}{ENCODERS[fmt][0]}")
+
+    def _generate(self, source_path: str, digest: str, fmt: str):
+        img = cv2.imread(source_path, cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError(f"Could not decode {source_path}")
+
+        ext, quality_flag = ENCODERS[fmt]
+        for width in reversed(self.ladder):
+            h, w = img.shape[:2]
+            if w > width:
+                img = cv2.resize(img, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+
+            ok, data = cv2.imencode(ext, img, [quality_flag, self.quality])
+            if not ok:
+                raise ValueError(f"Could not encode {fmt} thumbnail")
+            path = self._path(digest, width, fmt)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data.tobytes())
+            os.replace(tmp, path)
+
+        self.generated += 1
+
+    def _submit(self, source_path: str, digest: str, fmt: str) -> Future:
+        key = (digest, fmt)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pool.submit(self._generate, source_path, digest, fmt)
+                self._pending[key] = future
+                future.add_done_callback(lambda _: self._forget(key))
+            return future
+
+    def _forget(self, key: Tuple[str, str]):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def schedule(self, source_path: str, fmt: Optional[str] = None) -> Optional[Future]:
+        """Generate a source's ladder in the background (no-op if already on disk)"""
+        fmt = fmt or self.fmt
+        digest = content_hash(source_path)
+        if os.path.exists(self._path(digest, self.ladder[0], fmt)):
+            return None
+        return self._submit(source_path, digest, fmt)
+
+    def get(self, source_path: str, width: int, fmt: Optional[str] = None) -> str:
+        """Path of the thumbnail rung covering width, generating the ladder if needed (blocking)"""
+        fmt = fmt or self.fmt
+        if fmt not in ENCODERS:
+            raise ValueError(f"Unknown thumbnail format '{fmt}' (available: {', '.join(ENCODERS)})")
+
+        digest = content_hash(source_path)
+        path = self._path(digest, self.rung(width), fmt)
+        if not os.path.exists(path):
+            self._submit(source_path, digest, fmt).result()
+        self.served += 1
+        return path
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "ladder": list(self.ladder),
+            "format": self.fmt,
+            "generated": self.generated,
+            "served": self.served,
+            "pending": pending
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
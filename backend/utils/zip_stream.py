@@ -0,0 +1,108 @@
+# utils/zip_stream.py
+import hashlib
+import json
+import os
+import time
+import zipfile
+import zlib
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+CHUNK = 1 << 20
+
+# Formats that are already entropy coded: deflating them again costs CPU for ~0% gain
+COMPRESSED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".exr", ".mp4", ".avi", ".zip"}
+
+class _Sink:
+    """
+    Write-only, non-seekable target for ZipFile that hands its bytes back
+
+    Having tell() but no seek() makes zipfile write data descriptors after
+    each member instead of seeking back to patch local headers.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    @property
+    def pending(self) -> int:
+        return len(self._chunks)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def should_store(path: str) -> bool:
+    """True if a file isn't worth deflating (known compressed format, or a sample barely shrinks)"""
+    if os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS:
+        return True
+    with open(path, "rb") as f:
+        sample = f.read(256 * 1024)
+    return not sample or len(zlib.compress(sample, 1)) > 0.9 * len(sample)
+
+def stream_zip(entries: Iterable[Dict[str, Any]], manifest: Optional[Dict[str, Any]] = None, level: int = 6) -> Iterator[bytes]:
+    """
+    Build a ZIP on the fly and yield it in pieces
+
+    Each entry is {"arcname", and "path" (file on disk) or "data" (bytes)};
+    any other keys are copied into the manifest. Files are read in 1 MB
+    chunks and each chunk is yielded as soon as it's compressed, so neither
+    the archive nor a whole member is ever held in memory or staged on
+    disk. With a manifest, every member's size, SHA-256 and storage method
+    are added to it and it's written last as manifest.json.
+    """
+    sink = _Sink()
+    files = []
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=level) as zf:
+        for entry in entries:
+            path = entry.get("path")
+            if path is not None:
+                size = os.path.getsize(path)
+                mtime = time.localtime(os.path.getmtime(path))[:6]
+                store = should_store(path)
+            else:
+                size = len(entry["data"])
+                mtime = time.localtime()[:6]
+                store = False
+
+            info = zipfile.ZipInfo(entry["arcname"], date_time=max(mtime, (1980, 1, 1, 0, 0, 0)))
+            info.compress_type = zipfile.ZIP_STORED if store else zipfile.ZIP_DEFLATED
+            info.file_size = size  # lets zipfile pick zip64 up front for > 2 GB members
+            digest = hashlib.sha256()
+
+            with zf.open(info, "w") as member:
+                if path is not None:
+                    with open(path, "rb") as f:
+                        for block in iter(lambda: f.read(CHUNK), b""):
+                            member.write(block)
+                            digest.update(block)
+                            if sink.pending:
+                                yield sink.drain()
+                else:
+                    member.write(entry["data"])
+                    digest.update(entry["data"])
+            yield sink.drain()
+
+            files.append({
+                **{k: v for k, v in entry.items() if k not in ("path", "data")},
+                "bytes": size,
+                "sha256": digest.hexdigest(),
+                "stored": store
+            })
+
+        if manifest is not None:
+            zf.writestr("manifest.json", json.dumps({**manifest, "files": files}, indent=2, default=str))
+    yield sink.drain()
@@ -18,6 +18,7 @@ import ShotComparison from './components/ShotComparison';
 function App() {
   const [activeTab, setActiveTab] = useState('create');
   const [currentShot, setCurrentShot] = useState(null);
+  const [parentShotId, setParentShotId] = useState(null);  // shot the current one was modified from
   const [shots, setShots] = useState([]);
   const [loading, setLoading] = useState(false);
 
@@ -37,6 +38,7 @@ function App() {
 
   const handleShotCreated = (newShot) => {
     setCurrentShot(newShot);
+    setParentShotId(null);
     loadShots();
     toast.success('Shot created successfully!');
   };
@@ -52,6 +54,7 @@ function App() {
         value
       });
 
+      setParentShotId(currentShot.shot_id);
       setCurrentShot(result.shot);
       toast.success(`${parameter} modified!`);
       loadShots();
@@ -214,8 +217,8 @@ function App() {
                     </div>
 
                     {/* Comparison View */}
-                    {currentShot.hdr_comparison_path && (
-                      <ShotComparison shot={currentShot} />
+                    {(currentShot.hdr_comparison_path || parentShotId) && (
+                      <ShotComparison shot={currentShot} compareTo={parentShotId} />
                     )}
                   </div>
 
@@ -241,7 +244,7 @@ function App() {
             >
               <ShotLibrary 
                 shots={shots} 
-                onShotSelect={setCurrentShot}
+                onShotSelect={(shot) => { setCurrentShot(shot); setParentShotId(null); }}
                 onRefresh={loadShots}
               />
             </motion.div>
@@ -1,13 +1,27 @@
 // src/components/ShotComparison.jsx
-import { useState } from 'react';
+import { useState, useEffect } from 'react';
 import { motion } from 'framer-motion';
-import { Eye, Download } from 'lucide-react';
-import { getOutputUrl } from '../lib/api';
+import { Eye, Download, Activity } from 'lucide-react';
+import { getOutputUrl, diffShots } from '../lib/api';
 
-export default function ShotComparison({ shot }) {
-  if (!shot.hdr_comparison_path) return null;
+// compareTo: id of the shot this one was modified from; shows SSIM / delta E and change maps
+export default function ShotComparison({ shot, compareTo }) {
+  const [diff, setDiff] = useState(null);
+  const [diffView, setDiffView] = useState('heatmap');
 
-  const comparisonUrl = getOutputUrl(shot.hdr_comparison_path);
+  useEffect(() => {
+    setDiff(null);
+    if (!compareTo || compareTo === shot.shot_id) return;
+    let cancelled = false;
+    diffShots(compareTo, shot.shot_id)
+      .then((data) => { if (!cancelled) setDiff(data); })
+      .catch((error) => console.error('Failed to diff shots:', error));
+    return () => { cancelled = true; };
+  }, [shot.shot_id, compareTo]);
+
+  if (!shot.hdr_comparison_path && !diff) return null;
+
+  const comparisonUrl = shot.hdr_comparison_path ? getOutputUrl(shot.hdr_comparison_path) : null;
 
   return (
     <motion.div
@@ -15,53 +29,105 @@ export default function ShotComparison({ shot }) {
       animate={{ opacity: 1, y: 0 }}
       className="bg-cinema-dark rounded-xl border border-cinema-gray overflow-hidden"
     >
-      {/* Header */}
-      <div className="p-4 bg-cinema-darker border-b border-cinema-gray flex items-center justify-between">
-        <h3 className="font-semibold flex items-center gap-2">
-          <Eye className="w-5 h-5 text-cinema-accent" />
-          HDR Comparison (8-bit vs 16-bit)
-        </h3>
-        
-        <a
-          href={comparisonUrl}
-          download
-          className="px-3 py-1 bg-cinema-gray hover:bg-cinema-lightgray rounded-lg text-sm flex items-center gap-2 transition-colors"
-        >
-          <Download className="w-4 h-4" />
-          Download
-        </a>
-      </div>
-
-      {/* Image */}
-      <div className="p-6 bg-black">
-        <img 
-          src={comparisonUrl}
-          alt="HDR Comparison"
-          className="w-full rounded-lg"
-        />
-      </div>
+      {/* Change vs parent shot */}
+      {diff && (
+        <div className="p-4 bg-cinema-darker border-b border-cinema-gray">
+          <div className="flex items-center justify-between mb-3">
+            <h3 className="font-semibold flex items-center gap-2">
+              <Activity className="w-5 h-5 text-cinema-accent" />
+              Change vs {compareTo.substring(0, 12)}...
+            </h3>
+            <div className="flex gap-2">
+              {['heatmap', 'overlay'].map((view) => (
+                <button
+                  key={view}
+                  onClick={() => setDiffView(view)}
+                  className={`px-3 py-1 rounded-lg text-sm capitalize transition-colors ${
+                    diffView === view ? 'bg-cinema-accent text-black' : 'bg-cinema-gray hover:bg-cinema-lightgray'
+                  }`}
+                >
+                  {view}
+                </button>
+              ))}
+            </div>
+          </div>
+          <div className="grid grid-cols-2 md:grid-cols-4 gap-4 text-sm mb-3">
+            <div>
+              <p className="text-cinema-lightgray">SSIM</p>
+              <p className="font-semibold font-mono">{diff.ssim.toFixed(3)}</p>
+            </div>
+            <div>
+              <p className="text-cinema-lightgray">Changed</p>
+              <p className="font-semibold font-mono">{diff.changed_pct.toFixed(1)}%</p>
+            </div>
+            <div>
+              <p className="text-cinema-lightgray">ΔL (lightness)</p>
+              <p className="font-semibold font-mono">{diff.delta_l_mean.toFixed(2)}</p>
+            </div>
+            <div>
+              <p className="text-cinema-lightgray">ΔC (colour)</p>
+              <p className="font-semibold font-mono">{diff.delta_chroma_mean.toFixed(2)}</p>
+            </div>
+          </div>
+          <img
+            src={getOutputUrl(diffView === 'heatmap' ? diff.heatmap_path : diff.overlay_path)}
+            alt={`Change ${diffView}`}
+            className="w-full rounded-lg"
+          />
+        </div>
+      )}
 
-      {/* Downloads */}
-      {shot.hdr_16bit_path && (
-        <div className="p-4 bg-cinema-darker border-t border-cinema-gray">
-          <p className="text-sm font-semibold mb-3">Professional Exports</p>
-          <div className="grid grid-cols-2 gap-3">
-            <a
-              href={getOutputUrl(shot.hdr_16bit_path)}
-              download
-              className="px-4 py-2 bg-cinema-gray hover:bg-cinema-lightgray rounded-lg text-sm text-center transition-colors"
-            >
-              16-bit TIFF
-            </a>
+      {comparisonUrl && (
+        <>
+          {/* Header */}
+          <div className="p-4 bg-cinema-darker border-b border-cinema-gray flex items-center justify-between">
+            <h3 className="font-semibold flex items-center gap-2">
+              <Eye className="w-5 h-5 text-cinema-accent" />
+              HDR Comparison (8-bit vs 16-bit)
+            </h3>
+        
             <a
-              href={getOutputUrl(shot.hdr_16bit_path.replace('.tiff', '.png'))}
+              href={comparisonUrl}
               download
-              className="px-4 py-2 bg-cinema-gray hover:bg-cinema-lightgray rounded-lg text-sm text-center transition-colors"
+              className="px-3 py-1 bg-cinema-gray hover:bg-cinema-lightgray rounded-lg text-sm flex items-center gap-2 transition-colors"
             >
-              16-bit PNG
+              <Download className="w-4 h-4" />
+              Download
             </a>
           </div>
-        </div>
+
+          {/* Image */}
+          <div className="p-6 bg-black">
+            <img 
+              src={comparisonUrl}
+              alt="HDR Comparison"
+              className="w-full rounded-lg"
+            />
+          </div>
+
+          {/* Downloads */}
+          {shot.hdr_16bit_path && (
+            <div className="p-4 bg-cinema-darker border-t border-cinema-gray">
+              <p className="text-sm font-semibold mb-3">Professional Exports</p>
+              <div className="grid grid-cols-2 gap-3">
+                <a
+                  href={getOutputUrl(shot.hdr_16bit_path)}
+                  download
+                  className="px-4 py-2 bg-cinema-gray hover:bg-cinema-lightgray rounded-lg text-sm text-center transition-colors"
+                >
+                  16-bit TIFF
+                </a>
+                <a
+                  href={getOutputUrl(shot.hdr_16bit_path.replace('.tiff', '.png'))}
+                  download
+                  className="px-4 py-2 bg-cinema-gray hover:bg-cinema-lightgray rounded-lg text-sm text-center transition-colors"
+                >
+                  16-bit PNG
+                </a>
+              </div>
+            </div>
+          )}
+        </>
       )}
     </motion.div>
   );
@@ -1,6 +1,7 @@
 // src/components/ShotLibrary.jsx
 import { motion } from 'framer-motion';
 import { Grid, RefreshCw, Image as ImageIcon, Clock } from 'lucide-react';
+import { getThumbnailUrl, getThumbnailSrcSet } from '../lib/api';
 
 export default function ShotLibrary({ shots, onShotSelect, onRefresh }) {
   if (shots.length === 0) {
@@ -49,7 +50,18 @@ export default function ShotLibrary({ shots, onShotSelect, onRefresh }) {
             <div className="aspect-video bg-cinema-darker relative overflow-hidden">
               {shot.image_url ? (
                 <img 
-                  src={shot.image_url}
+                  src={getThumbnailUrl(shot.shot_id, 320)}
+                  srcSet={getThumbnailSrcSet(shot.shot_id)}
+                  sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                  loading="lazy"
+                  decoding="async"
+                  onError={(e) => {
+                    // Thumbnail service unavailable: fall back to the full image once
+                    if (e.currentTarget.src !== shot.image_url) {
+                      e.currentTarget.removeAttribute('srcset');
+                      e.currentTarget.src = shot.image_url;
+                    }
+                  }}
                   alt={shot.scene_description}
                   className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-300"
                 />
@@ -14,13 +14,33 @@ export const createShot = async (shotData) => {
   return response.data;
 };
 
+// Live crew output for a shot request: pass the same streamId as `stream_id` to createShot.
+// Returns the EventSource; call .close() to stop listening.
+export const subscribeShotEvents = (streamId, onEvent) => {
+  const source = new EventSource(`${API_BASE_URL}/api/shots/stream/${streamId}`);
+  const events = ['crew_started', 'agent_output', 'token', 'repair', 'structured_prompt', 'image_generating', 'shot_created', 'error'];
+  events.forEach((name) => {
+    source.addEventListener(name, (e) => {
+      onEvent(name, JSON.parse(e.data));
+      if (name === 'shot_created' || name === 'error') source.close();
+    });
+  });
+  return source;
+};
+
 export const getShot = async (shotId) => {
   const response = await api.get(`/api/shots/${shotId}`);
   return response.data;
 };
 
-export const listShots = async () => {
-  const response = await api.get('/api/shots');
+export const deleteShot = async (shotId) => {
+  const response = await api.delete(`/api/shots/${shotId}`);
+  return response.data;
+};
+
+// filters: { min_quality, flagged } (ingest quality gate)
+export const listShots = async (filters = {}) => {
+  const response = await api.get('/api/shots', { params: filters });
   return response.data;
 };
 
@@ -34,14 +54,62 @@ export const modifyParameter = async (shotId, parameterData) => {
   return response.data;
 };
 
+// Regrade an existing shot; previews only unless commit: true
+export const gradeShot = async (shotId, gradeData) => {
+  const response = await api.post(`/api/shots/${shotId}/grade`, gradeData);
+  return response.data;
+};
+
+// Fast proxy preview for slider values; resolves to an object URL (revoke when replaced)
+export const previewGrade = async (shotId, gradeData) => {
+  const response = await api.post(`/api/shots/${shotId}/grade/preview`, gradeData, { responseType: 'blob' });
+  return URL.createObjectURL(response.data);
+};
+
+// SSIM / delta E / per-region change of shot B against shot A (cached server-side)
+export const diffShots = async (shotId, otherId) => {
+  const response = await api.get(`/api/shots/${shotId}/diff/${otherId}`);
+  return response.data;
+};
+
+// Live slider previews over a WebSocket. send() as often as the slider moves;
+// the server renders only the latest state. onFrame receives an object URL.
+export const openGradePreviewSocket = (shotId, onFrame, onError) => {
+  const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/api/shots/${shotId}/grade/ws`);
+  socket.binaryType = 'blob';
+  const queue = [];
+  socket.onopen = () => queue.splice(0).forEach((msg) => socket.send(msg));
+  socket.onmessage = (e) => {
+    if (typeof e.data === 'string') {
+      if (onError) onError(JSON.parse(e.data).error);
+    } else {
+      onFrame(URL.createObjectURL(e.data));
+    }
+  };
+  return {
+    send: (gradeData) => {
+      const msg = JSON.stringify(gradeData);
+      if (socket.readyState === WebSocket.OPEN) socket.send(msg);
+      else queue.splice(0, queue.length, msg);
+    },
+    close: () => socket.close(),
+  };
+};
+
 // Storyboards API
 export const createStoryboard = async (storyboardData) => {
   const response = await api.post('/api/storyboards/create', storyboardData);
   return response.data;
 };
 
-export const getStoryboard = async (storyboardId) => {
-  const response = await api.get(`/api/storyboards/${storyboardId}`);
+// options: { shots: 'full' | 'summary' | 'none', fields: 'shot_id,image_url,...' }
+export const getStoryboard = async (storyboardId, options = {}) => {
+  const response = await api.get(`/api/storyboards/${storyboardId}`, { params: options });
+  return response.data;
+};
+
+export const reorderStoryboard = async (storyboardId, shotIds) => {
+  const response = await api.post(`/api/storyboards/${storyboardId}/reorder`, { shot_ids: shotIds });
   return response.data;
 };
 
@@ -50,11 +118,31 @@ export const listStoryboards = async () => {
   return response.data;
 };
 
+export const renderAnimatic = async (storyboardId, options = {}) => {
+  const response = await api.post(`/api/storyboards/${storyboardId}/animatic`, options);
+  return response.data;
+};
+
 // File downloads
 export const getDownloadUrl = (filename) => {
   return `${API_BASE_URL}/api/download/${filename}`;
 };
 
+// Whole storyboard as a streamed ZIP; assets: any of shots, sources, previews, masters
+export const getStoryboardZipUrl = (storyboardId, assets = []) => {
+  const query = assets.length ? `?assets=${assets.join(',')}` : '';
+  return `${API_BASE_URL}/api/storyboards/${storyboardId}/export.zip${query}`;
+};
+
+// Thumbnail rung covering width px (server ladder: 160/320/640/1280, cached forever)
+export const getThumbnailUrl = (shotId, width = 320) => {
+  return `${API_BASE_URL}/api/shots/${shotId}/thumbnail?w=${width}`;
+};
+
+export const getThumbnailSrcSet = (shotId) => {
+  return [320, 640, 1280].map((w) => `${getThumbnailUrl(shotId, w)} ${w}w`).join(', ');
+};
+
 export const getOutputUrl = (path) => {
   return `${API_BASE_URL}/${path}`;
 };